@@ -7,7 +7,7 @@
     or from invoking the tools through the CLI.
 """
 
-__version__ = '0.6.2'
+__version__ = '0.7.0'
 
 from sqloquent.classes import (
     SqlModel,
@@ -20,6 +20,9 @@ from sqloquent.classes import (
     JoinedModel,
     JoinSpec,
     dynamic_sqlmodel,
+    transaction,
+    close_pooled_connections,
+    identity_map,
     Default,
 )
 from sqloquent.interfaces import (
@@ -47,6 +50,8 @@ from sqloquent.relations import (
     belongs_to_many,
     contains,
     within,
+    prefetch,
+    relation_of,
 )
 from sqloquent.migration import (
     Column,
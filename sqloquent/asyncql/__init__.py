@@ -24,6 +24,8 @@ from .classes import (
     AsyncAttachment,
     Default,
     async_dynamic_sqlmodel,
+    async_transaction,
+    async_identity_map,
 )
 from .relations import (
     AsyncRelation,
@@ -39,4 +41,6 @@ from .relations import (
     async_belongs_to_many,
     async_contains,
     async_within,
+    async_prefetch,
+    async_relation_of,
 )
\ No newline at end of file
@@ -6,23 +6,51 @@ from sqloquent.asyncql.interfaces import (
     AsyncQueryBuilderProtocol,
     AsyncModelProtocol,
 )
-from sqloquent.classes import JoinSpec, Row, Default, quote_sql_str_value, quote_identifier
+from sqloquent.classes import (
+    JoinSpec,
+    Row,
+    Default,
+    quote_sql_str_value,
+    quote_identifier,
+    insert_sql,
+    insert_many_sql,
+    insert_many_batches,
+    upsert_sql,
+    in_sql,
+    find_sql,
+    like_sql,
+    column_defaults,
+    hashed_columns,
+    joined_columns,
+    boolean_column_set,
+    TRANSACTION_CACHED_STATEMENTS,
+    WHERE_CONDITION_TYPES,
+)
 from asyncio import iscoroutine, gather
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from hashlib import sha256
 from time import time
 from types import MappingProxyType, TracebackType, UnionType
 from typing import Any, AsyncGenerator, Optional, Type, Callable
 from uuid import uuid4
+from weakref import WeakValueDictionary
 import aiosqlite
 import packify
 
 
+_transactions: ContextVar[dict[str|bytes, aiosqlite.Connection]] = ContextVar(
+    'sqloquent_async_transactions', default={}
+)
+
+
 class AsyncSqliteContext:
     """Context manager for sqlite."""
     connection: aiosqlite.Connection
     cursor: aiosqlite.Cursor
     connection_info: str
+    in_transaction: bool
 
     def __init__(self, connection_info: str = '') -> None:
         """Initialize the instance. Raises TypeError for non-str table.
@@ -35,8 +63,15 @@ class AsyncSqliteContext:
         self.connection_info = connection_info
 
     async def __aenter__(self) -> AsyncCursorProtocol:
-        """Enter the context block and return the cursor."""
-        self.connection = await aiosqlite.connect(self.connection_info)
+        """Enter the context block and return the cursor. Reuses the
+            connection of an enclosing `async_transaction` block for
+            the same connection_info.
+        """
+        connection = _transactions.get().get(self.connection_info, None)
+        self.in_transaction = connection is not None
+        if connection is None:
+            connection = await aiosqlite.connect(self.connection_info)
+        self.connection = connection
         self.cursor = await self.connection.cursor().__aenter__()
         return self.cursor
 
@@ -44,8 +79,13 @@ class AsyncSqliteContext:
                 exc_value: Optional[BaseException],
                 traceback: Optional[TracebackType]) -> None:
         """Exit the context block. Commit or rollback as appropriate,
-            then close the connection.
+            then close the connection. Within an `async_transaction`
+            block, only the cursor is closed.
         """
+        if self.in_transaction:
+            await self.cursor.close()
+            return
+
         if exc_type is not None:
             await self.connection.rollback()
         else:
@@ -54,6 +94,80 @@ class AsyncSqliteContext:
         await self.connection.close()
 
 
+@asynccontextmanager
+async def async_transaction(connection_info: str) -> AsyncGenerator[aiosqlite.Connection, None]:
+    """Async context manager that makes AsyncSqliteContext use a single
+        connection for connection_info within the block, so that all
+        queries run in it are committed together on exit or rolled back
+        if an exception is raised. Nested blocks join the outermost
+        transaction. Raises TypeError for invalid connection_info.
+    """
+    tert(type(connection_info) in (str, bytes),
+        'connection_info must be str or bytes')
+    active = _transactions.get()
+    if connection_info in active:
+        yield active[connection_info]
+        return
+
+    connection = await aiosqlite.connect(
+        connection_info, cached_statements=TRANSACTION_CACHED_STATEMENTS
+    )
+    token = _transactions.set({**active, connection_info: connection})
+    try:
+        yield connection
+    except BaseException:
+        await connection.rollback()
+        raise
+    else:
+        await connection.commit()
+    finally:
+        _transactions.reset(token)
+        await connection.close()
+
+
+
+_identity_maps: ContextVar[WeakValueDictionary|None] = ContextVar(
+    'sqloquent_async_identity_map', default=None
+)
+
+
+@asynccontextmanager
+async def async_identity_map() -> AsyncGenerator[WeakValueDictionary, None]:
+    """Context manager that makes AsyncSqlModel.find return the instance
+        already found or inserted for the same class and id within the
+        block instead of querying the database again. Updates, deletes,
+        and raw queries run through AsyncSqlQueryBuilder clear the map.
+        Nested blocks share the outermost map. Instances are held
+        weakly, so only models still referenced elsewhere are kept.
+    """
+    active = _identity_maps.get()
+    if active is not None:
+        yield active
+        return
+
+    token = _identity_maps.set(WeakValueDictionary())
+    try:
+        yield _identity_maps.get()
+    finally:
+        _identity_maps.reset(token)
+
+
+def _clear_identity_map() -> None:
+    """Clears the active identity map, if any."""
+    active = _identity_maps.get()
+    if active is not None:
+        active.clear()
+
+
+def _remember(model: Any) -> Any:
+    """Adds a model to the active identity map, if any, and returns it."""
+    active = _identity_maps.get()
+    if active is not None and model is not None and \
+        model.data.get(model.id_column, None) is not None:
+        active[(type(model), model.data[model.id_column])] = model
+    return model
+
+
 @dataclass
 class AsyncJoinedModel:
     """Class for representing the results of SQL JOIN queries."""
@@ -84,34 +198,18 @@ class AsyncJoinedModel:
         tert(type(data) is dict, 'data must be dict')
         result = {}
         for model in models:
-            annotations = {
-                c: str(model.__annotations__.get(c)) for c in model.columns
-            }
-            for key, value in annotations.items():
-                # convert "<class 'x'>" to "x"
-                if value.startswith("<class"):
-                    annotations[key] = value.split("'")[1]
-
-            boolean_columns = [
-                c for c in model.columns
-                if annotations[c].startswith('bool')
-            ]
-            nullable_columns = [
-                c for c in model.columns
-                if 'None' in annotations[c]
-            ]
-            result[model.table] = {}
-            for column in model.columns:
-                key = f"{model.table}.{column}"
+            parsed = result[model.table] = {}
+            for column, key, is_bool in joined_columns(
+                model, model.table, tuple(model.columns)
+            ):
                 # skip unselected columns
                 if key not in data:
                     continue
-                value = data.get(key)
+                value = data[key]
                 # cast appropriate columns to bool
-                if value is not None or column in nullable_columns:
-                    if column in boolean_columns and value is not None:
-                        value = bool(value)
-                result[model.table][column] = value
+                if is_bool and value is not None:
+                    value = bool(value)
+                parsed[column] = value
         return result
 
     async def get_models(self) -> list[AsyncSqlModel]:
@@ -126,6 +224,33 @@ class AsyncJoinedModel:
                     instances.append(await model.find(model_id))
         return instances
 
+    @classmethod
+    async def get_models_many(cls, joined_models: list[AsyncJoinedModel]) -> list[list[AsyncSqlModel]]:
+        """Returns the underlying models of each of the joined models.
+            Loads the models of each class with a single query instead
+            of calling the find method once per model.
+        """
+        ids = {}
+        for joined in joined_models:
+            for model in joined.models:
+                model_id = joined.data.get(model.table, {}).get(model.id_column)
+                if model_id is not None:
+                    ids.setdefault(model, set()).add(model_id)
+
+        found = {}
+        for model, model_ids in ids.items():
+            for instance in await model.query().is_in(model.id_column, [*model_ids]).get():
+                found[(model, instance.data[model.id_column])] = instance
+
+        return [
+            [
+                found.get((model, joined.data[model.table][model.id_column]))
+                for model in joined.models
+                if model.id_column in joined.data.get(model.table, {})
+            ]
+            for joined in joined_models
+        ]
+
 
 def async_dynamic_sqlmodel(connection_string: str|bytes, table_name: str = '',
                      column_names: tuple[str] = ()) -> Type[AsyncSqlModel]:
@@ -147,6 +272,11 @@ class AsyncSqlQueryBuilder:
         specific database by supplying the context_manager param to a
         call to `super().__init__()`. Default binding is to aiosqlite.
     """
+    __slots__ = (
+        '_model', '_table', 'context_manager', 'connection_info',
+        'clauses', 'params', 'order_column', 'order_dir', 'limit',
+        'offset', 'joins', 'columns', 'grouping',
+    )
     model: Type[AsyncModelProtocol]
     context_manager: Type[AsyncDBContextProtocol]
     connection_info: str
@@ -159,6 +289,14 @@ class AsyncSqlQueryBuilder:
     joins: list[JoinSpec]
     columns: list[str]
     grouping: str
+    _reset_state: MappingProxyType = MappingProxyType({
+        'order_column': None,
+        'order_dir': 'desc',
+        'limit': None,
+        'offset': None,
+        'columns': None,
+        'grouping': None,
+    })
 
     def __init__(self, model_or_table: Type[AsyncSqlModel]|str = None,
                  context_manager: Type[AsyncDBContextProtocol] = AsyncSqliteContext,
@@ -184,8 +322,11 @@ class AsyncSqlQueryBuilder:
              'context_manager must be class implementing AsyncDBContextProtocol')
         tressa(type(model_or_table) is type or len(columns),
                'must provide class implementing AsyncModelProtocol or columns')
-        if not connection_info and hasattr(self.__class__, 'connection_info'):
-            connection_info = self.__class__.connection_info
+        if not connection_info:
+            # a class-level str binding; the slot itself is a descriptor
+            bound_info = getattr(self.__class__, 'connection_info', None)
+            if type(bound_info) in (str, bytes):
+                connection_info = bound_info
         if type(model_or_table) is type:
             self._model = model_or_table
         else:
@@ -237,10 +378,11 @@ class AsyncSqlQueryBuilder:
         tert(type(column) in (str, list, tuple),
              'column must be str, list[str,], or tuple[str,]')
         if type(column) in (list, tuple):
-            tert(all([type(c) is str for c in column]),
-                 'column must be str or list[str]')
+            clauses = []
             for c in column:
-                self.clauses.append(f'{quote_identifier(c)} is null')
+                tert(type(c) is str, 'column must be str or list[str]')
+                clauses.append(f'{quote_identifier(c)} is null')
+            self.clauses.extend(clauses)
         else:
             self.clauses.append(f'{quote_identifier(column)} is null')
         return self
@@ -253,10 +395,11 @@ class AsyncSqlQueryBuilder:
         tert(type(column) in (str, list, tuple),
              'column must be str, list[str,], or tuple[str,]')
         if type(column) in (list, tuple):
-            tert(all([type(c) is str for c in column]),
-                 'column must be str or list[str]')
+            clauses = []
             for c in column:
-                self.clauses.append(f'{quote_identifier(c)} is not null')
+                tert(type(c) is str, 'column must be str or list[str]')
+                clauses.append(f'{quote_identifier(c)} is not null')
+            self.clauses.extend(clauses)
         else:
             self.clauses.append(f'{quote_identifier(column)} is not null')
         return self
@@ -273,10 +416,13 @@ class AsyncSqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} = ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} = ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} = ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def not_equal(self, column: str = None, data: Any = None,
@@ -291,10 +437,13 @@ class AsyncSqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} != ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} != ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} != ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def less(self, column: str = None, data: Any = None,
@@ -309,10 +458,13 @@ class AsyncSqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} < ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} < ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} < ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def greater(self, column: str = None, data: Any = None,
@@ -327,12 +479,31 @@ class AsyncSqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} > ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} > ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} > ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
+    def _like_pattern(self, column: str, pattern: str, data: str,
+                      negated: bool = False) -> None:
+        """Save the like (or not like if negated) clause for the column
+            and the pattern with each ? replaced by the data as the
+            param. Raises TypeError or ValueError for invalid column,
+            pattern, or data. Used internally by like and not_like.
+        """
+        tert(type(column) is str, 'column must be str')
+        tert(type(pattern) is str, 'pattern must be str')
+        tert(type(data) is str, 'data must be str')
+        vert(len(column), 'column cannot be empty')
+        vert(len(pattern), 'pattern cannot be empty')
+        vert(len(data), 'data cannot be empty')
+        self.clauses.append(like_sql(column, negated))
+        self.params.append(pattern.replace('?', data))
+
     def like(self, column: str = None, pattern: str = None,
              data: str = None, **conditions: dict[str, tuple[str, str]]) -> AsyncSqlQueryBuilder:
         """Save the 'column like {pattern.replace(?, data)}' clause and
@@ -342,14 +513,7 @@ class AsyncSqlQueryBuilder:
             `like(column1=pattern1, data1, column2=pattern2, data2, etc=pattern3, data3)`.
         """
         if column is not None:
-            tert(type(column) is str, 'column must be str')
-            tert(type(pattern) is str, 'pattern must be str')
-            tert(type(data) is str, 'data must be str')
-            vert(len(column), 'column cannot be empty')
-            vert(len(pattern), 'pattern cannot be empty')
-            vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} like ?')
-            self.params.append(pattern.replace('?', data))
+            self._like_pattern(column, pattern, data)
 
         for column, val in conditions.items():
             tert(type(val) in (tuple, list),
@@ -357,7 +521,7 @@ class AsyncSqlQueryBuilder:
             vert(len(val) == 2,
                  'each value must be tuple or list with 2 elements: pattern, data')
             pattern, data = val
-            self.like(column, pattern, data)
+            self._like_pattern(column, pattern, data)
         return self
 
     def not_like(self, column: str = None, pattern: str = None,
@@ -369,14 +533,7 @@ class AsyncSqlQueryBuilder:
             `not_like(column1=(pattern1, data1), column2=(pattern2, data2), etc=(pattern3, data3))`.
         """
         if column is not None:
-            tert(type(column) is str, 'column must be str')
-            tert(type(pattern) is str, 'pattern must be str')
-            tert(type(data) is str, 'data must be str')
-            vert(len(column), 'column cannot be empty')
-            vert(len(pattern), 'pattern cannot be empty')
-            vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} not like ?')
-            self.params.append(pattern.replace('?', data))
+            self._like_pattern(column, pattern, data, True)
 
         for column, val in conditions.items():
             tert(type(val) in (tuple, list),
@@ -390,9 +547,24 @@ class AsyncSqlQueryBuilder:
             vert(len(column), 'column cannot be empty')
             vert(len(pattern), 'pattern cannot be empty')
             vert(len(data), 'data cannot be empty')
-            self.not_like(column, pattern, data)
+            self._like_pattern(column, pattern, data, True)
         return self
 
+    def _like(self, column: str, data: str, prefix: str = '',
+              suffix: str = '', negated: bool = False) -> None:
+        """Save the like (or not like if negated) clause for the column
+            and the data wrapped in the prefix and suffix wildcards as
+            the param. Raises TypeError or ValueError for invalid column
+            or data. Used internally by the starts_with, contains,
+            ends_with, and negated methods.
+        """
+        tert(type(column) is str, 'column must be str')
+        tert(type(data) is str, 'data must be str')
+        vert(len(column), 'column cannot be empty')
+        vert(len(data), 'data cannot be empty')
+        self.clauses.append(like_sql(column, negated))
+        self.params.append(prefix + data + suffix)
+
     def starts_with(self, column: str = None, data: str = None,
                     **conditions: dict[str, Any]) -> AsyncSqlQueryBuilder:
         """Save the 'column like data%' clause and param, then return
@@ -401,10 +573,10 @@ class AsyncSqlQueryBuilder:
             or `starts_with(column1=data1, column2=data2, etc=data3)`.
         """
         if column is not None:
-            self.like(column, '?%', data)
+            self._like(column, data, '', '%')
 
         for column, data in conditions.items():
-            self.like(column, '?%', data)
+            self._like(column, data, '', '%')
         return self
 
     def does_not_start_with(self, column: str = None, data: str = None,
@@ -416,10 +588,10 @@ class AsyncSqlQueryBuilder:
             `does_not_start_with(column1=data1, column2=data2, etc=data3)`.
         """
         if column is not None:
-            self.not_like(column, '?%', data)
+            self._like(column, data, '', '%', True)
 
         for column, data in conditions.items():
-            self.not_like(column, '?%', data)
+            self._like(column, data, '', '%', True)
         return self
 
     def contains(self, column: str = None, data: str = None,
@@ -430,10 +602,10 @@ class AsyncSqlQueryBuilder:
             or `contains(column1=data1, column2=data2, etc=data3)`.
         """
         if column is not None:
-            self.like(column, '%?%', data)
+            self._like(column, data, '%', '%')
 
         for column, data in conditions.items():
-            self.like(column, '%?%', data)
+            self._like(column, data, '%', '%')
         return self
 
     def excludes(self, column: str = None, data: str = None,
@@ -445,10 +617,10 @@ class AsyncSqlQueryBuilder:
             `excludes(column1=data1, column2=data2, etc=data3)`.
         """
         if column is not None:
-            self.not_like(column, '%?%', data)
+            self._like(column, data, '%', '%', True)
 
         for column, data in conditions.items():
-            self.not_like(column, '%?%', data)
+            self._like(column, data, '%', '%', True)
         return self
 
     def ends_with(self, column: str = None, data: str = None,
@@ -459,10 +631,10 @@ class AsyncSqlQueryBuilder:
             or `ends_with(column1=data1, column2=data2, etc=data3)`.
         """
         if column is not None:
-            self.like(column, '%?', data)
+            self._like(column, data, '%')
 
         for column, data in conditions.items():
-            self.like(column, '%?', data)
+            self._like(column, data, '%')
         return self
 
     def does_not_end_with(self, column: str = None, data: str = None,
@@ -474,10 +646,10 @@ class AsyncSqlQueryBuilder:
             `does_not_end_with(column1=data1, column2=data2, etc=data3)`.
         """
         if column is not None:
-            self.not_like(column, '%?', data)
+            self._like(column, data, '%', '', True)
 
         for column, data in conditions.items():
-            self.not_like(column, '%?', data)
+            self._like(column, data, '%', '', True)
         return self
 
     def is_in(self, column: str = None, data: tuple|list = None,
@@ -492,11 +664,21 @@ class AsyncSqlQueryBuilder:
             tert(type(data) in (tuple, list), 'data must be tuple or list')
             vert(len(column), 'column cannot be empty')
             vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} in ({",".join(["?" for _ in data])})')
-            self.params.extend(data)
+            clause, values = in_sql(column, data)
+            self.clauses.append(clause)
+            self.params.extend(values)
 
+        clauses, params = [], []
         for column, data in conditions.items():
-            self.is_in(column, data)
+            tert(type(column) is str, 'column must be str')
+            tert(type(data) in (tuple, list), 'data must be tuple or list')
+            vert(len(column), 'column cannot be empty')
+            vert(len(data), 'data cannot be empty')
+            clause, values = in_sql(column, data)
+            clauses.append(clause)
+            params += values
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def not_in(self, column: str = None, data: tuple|list = None,
@@ -511,11 +693,21 @@ class AsyncSqlQueryBuilder:
             tert(type(data) in (tuple, list), 'data must be tuple or list')
             vert(len(column), 'column cannot be empty')
             vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} not in ({",".join(["?" for _ in data])})')
-            self.params.extend(data)
+            clause, values = in_sql(column, data, True)
+            self.clauses.append(clause)
+            self.params.extend(values)
 
+        clauses, params = [], []
         for column, data in conditions.items():
-            self.not_in(column, data)
+            tert(type(column) is str, 'column must be str')
+            tert(type(data) in (tuple, list), 'data must be tuple or list')
+            vert(len(column), 'column cannot be empty')
+            vert(len(data), 'data cannot be empty')
+            clause, values = in_sql(column, data, True)
+            clauses.append(clause)
+            params += values
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def where(self, **conditions: dict[str, dict[str, Any]|list[str]]) -> AsyncSqlQueryBuilder:
@@ -537,61 +729,27 @@ class AsyncSqlQueryBuilder:
             does_not_end_with={'column1':str1, 'column2':str2, 'etc':str3},
             is_in={'column1':list1, 'column2':list2, 'etc':list3},
             not_in={'column1':list1, 'column2':list2, 'etc':list3})`. All
-            kwargs are optional.
-        """
-        for condition_type, condition_data in conditions.items():
-            vert(condition_type in (
-                'is_null', 'not_null', 'equal', 'not_equal', 'less', 'greater',
-                'like', 'not_like', 'starts_with', 'does_not_start_with',
-                'contains', 'excludes', 'ends_with', 'does_not_end_with',
-                'is_in', 'not_in'
-            ), 'unrecognized condition type')
-            if condition_type == 'is_null':
-                self.is_null(condition_data)
-            elif condition_type == 'not_null':
-                self.not_null(condition_data)
-            elif condition_type == 'equal':
-                tert(type(condition_data) is dict, 'equal must be dict[str, Any]')
-                self.equal(**condition_data)
-            elif condition_type == 'not_equal':
-                tert(type(condition_data) is dict, 'not_equal must be dict[str, Any]')
-                self.not_equal(**condition_data)
-            elif condition_type == 'less':
-                tert(type(condition_data) is dict, 'less must be dict[str, Any]')
-                self.less(**condition_data)
-            elif condition_type == 'greater':
-                tert(type(condition_data) is dict, 'greater must be dict[str, Any]')
-                self.greater(**condition_data)
-            elif condition_type == 'like':
-                tert(type(condition_data) is dict, 'like must be dict[str, tuple[str, str]]')
-                self.like(**condition_data)
-            elif condition_type == 'not_like':
-                tert(type(condition_data) is dict, 'not_like must be dict[str, tuple[str, str]]')
-                self.not_like(**condition_data)
-            elif condition_type == 'starts_with':
-                tert(type(condition_data) is dict, 'starts_with must be dict[str, str]')
-                self.starts_with(**condition_data)
-            elif condition_type == 'does_not_start_with':
-                tert(type(condition_data) is dict, 'does_not_start_with must be dict[str, str]')
-                self.does_not_start_with(**condition_data)
-            elif condition_type == 'contains':
-                tert(type(condition_data) is dict, 'contains must be dict[str, str]')
-                self.contains(**condition_data)
-            elif condition_type == 'excludes':
-                tert(type(condition_data) is dict, 'excludes must be dict[str, str]')
-                self.excludes(**condition_data)
-            elif condition_type == 'ends_with':
-                tert(type(condition_data) is dict, 'ends_with must be dict')
-                self.ends_with(**condition_data)
-            elif condition_type == 'does_not_end_with':
-                tert(type(condition_data) is dict, 'does_not_end_with must be dict')
-                self.does_not_end_with(**condition_data)
-            elif condition_type == 'is_in':
-                tert(type(condition_data) is dict, 'is_in must be dict')
-                self.is_in(**condition_data)
-            elif condition_type == 'not_in':
-                tert(type(condition_data) is dict, 'not_in must be dict')
-                self.not_in(**condition_data)
+            kwargs are optional. The conditions are collected separately
+            and saved in one batch, so nothing is saved if any of them
+            is invalid.
+        """
+        clauses, params = self.clauses, self.params
+        self.clauses, self.params = [], []
+        try:
+            for condition_type, condition_data in conditions.items():
+                vert(condition_type in WHERE_CONDITION_TYPES,
+                     'unrecognized condition type')
+                method = getattr(self, condition_type)
+                message = WHERE_CONDITION_TYPES[condition_type]
+                if message is None:
+                    method(condition_data)
+                else:
+                    tert(type(condition_data) is dict, message)
+                    method(**condition_data)
+            clauses.extend(self.clauses)
+            params.extend(self.params)
+        finally:
+            self.clauses, self.params = clauses, params
         return self
 
     def order_by(self, column: str = None, direction: str = 'desc',
@@ -626,12 +784,43 @@ class AsyncSqlQueryBuilder:
         self.offset = offset
         return self
 
+    def _clone(self) -> AsyncSqlQueryBuilder:
+        """Returns a shallow copy of the instance, including any
+            attributes set by subclasses, without calling __init__.
+        """
+        sqb = object.__new__(self.__class__)
+        for name in AsyncSqlQueryBuilder.__slots__:
+            setattr(sqb, name, getattr(self, name))
+        if hasattr(self, '__dict__'):
+            sqb.__dict__.update(self.__dict__)
+        return sqb
+
     def reset(self) -> AsyncSqlQueryBuilder:
-        """Returns a fresh instance using the configured model."""
-        return self.__class__(
-            model=self.model, context_manager=self.context_manager,
-            connection_info=self.connection_info
-        )
+        """Returns a fresh instance using the configured model. Skips
+            the validation done in __init__.
+        """
+        sqb = self._clone()
+        for name, value in self._reset_state.items():
+            setattr(sqb, name, value)
+        sqb._table = self._model.table
+        sqb.connection_info = self._model.connection_info
+        sqb.clauses = []
+        sqb.params = []
+        sqb.joins = []
+        return sqb
+
+    def copy(self) -> AsyncSqlQueryBuilder:
+        """Returns a copy of the instance with its own clauses, params,
+            joins, and columns lists. Skips the validation done in
+            __init__.
+        """
+        sqb = self._clone()
+        sqb.clauses = [*self.clauses]
+        sqb.params = [*self.params]
+        sqb.joins = [*self.joins]
+        if self.columns is not None:
+            sqb.columns = [*self.columns]
+        return sqb
 
     async def insert(self, data: dict) -> Optional[AsyncSqlModel|Row]:
         """Insert a record and return a model instance. Raises TypeError
@@ -641,26 +830,26 @@ class AsyncSqlQueryBuilder:
         tert(isinstance(data, dict), 'data must be dict')
         columns, params = [], []
 
-        for key in data:
-            if key in data:
-                if key in self.model.columns:
-                    columns.append(key)
-                    params.append(data[key])
-
+        # walk the model columns rather than the data keys so that the
+        # same set of columns always yields the same cached statement
         for key in self.model.columns:
-            if key not in data and key != self.model.id_column:
+            if key in data:
+                columns.append(key)
+                params.append(data[key])
+            elif key != self.model.id_column:
                 data[key] = None
 
+        # check for an existing record in the insert statement itself
         if self.model.id_column in columns:
-            vert(await self.find(data[self.model.id_column]) is None,
-                 'record with this id already exists')
-
-        sql = f'insert into {self.model.table} ({",".join(columns)})' + \
-            f' values ({",".join(["?" for p in params])})'
+            sql = insert_sql(self.model.table, tuple(columns), self.model.id_column)
+            params.append(data[self.model.id_column])
+        else:
+            sql = insert_sql(self.model.table, tuple(columns))
 
         async with self.context_manager(self.connection_info) as cursor:
             await cursor.execute(sql, params)
-            return self.model(data=data) if self.model else Row(data=data)
+            vert(cursor.rowcount != 0, 'record with this id already exists')
+            return _remember(self.model(data=data)) if self.model else Row(data=data)
 
     async def insert_many(self, items: list[dict]) -> int:
         """Insert a batch of records and return the number inserted.
@@ -675,18 +864,52 @@ class AsyncSqlQueryBuilder:
                     item[key] = None
             rows.append(tuple([item[key] for key in self.model.columns]))
 
-        sql = f"insert into {self.model.table} values "\
-            f"({','.join(['?' for f in self.model.columns])})"
+        columns = tuple(self.model.columns)
+        inserted = 0
 
         async with self.context_manager(self.connection_info) as cursor:
-            return (await cursor.executemany(sql, rows)).rowcount
+            for count, params in insert_many_batches(columns, rows):
+                sql = insert_many_sql(self.model.table, columns, count)
+                inserted += (await cursor.execute(sql, params)).rowcount
+            return inserted
+
+    async def upsert(self, data: dict,
+               conflict_columns: tuple[str, ...]|list[str] = None) -> int:
+        """Insert a record, or update the existing record with the same
+            values for the conflict_columns (the id column by default),
+            in a single statement and return the number of records
+            changed (not a model instance, unlike insert). The
+            conflict_columns must have a primary key or unique index.
+            No model event hooks are invoked. Cannot be used with a
+            AsyncHashedModel, since updating the record in place would make its
+            content no longer match its id. Raises TypeError for invalid
+            data or conflict_columns or a AsyncHashedModel model or ValueError if
+            data has no columns.
+        """
+        tert(isinstance(data, dict), 'data must be dict')
+        tert(not (isinstance(self.model, type) and issubclass(self.model, AsyncHashedModel)),
+             'upsert cannot be used with AsyncHashedModel')
+        if conflict_columns is None:
+            conflict_columns = (self.model.id_column,)
+        tert(type(conflict_columns) in (tuple, list),
+             'conflict_columns must be tuple[str]|list[str]')
+        # same column order as insert so that statements are reused
+        columns = tuple(c for c in self.model.columns if c in data)
+        vert(len(columns) > 0, 'data must include at least one column')
+
+        sql = upsert_sql(self.model.table, columns, tuple(conflict_columns))
+        _clear_identity_map()
+        async with self.context_manager(self.connection_info) as cursor:
+            return (await cursor.execute(sql, [data[c] for c in columns])).rowcount
 
     async def find(self, id: Any) -> Optional[AsyncSqlModel|Row]:
         """Find a record by its id and return it."""
         async with self.context_manager(self.connection_info) as cursor:
             await cursor.execute(
-                f'select {",".join(self.model.columns)} from {self.model.table}' +
-                f' where {self.model.id_column} = ?',
+                find_sql(
+                    self.model.table, tuple(self.model.columns),
+                    self.model.id_column
+                ),
                 [id]
             )
             result = await cursor.fetchone()
@@ -695,10 +918,9 @@ class AsyncSqlQueryBuilder:
             return None
 
         # find boolean columns
-        boolean_columns = [
-            c for c in self.model.columns
-            if 'bool' in str(self.model.__annotations__.get(c))
-        ] if self.model else []
+        boolean_columns = boolean_column_set(
+            self.model, tuple(self.model.columns)
+        ) if self.model else frozenset()
 
         data = {
             column: bool(value)
@@ -707,7 +929,7 @@ class AsyncSqlQueryBuilder:
             for column, value in zip(self.model.columns, result)
         }
 
-        return self.model(data=data) if self.model else Row(data=data)
+        return _remember(self.model(data=data)) if self.model else Row(data=data)
 
     def join(self, model_or_table: Type[AsyncSqlModel]|str, on: list[str],
              kind: str = "inner", joined_table_columns: tuple[str] = (),
@@ -725,7 +947,8 @@ class AsyncSqlQueryBuilder:
         if type(model) is not type:
             model = async_dynamic_sqlmodel(self.connection_info, model, joined_table_columns)
         tert(type(on) is list, "on must be list[str]")
-        tert(all([type(o) is str for o in on]), "on must be list[str]")
+        for o in on:
+            tert(type(o) is str, "on must be list[str]")
         tert(type(kind) is str, "kind must be str")
         vert(len(on) in (2, 3),
              "on must be of form [column, column] or [column, comparison, column]")
@@ -777,7 +1000,8 @@ class AsyncSqlQueryBuilder:
             columns.
         """
         tert(type(columns) in (list, tuple), "select columns must be list[str]")
-        tert(all([type(c) is str for c in columns]), "select columns must be list[str]")
+        for c in columns:
+            tert(type(c) is str, "select columns must be list[str]")
         self.columns = [*columns]
         return self
 
@@ -835,20 +1059,7 @@ class AsyncSqlQueryBuilder:
             for j in self.joins
         ])
 
-        if len(self.clauses) > 0:
-            sql += ' where ' + ' and '.join(self.clauses)
-
-        if self.grouping:
-            sql += f' group by {self.grouping}'
-
-        if self.order_column is not None:
-            sql += f' order by {self.order_column} {self.order_dir}'
-
-        if type(self.limit) is int and self.limit > 0:
-            sql += f' limit {self.limit}'
-
-            if type(self.offset) is int and self.offset > 0:
-                sql += f' offset {self.offset}'
+        sql += self._select_tail_sql()
 
         async with self.context_manager(self.connection_info) as cursor:
             await cursor.execute(sql, self.params)
@@ -880,50 +1091,53 @@ class AsyncSqlQueryBuilder:
         quoted_columns = [quote_identifier(c) for c in columns]
         sql = f'select {",".join(quoted_columns)} from {quote_identifier(self.model.table)}'
 
+        sql += self._select_tail_sql()
+
+        boolean_columns = boolean_column_set(
+            self.model, tuple(self.model.columns)
+        ) if self.model else frozenset()
+
+        async with self.context_manager(self.connection_info) as cursor:
+            await cursor.execute(sql, self.params)
+            rows = await cursor.fetchall()
+            # pick the result type and conversion once for all rows
+            result_class = Row if self.grouping or not self.model else self.model
+            if not boolean_columns.intersection(columns):
+                return [result_class(data=dict(zip(columns, row))) for row in rows]
+            # flag the bool columns by position rather than by set lookup
+            is_bool = [c in boolean_columns for c in columns]
+            return [
+                result_class(data={
+                    key: bool(value) if (flag and value is not None) else value
+                    for key, value, flag in zip(columns, row, is_bool)
+                })
+                for row in rows
+            ]
+
+    def _select_tail_sql(self) -> str:
+        """Returns the where, group by, order by, limit, and offset
+            parts of a select query, joined from a list of fragments.
+            Used by the `get` method. Do not call this method manually.
+        """
+        parts = []
+
         if len(self.clauses) > 0:
-            sql += ' where ' + ' and '.join(self.clauses)
+            parts.append(' where ')
+            parts.append(' and '.join(self.clauses))
 
         if self.grouping:
-            sql += f' group by {self.grouping}'
+            parts.append(f' group by {self.grouping}')
 
         if self.order_column is not None:
-            sql += f' order by {self.order_column} {self.order_dir}'
+            parts.append(f' order by {self.order_column} {self.order_dir}')
 
         if type(self.limit) is int and self.limit > 0:
-            sql += f' limit {self.limit}'
+            parts.append(f' limit {self.limit}')
 
             if type(self.offset) is int and self.offset > 0:
-                sql += f' offset {self.offset}'
+                parts.append(f' offset {self.offset}')
 
-        boolean_columns = [
-            c for c in self.model.columns
-            if 'bool' in str(self.model.__annotations__.get(c))
-        ] if self.model else []
-
-        async with self.context_manager(self.connection_info) as cursor:
-            await cursor.execute(sql, self.params)
-            rows = await cursor.fetchall()
-            if self.grouping or not self.model:
-                models = [
-                    Row(data={
-                        key: bool(value)
-                        if (key in boolean_columns and value is not None)
-                        else value
-                        for key, value in zip(columns, row)
-                    })
-                    for row in rows
-                ]
-            else:
-                models = [
-                    self.model(data={
-                        key: bool(value)
-                        if (key in boolean_columns and value is not None)
-                        else value
-                        for key, value in zip(columns, row)
-                    })
-                    for row in rows
-                ]
-            return models
+        return ''.join(parts)
 
     async def count(self) -> int:
         """Returns the number of records matching the query."""
@@ -954,17 +1168,22 @@ class AsyncSqlQueryBuilder:
         return self._chunk(number)
 
     async def _chunk(self, number: int) -> AsyncGenerator[list[AsyncSqlModel]|list[AsyncJoinedModel]|list[Row], None, None]:
-        """Create the generator for chunking."""
-        original_offset = self.offset
+        """Create the generator for chunking. Stops without another
+            query once a chunk comes back short.
+        """
+        original_offset, original_limit = self.offset, self.limit
         self.offset = self.offset or 0
-        result = await self.take(number)
-
-        while len(result) > 0:
-            yield result
-            self.offset += number
+        try:
             result = await self.take(number)
 
-        self.offset = original_offset
+            while len(result) > 0:
+                yield result
+                if len(result) < number:
+                    break
+                self.offset += number
+                result = await self.take(number)
+        finally:
+            self.offset, self.limit = original_offset, original_limit
 
     async def first(self) -> Optional[AsyncSqlModel|Row]:
         """Run the query on the datastore and return the first result."""
@@ -976,10 +1195,9 @@ class AsyncSqlQueryBuilder:
         if self.order_column is not None:
             sql += f' order by {self.order_column} {self.order_dir}'
 
-        boolean_columns = [
-            c for c in self.model.columns
-            if 'bool' in str(self.model.__annotations__.get(c))
-        ] if self.model else []
+        boolean_columns = boolean_column_set(
+            self.model, tuple(self.model.columns)
+        ) if self.model else frozenset()
 
         async with self.context_manager(self.connection_info) as cursor:
             await cursor.execute(sql, self.params)
@@ -1032,6 +1250,7 @@ class AsyncSqlQueryBuilder:
             sql += f' where {" and ".join(condition_columns)}'
 
         # update database
+        _clear_identity_map()
         async with self.context_manager(self.connection_info) as cursor:
             return (await cursor.execute(sql, [*params, *condition_params])).rowcount
 
@@ -1044,6 +1263,7 @@ class AsyncSqlQueryBuilder:
         if len(self.clauses) > 0:
             sql += ' where ' + ' and '.join(self.clauses)
 
+        _clear_identity_map()
         async with self.context_manager(self.connection_info) as cursor:
             return (await cursor.execute(sql, self.params)).rowcount
 
@@ -1056,27 +1276,36 @@ class AsyncSqlQueryBuilder:
             question marks, and an additional list of params will be
             returned along with the SQL str.
         """
-        sql = f' where {" and ".join(self.clauses)}'
+        parts = [' where ']
 
         if interpolate_params:
-            bindings = []
-            for clause, param in zip(self.clauses, self.params):
-                if type(param) in (tuple, list):
-                    bindings.append(clause.replace('?', f'[{",".join(quote_sql_str_value(str(p)) for p in param)}]'))
-                else:
-                    bindings.append(clause.replace('?', quote_sql_str_value(str(param))))
-
-            sql = f' where {" and ".join(bindings)}'
+            # each ? in each clause consumes the next param in order
+            params = iter(self.params)
+            for i, clause in enumerate(self.clauses):
+                if i:
+                    parts.append(' and ')
+                segments = clause.split('?')
+                parts.append(segments[0])
+                for segment in segments[1:]:
+                    param = next(params, None)
+                    if type(param) in (tuple, list):
+                        parts.append(f'[{",".join(quote_sql_str_value(str(p)) for p in param)}]')
+                    else:
+                        parts.append(quote_sql_str_value(str(param)))
+                    parts.append(segment)
+        else:
+            parts.append(' and '.join(self.clauses))
 
         if self.order_column is not None:
-            sql += f' order by {self.order_column} {self.order_dir}'
+            parts.append(f' order by {self.order_column} {self.order_dir}')
 
         if type(self.limit) is int and self.limit > 0:
-            sql += f' limit {self.limit}'
+            parts.append(f' limit {self.limit}')
 
             if type(self.offset) is int and self.offset > 0:
-                sql += f' offset {self.offset}'
+                parts.append(f' offset {self.offset}')
 
+        sql = ''.join(parts)
         return sql if interpolate_params else (sql, self.params)
 
     async def execute_raw(self, sql: str) -> tuple[int, list[tuple[Any]]]:
@@ -1084,6 +1313,7 @@ class AsyncSqlQueryBuilder:
             fetchall results.
         """
         tert(type(sql) is str, 'sql must be str')
+        _clear_identity_map()
         async with self.context_manager(self.connection_info) as cursor:
             await cursor.execute(sql)
             return (cursor.rowcount, await cursor.fetchall())
@@ -1106,17 +1336,21 @@ class AsyncSqlModel:
         """Initialize the instance. Raises TypeError or ValueError if
             _post_init_hooks is not dict[Any, callable].
         """
-        self.data = {}
+        columns = tuple(self.columns)
+        self.data = {
+            key: data[key] for key in data
+            if key in columns and type(key) is str
+        }
 
-        if not hasattr(self.__class__, 'disable_column_property_mapping'):
+        # map the column properties once per class and set of columns
+        cls = self.__class__
+        if not hasattr(cls, 'disable_column_property_mapping') and \
+                cls.__dict__.get('_mapped_columns', None) != columns:
             names = dir(self)
-            for column in self.columns:
+            for column in columns:
                 if column not in names:
-                    setattr(self.__class__, column, self.create_property(column))
-
-        for key in data:
-            if key in self.columns and type(key) is str:
-                self.data[key] = data[key]
+                    setattr(cls, column, self.create_property(column))
+            cls._mapped_columns = columns
 
         self.data_original = MappingProxyType({**self.data})
 
@@ -1164,23 +1398,30 @@ class AsyncSqlModel:
     @classmethod
     async def invoke_hooks(cls, event: str, *args, **kwargs):
         """Invoke the hooks for the event, passing cls, *args, and
-            **kwargs. if parallel_hooks=True is passed in the kwargs,
-            all coroutines returned from hooks will be awaited
-            concurrently (with `asyncio.gather`) after non-async hooks
-            have executed; otherwise, each will be waited individually.
+            **kwargs. if parallel_events=True (or parallel_hooks=True)
+            is passed in the kwargs, all coroutines returned from hooks
+            will be awaited concurrently (with `asyncio.gather`) after
+            non-async hooks have executed; otherwise, each will be
+            waited individually.
         """
-        if cls._event_hooks.get('class', None) != cls.__name__:
-            cls._event_hooks = {f'class': cls.__name__} # give each class its own event hooks dict
+        hooks = cls._event_hooks
+        if hooks.get('class', None) != cls.__name__:
+            return # no hooks have been added for this class
+        hooks = hooks.get(event, None)
+        if not hooks:
+            return # no hooks have been added for this event
+        parallel = kwargs.get('parallel_events', False) or \
+            kwargs.get('parallel_hooks', False)
         cors = []
-        for hook in cls._event_hooks.get(event, []):
+        for hook in hooks:
             val = hook(cls, *args, event=event, **kwargs)
             if iscoroutine(val):
-                if kwargs.get('parallel_hooks', False):
+                if parallel:
                     cors.append(val)
                 else:
                     await val
         if len(cors):
-            await gather(cors)
+            await gather(*cors)
 
     @staticmethod
     def create_property(name) -> property:
@@ -1232,8 +1473,14 @@ class AsyncSqlModel:
     @classmethod
     async def find(cls, id: Any) -> Optional[AsyncSqlModel]:
         """Find a record by its id and return it. Return None if it does
-            not exist.
+            not exist. Within an async_identity_map block, an
+            instance already loaded for the id is returned instead.
         """
+        active = _identity_maps.get()
+        if active is not None:
+            model = active.get((cls, id), None)
+            if model is not None:
+                return model
         return await cls().query().find(id)
 
     @classmethod
@@ -1384,7 +1631,8 @@ class AsyncSqlModel:
             )
         tressa(self.id_column in self.data,
                'id_column must be set in self.data to reload from db')
-        reloaded = await self.find(self.data[self.id_column])
+        # bypass any identity map to read the stored values
+        reloaded = await self.query().find(self.data[self.id_column])
         if reloaded:
             self.data = reloaded.data
             self.data_original = reloaded.data_original
@@ -1400,11 +1648,22 @@ class AsyncSqlModel:
             Conditions are parsed as key=value and cannot handle other
             comparison types. If connection_info is not injected and was
             added as a class attribute, that class attribute will be
-            passed to the query_builder_class instead.
+            passed to the query_builder_class instead. Query builders
+            subclassing AsyncSqlQueryBuilder are copied from one cached per class.
         """
         if not connection_info and hasattr(cls, 'connection_info'):
             connection_info = cls.connection_info
-        sqb = cls.query_builder_class(model=cls, connection_info=connection_info)
+        key = (cls.query_builder_class, connection_info, cls.table)
+        cached = cls.__dict__.get('_query_prototype', None)
+        if cached is not None and cached[0] == key:
+            sqb = cached[1].copy()
+        else:
+            sqb = cls.query_builder_class(model=cls, connection_info=connection_info)
+            # subclasses may keep state set up by __init__, which the
+            # prototype copy would skip and share between queries
+            if type(sqb) is AsyncSqlQueryBuilder:
+                cls._query_prototype = (key, sqb)
+                sqb = sqb.copy()
 
         if conditions is not None:
             for key in conditions:
@@ -1504,39 +1763,16 @@ class AsyncHashedModel(AsyncSqlModel):
             columns_excluded_from_hash tuple will be excluded from the
             sha256 hash.
         """
-        for name in cls.columns:
-            if name not in data and name != cls.id_column:
-                # if the column annotation has a default value, use it
-                if name in cls.__annotations__:
-                    annotation = str(cls.__annotations__[name])
-                    if 'Default' in annotation:
-                        default = annotation[annotation.index('Default') + 8:-1]
-                        if default.lower() == 'true':
-                            data[name] = True
-                        elif default.lower() == 'false':
-                            data[name] = False
-                        elif 'int' in annotation and default.isnumeric():
-                            data[name] = int(default)
-                        elif 'float' in annotation:
-                            data[name] = float(default)
-                        elif 'bytes' in annotation:
-                            if default[0] == 'b':
-                                data[name] = default[2:-1].encode('utf-8')
-                            else:
-                                data[name] = default.encode('utf-8')
-                        elif default[0] == "'" or default[0] == '"':
-                            data[name] = default[1:-1]
-                        else:
-                            data[name] = default
-                    else:
-                        data[name] = None
-                else:
-                    data[name] = None
-        data = {
-            k: data[k] for k in data
-            if k in cls.columns and k != cls.id_column and k not in cls.columns_excluded_from_hash
-        }
-        preimage = packify.pack(data)
+        columns = tuple(cls.columns)
+        defaults = column_defaults(cls, columns, cls.id_column)
+        for name, default in defaults.items():
+            if name not in data:
+                data[name] = default
+        preimage = packify.pack({
+            k: data[k] for k in hashed_columns(
+                columns, cls.id_column, tuple(cls.columns_excluded_from_hash)
+            )
+        })
         return sha256(preimage).digest().hex()
 
     @classmethod
@@ -132,10 +132,11 @@ class AsyncModelProtocol(Protocol):
     @classmethod
     def invoke_hooks(cls, event: str, *args, **kwargs):
         """Invoke the hooks for the event, passing cls, *args, and
-            **kwargs. if parallel_hooks=True is passed in the kwargs,
-            all coroutines returned from hooks will be awaited
-            concurrently (with `asyncio.gather`) after non-async hooks
-            have executed; otherwise, each will be waited individually.
+            **kwargs. if parallel_events=True (or parallel_hooks=True)
+            is passed in the kwargs, all coroutines returned from hooks
+            will be awaited concurrently (with `asyncio.gather`) after
+            non-async hooks have executed; otherwise, each will be
+            waited individually.
         """
         ...
 
@@ -6,11 +6,21 @@ from sqloquent.asyncql.interfaces import (
     AsyncRelatedCollection,
     AsyncRelatedModel,
 )
+from sqloquent.asyncql.classes import (
+    AsyncSqliteContext,
+    async_transaction,
+    _identity_maps,
+    _remember,
+    _transactions,
+)
 from sqloquent.tools import _pascalcase_to_snake_case
 from abc import abstractmethod
+from collections import Counter
+from contextlib import nullcontext
 from copy import deepcopy
 from types import MappingProxyType
-from typing import Awaitable, Optional, Type
+from typing import Any, Awaitable, Callable, Optional, Type
+from weakref import WeakKeyDictionary
 import asyncio
 import nest_asyncio
 
@@ -28,8 +38,97 @@ def run(task: Awaitable):
         loop.close()
 
 
+class _ReloadBatcher:
+    """Coalesces single-model lookups into one query. Lookups are
+        batched together only if they are requested within the same
+        event loop tick (e.g. by coroutines started with
+        asyncio.gather) and share the same model class, column, active
+        `async_transaction` connections, and active identity map, so
+        that a batch never runs a caller's lookup on another caller's
+        transaction; each batch is loaded with one `is_in` query, and
+        the first matching row for each value is returned.
+    """
+    def __init__(self) -> None:
+        self.pending: dict[tuple, dict[Any, list[asyncio.Future]]] = {}
+        # the event loop only keeps weak references to tasks, so the
+        # pending flushes are kept here until they finish
+        self.tasks: set[asyncio.Task] = set()
+
+    def load(self, model_class: Type[AsyncModelProtocol], column: str,
+             value: Any) -> asyncio.Future:
+        """Returns a future resolving to the first model_class instance
+            with column equal to value, or None if there is none. Id
+            lookups are served from the active identity map if possible.
+        """
+        loop = asyncio.get_running_loop()
+        active = _identity_maps.get()
+        if active is not None and column == model_class.id_column:
+            model = active.get((model_class, value), None)
+            if model is not None:
+                future = loop.create_future()
+                future.set_result(model)
+                return future
+        # the batch is flushed in the first caller's context, so only
+        # callers with the same transactions and identity map may share
+        # it; both objects are kept alive by that context until then
+        key = (
+            loop, model_class, column, id(_transactions.get()), id(active)
+        )
+        if key not in self.pending:
+            self.pending[key] = {}
+            task = loop.create_task(self._flush(key))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        future = loop.create_future()
+        self.pending[key].setdefault(value, []).append(future)
+        return future
+
+    async def _flush(self, key: tuple) -> None:
+        """Load a batch and resolve the futures waiting on it."""
+        batch = self.pending.pop(key)
+        _, model_class, column, _, _ = key
+        try:
+            results = await model_class.query().is_in(
+                column, _pad_ids(list(batch))
+            ).get()
+        except BaseException as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        found = {}
+        for model in results:
+            if model.data[column] not in found:
+                found[model.data[column]] = _remember(model)
+
+        for value, futures in batch.items():
+            model = found.get(value, None)
+            for future in futures:
+                if not future.done():
+                    future.set_result(model)
+                    # each waiter gets its own instance
+                    if model is not None:
+                        model = model_class({**model.data})
+
+
+_reload_batcher = _ReloadBatcher()
+
+
+# maps the getter of each related property to the function returning
+# the relation of a model instance; see async_relation_of
+_relation_getters: WeakKeyDictionary[Callable, Callable] = WeakKeyDictionary()
+
+
 class AsyncRelation:
     """Base class for setting up relations."""
+    __slots__ = (
+        '_primary', '_secondary', 'primary_class', 'secondary_class',
+        'primary_to_add', 'primary_to_remove', 'secondary_to_add',
+        'secondary_to_remove', '_primary_name', '_secondary_name',
+        '_prefetched',
+    )
     primary_class: Type[AsyncModelProtocol]
     secondary_class: Type[AsyncModelProtocol]
     primary_to_add: AsyncModelProtocol
@@ -53,8 +152,13 @@ class AsyncRelation:
     ) -> None:
         self._primary = None
         self._secondary = None
+        # set by reload_many so that a missing secondary is not queried
+        # again on first access
+        self._prefetched = False
         self.primary_class = primary_class
         self.secondary_class = secondary_class
+        self._primary_name = primary_class.__name__
+        self._secondary_name = secondary_class.__name__
         self.primary_to_add = primary_to_add
         self.primary_to_remove = primary_to_remove
         self.secondary_to_add = secondary_to_add
@@ -124,20 +228,29 @@ class AsyncRelation:
         """Sets the secondary model instance(s)."""
         pass
 
+    def has_pending_changes(self) -> bool:
+        """Returns True if the relation has changes that were not yet
+            saved.
+        """
+        return self.primary_to_add is not None or \
+            self.primary_to_remove is not None or \
+            len(self.secondary_to_add) > 0 or \
+            len(self.secondary_to_remove) > 0
+
     def primary_model_precondition(self, primary: AsyncModelProtocol) -> None:
         """Precondition check for the primary instance. Raises TypeError
             if the check fails.
         """
         if self.primary_class is not None:
             tert(isinstance(primary, self.primary_class),
-                f'primary must be instance of {self.primary_class.__name__}')
+                f'primary must be instance of {self._primary_name}')
 
     def secondary_model_precondition(self, secondary: AsyncModelProtocol) -> None:
         """Precondition check for a secondary instance. Raises TypeError
             if the check fails.
         """
         tert(isinstance(secondary, self.secondary_class),
-            f'secondary must be instance of {self.secondary_class.__name__}')
+            f'secondary must be instance of {self._secondary_name}')
 
     @staticmethod
     def pivot_preconditions(pivot: Type[AsyncModelProtocol]) -> None:
@@ -160,6 +273,19 @@ class AsyncRelation:
         """Reload the relation from the database. Return self in monad pattern."""
         pass
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncRelation]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database. Subclasses that support it load all of
+            them with a single query; otherwise, each relation is
+            reloaded individually. Empty relations are skipped.
+        """
+        for relation in relations:
+            try:
+                await relation.reload()
+            except ValueError:
+                pass
+
     @abstractmethod
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
@@ -167,8 +293,8 @@ class AsyncRelation:
 
     def get_cache_key(self) -> str:
         """Returns the cache key for the AsyncRelation."""
-        return (f'{self.primary_class.__name__}_{self.__class__.__name__}'
-                     f'_{self.secondary_class.__name__}')
+        return (f'{self._primary_name}_{self.__class__.__name__}'
+                     f'_{self._secondary_name}')
 
     @abstractmethod
     def create_property(self) -> property:
@@ -181,6 +307,7 @@ class AsyncHasOne(AsyncRelation):
         primary.data[id_column] = secondary.data[foreign_id_column]. An
         owner model.
     """
+    __slots__ = ('foreign_id_column', 'secondary_wrapped')
     foreign_id_column: str
 
     def __init__(self, foreign_id_column: str, *args, **kwargs) -> None:
@@ -309,18 +436,45 @@ class AsyncHasOne(AsyncRelation):
 
         if self.primary and self.primary_class.id_column in self.primary.data:
             primary_id = self.primary.data[self.primary.id_column]
-            self._secondary = await self.secondary_class.query({
-                self.foreign_id_column: primary_id
-            }).first()
+            self._secondary = await _reload_batcher.load(
+                self.secondary_class, self.foreign_id_column, primary_id
+            )
             return self
 
         if self.secondary and self.foreign_id_column in self.secondary.data:
             secondary_id = self.secondary.data[self.foreign_id_column]
-            self._primary = await self.primary_class.find(secondary_id)
+            self._primary = await _reload_batcher.load(
+                self.primary_class, self.primary_class.id_column, secondary_id
+            )
             return self
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncHasOne]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        id_column = first.primary_class.id_column
+        relations = await _reset_loadable(relations, id_column)
+        if not relations:
+            return
+
+        primary_ids = list({r.primary.data[id_column] for r in relations})
+        secondary = {}
+        for item in await first.secondary_class.query().is_in(
+            first.foreign_id_column, _pad_ids(primary_ids)
+        ).get():
+            secondary.setdefault(item.data[first.foreign_id_column], item)
+
+        for relation in relations:
+            relation._secondary = secondary.get(relation.primary.data[id_column], None)
+            relation._prefetched = True
+
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.primary_class.id_column in self.primary.data:
@@ -361,14 +515,23 @@ class AsyncHasOne(AsyncRelation):
             def __bool__(self) -> bool:
                 return len(self.data.keys()) > 0
 
-        HasOneWrapped.__name__ = f'(AsyncHasOne){self.secondary_class.__name__}'
+        HasOneWrapped.__name__ = f'(AsyncHasOne){self._secondary_name}'
 
         def setup_relation(self: AsyncModelProtocol):
-            """Sets up the AsyncHasOne relation during instance initialization."""
+            """Sets up the AsyncHasOne relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: AsyncModelProtocol) -> AsyncRelation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -380,37 +543,32 @@ class AsyncHasOne(AsyncRelation):
             """The secondary model instance. Setting raises TypeError if
                 the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
+            rel = get_relation(self)
 
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None and not rel._prefetched:
                 try:
-                    run(self.relations[cache_key].reload())
+                    run(rel.reload())
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 empty = HasOneWrapped()
                 empty.relations = {}
-                empty.relations[cache_key] = self.relations[cache_key]
+                empty.relations[cache_key] = rel
                 return empty
 
-            if not hasattr(self.relations[cache_key], 'secondary_wrapped') or \
-                self.relations[cache_key].secondary_wrapped is None:
-                self.relations[cache_key].secondary_wrapped = HasOneWrapped(
-                    self.relations[cache_key].secondary
+            if not hasattr(rel, 'secondary_wrapped') or \
+                rel.secondary_wrapped is None:
+                rel.secondary_wrapped = HasOneWrapped(
+                    rel.secondary
                 )
 
-            model = self.relations[cache_key].secondary_wrapped
-            if hasattr(self.relations[cache_key].secondary, 'relations'):
+            model = rel.secondary_wrapped
+            if hasattr(rel.secondary, 'relations'):
                 if not hasattr(model, 'relations'):
                     model.relations = {}
                 if cache_key not in model.relations:
-                    model.relations[cache_key] = self.relations[cache_key]
+                    model.relations[cache_key] = rel
 
             return model
 
@@ -424,13 +582,15 @@ class AsyncHasOne(AsyncRelation):
             if not hasattr(model, 'relations'):
                 model.relations = {}
 
-            self.relations[cache_key].secondary = model
-            self.relations[cache_key].secondary_wrapped = HasOneWrapped(
+            rel = get_relation(self)
+            rel.secondary = model
+            rel.secondary_wrapped = HasOneWrapped(
                 model
             )
 
-            model.relations[cache_key] = self.relations[cache_key]
+            model.relations[cache_key] = rel
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -439,6 +599,7 @@ class AsyncHasMany(AsyncHasOne):
         models: model.data[foreign_id_column] = primary.data[id_column]
         instance of this class is set on the owner model.
     """
+    __slots__ = ()
     @property
     def secondary(self) -> Optional[tuple[AsyncModelProtocol]]:
         """The secondary model instance. Setting raises TypeError if the
@@ -456,40 +617,52 @@ class AsyncHasMany(AsyncHasOne):
 
         if secondary is None:
             if secondary_is_set:
-                secondary_to_add_ids = (
-                    model.data[model.id_column]
+                secondary_to_add_ids = {
+                    model.data.get(model.id_column)
                     for model in self.secondary_to_add
-                )
-                secondary_to_remove_ids = (
-                    model.data[model.id_column]
+                }
+                secondary_to_remove_ids = {
+                    model.data.get(model.id_column)
                     for model in self.secondary_to_remove
-                )
+                }
+                pending_ids = set()
                 for item in self._secondary:
                     item_id = item.data[item.id_column]
                     if item_id in secondary_to_add_ids:
-                        self.secondary_to_add.remove(item)
+                        pending_ids.add(item_id)
                     elif item_id not in secondary_to_remove_ids:
                         self.secondary_to_remove.append(item)
+                if pending_ids:
+                    self.secondary_to_add = [
+                        model for model in self.secondary_to_add
+                        if model.data.get(model.id_column) not in pending_ids
+                    ]
             self._secondary = None
             return
 
-        self.multi_model_precondition(secondary)
-        secondary_list = []
-        for model in secondary:
-            self.secondary_model_precondition(model)
-            # deduplication without using sets to maintain order
-            if model not in secondary_list:
-                secondary_list.append(model)
-        secondary = tuple(secondary_list)
+        if type(secondary) in (list, tuple) and len(secondary) == 1 \
+            and isinstance(secondary[0], self.secondary_class):
+            # a single model needs no protocol check or deduplication
+            secondary = (secondary[0],)
+        else:
+            self.multi_model_precondition(secondary)
+            for model in secondary:
+                self.secondary_model_precondition(model)
+            # deduplicate while maintaining order
+            secondary = tuple(dict.fromkeys(secondary))
 
         if secondary_is_set:
+            current = set(self._secondary)
+            to_remove = set(self.secondary_to_remove)
             self.secondary_to_add = [
                 item for item in secondary
-                if item not in self.secondary_to_remove and item not in self._secondary
+                if item not in to_remove and item not in current
             ]
+            to_add = set(self.secondary_to_add)
+            new = set(secondary)
             self.secondary_to_remove += [
                 item for item in self._secondary
-                if item not in self.secondary_to_add and item not in secondary
+                if item not in to_add and item not in new
             ]
         else:
             self.secondary_to_add = secondary
@@ -504,8 +677,16 @@ class AsyncHasMany(AsyncHasOne):
         tressa(self.primary is not None, 'cannot save incomplete AsyncHasMany')
         tressa(self.secondary is not None, 'cannot save incomplete AsyncHasMany')
 
-        qb = self.secondary_class.query()
         owner_id = self.primary.data[self.primary_class.id_column]
+        if not self.has_pending_changes() and all(
+            model.data_original.get(self.secondary_class.id_column) is not None and
+            model.data_original.get(self.foreign_id_column) == owner_id
+            for model in self.secondary
+        ):
+            # the loaded secondaries are already owned in the database
+            return
+
+        qb = self.secondary_class.query()
         for model in self.secondary:
             if self.secondary_class.id_column not in model.data:
                 await model.save()
@@ -516,24 +697,35 @@ class AsyncHasMany(AsyncHasOne):
         for model in self.secondary:
             model.data[self.foreign_id_column] = owner_id
 
-        if self.secondary_to_remove:
-            secondary_ids = [
-                item.data[self.secondary_class.id_column]
-                for item in self.secondary_to_remove
-                if item.data[self.foreign_id_column] == owner_id
-            ]
-            if secondary_ids:
-                await qb.is_in(self.secondary_class.id_column, secondary_ids).update({
-                    self.foreign_id_column: None
-                })
-                qb = qb.reset()
-                for item in self.secondary_to_remove:
-                    if item.data[self.secondary_class.id_column] in secondary_ids:
-                        item.data[self.foreign_id_column] = None
-
-        await qb.is_in(self.secondary_class.id_column, owned_ids).update({
-            self.foreign_id_column: owner_id
-        })
+        # run the updates in one transaction
+        async with _transaction(qb):
+            if self.secondary_to_remove:
+                secondary_ids = [
+                    item.data[self.secondary_class.id_column]
+                    for item in self.secondary_to_remove
+                    if item.data[self.foreign_id_column] == owner_id
+                ]
+                if secondary_ids:
+                    await qb.is_in(self.secondary_class.id_column, secondary_ids).update({
+                        self.foreign_id_column: None
+                    })
+                    qb = qb.reset()
+                    for item in self.secondary_to_remove:
+                        if item.data[self.secondary_class.id_column] in secondary_ids:
+                            item.data[self.foreign_id_column] = None
+                            item.data_original = MappingProxyType({
+                                **item.data_original, self.foreign_id_column: None
+                            })
+
+            await qb.is_in(self.secondary_class.id_column, owned_ids).update({
+                self.foreign_id_column: owner_id
+            })
+
+        # the owner id is now stored for each secondary
+        for model in self.secondary:
+            model.data_original = MappingProxyType({
+                **model.data_original, self.foreign_id_column: owner_id
+            })
 
         self.primary_to_add = None
         self.primary_to_remove = None
@@ -561,6 +753,30 @@ class AsyncHasMany(AsyncHasOne):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncHasMany]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        id_column = first.primary_class.id_column
+        relations = await _reset_loadable(relations, id_column)
+        if not relations:
+            return
+
+        primary_ids = list({r.primary.data[id_column] for r in relations})
+        secondary = {}
+        for item in await first.secondary_class.query().is_in(
+            first.foreign_id_column, _pad_ids(primary_ids)
+        ).get():
+            secondary.setdefault(item.data[first.foreign_id_column], []).append(item)
+
+        for relation in relations:
+            relation._secondary = secondary.get(relation.primary.data[id_column], [])
+
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.primary_class.id_column in self.primary.data:
@@ -588,27 +804,40 @@ class AsyncHasMany(AsyncHasOne):
         cache_key = self.get_cache_key()
 
 
-        class HasManyTuple(tuple):
+        class HasManyTuple(_RelatedTuple):
             def __call__(self) -> AsyncHasMany:
                 return self.relation
 
-        HasManyTuple.__name__ = f'(AsyncHasMany){self.secondary_class.__name__}'
+        HasManyTuple.__name__ = f'(AsyncHasMany){self._secondary_name}'
 
         def setup_relation(self: AsyncModelProtocol):
-            """Sets up the AsyncHasMany relation during instance initialization."""
+            """Sets up the AsyncHasMany relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self.__class__, 'id_relations'):
                 self.__class__.id_relations = {}
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
 
-            if self.id_column in self.data and self.data[self.id_column] is not None:
+        def get_relation(self: AsyncModelProtocol) -> AsyncRelation:
+            """Returns the relation for the instance, creating it on
+                first use. Instances with the same id share a relation.
+            """
+            if self.relations.get(cache_key, None) is not None:
+                return self.relations[cache_key]
+
+            id_cache_key = None
+            if self.data.get(self.id_column, None) is not None:
                 id_cache_key = cache_key + ':' + self.data[self.id_column]
                 if id_cache_key in self.__class__.id_relations:
                     self.relations[cache_key] = self.__class__.id_relations[id_cache_key]
-                else:
-                    self.__class__.id_relations[id_cache_key] = self.relations[cache_key]
+                    return self.relations[cache_key]
+
+            self.relations[cache_key] = deepcopy(relation)
+            self.relations[cache_key].primary = self
+            if id_cache_key is not None:
+                self.__class__.id_relations[id_cache_key] = self.relations[cache_key]
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -620,27 +849,22 @@ class AsyncHasMany(AsyncHasOne):
             """The secondary model instances. Setting raises TypeError
                 if the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
+            rel = get_relation(self)
 
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    run(self.relations[cache_key].reload())
+                    run(rel.reload())
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = HasManyTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = HasManyTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = HasManyTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: AsyncModelProtocol, models: Optional[list[AsyncModelProtocol]]) -> None:
@@ -651,8 +875,10 @@ class AsyncHasMany(AsyncHasOne):
                  'models must be list[AsyncModelProtocol] or tuple[AsyncModelProtocol]')
             tert(all([isinstance(m, AsyncModelProtocol) for m in models]),
                  'models must be list[AsyncModelProtocol] or tuple[AsyncModelProtocol]')
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -662,6 +888,7 @@ class AsyncBelongsTo(AsyncHasOne):
         Inverse of AsyncHasOne and AsyncHasMany. An instance of this class is set
         on the owned model.
     """
+    __slots__ = ()
     async def save(self) -> None:
         """Persists the relation to the database. Raises UsageError if
             the relation is incomplete.
@@ -697,18 +924,52 @@ class AsyncBelongsTo(AsyncHasOne):
 
         if self.primary and self.foreign_id_column in self.primary.data:
             secondary_id = self.primary.data[self.foreign_id_column]
-            self._secondary = await self.secondary_class.find(secondary_id)
+            self._secondary = await _reload_batcher.load(
+                self.secondary_class, self.secondary_class.id_column, secondary_id
+            )
             return self
 
         if self.secondary and self.secondary_class.id_column in self.secondary.data:
             secondary_id = self.secondary.data[self.secondary.id_column]
-            self._primary = await self.primary_class.query({
-                self.foreign_id_column: secondary_id
-            }).first()
+            self._primary = await _reload_batcher.load(
+                self.primary_class, self.foreign_id_column, secondary_id
+            )
             return self
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncBelongsTo]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        relations = await _reset_loadable(relations, first.foreign_id_column)
+        if not relations:
+            return
+
+        secondary_ids = list({
+            r.primary.data[first.foreign_id_column] for r in relations
+            if r.primary.data[first.foreign_id_column] is not None
+        })
+        secondary = {}
+        if secondary_ids:
+            secondary = {
+                item.data[first.secondary_class.id_column]: item
+                for item in await first.secondary_class.query().is_in(
+                    first.secondary_class.id_column, _pad_ids(secondary_ids)
+                ).get()
+            }
+
+        for relation in relations:
+            relation._secondary = secondary.get(
+                relation.primary.data[first.foreign_id_column], None
+            )
+            relation._prefetched = True
+
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.foreign_id_column in self.primary.data:
@@ -741,18 +1002,27 @@ class AsyncBelongsTo(AsyncHasOne):
                 self.data = original.data if original else {}
                 self.data_original = MappingProxyType({**self.data})
             def __call__(self) -> AsyncRelation:
-                return self.relations[f'{cache_key}']
+                return self.relations[cache_key]
             def __bool__(self) -> bool:
                 return len(self.data.keys()) > 0
 
-        BelongsToWrapped.__name__ = f'(AsyncBelongsTo){self.secondary_class.__name__}'
+        BelongsToWrapped.__name__ = f'(AsyncBelongsTo){self._secondary_name}'
 
         def setup_relation(self: AsyncModelProtocol):
-            """Sets up the AsyncHasMany relation during instance initialization."""
+            """Sets up the AsyncHasMany relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: AsyncModelProtocol) -> AsyncRelation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -764,37 +1034,32 @@ class AsyncBelongsTo(AsyncHasOne):
             """The secondary model instance. Setting raises TypeError if
                 the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
-
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
+            rel = get_relation(self)
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None and not rel._prefetched:
                 try:
-                    run(self.relations[cache_key].reload())
+                    run(rel.reload())
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 empty = BelongsToWrapped()
                 empty.relations = {}
-                empty.relations[f'{cache_key}'] = self.relations[cache_key]
+                empty.relations[cache_key] = rel
                 return empty
 
-            if not hasattr(self.relations[cache_key], 'secondary_wrapped') or \
-                self.relations[cache_key].secondary_wrapped is None:
-                self.relations[cache_key].secondary_wrapped = BelongsToWrapped(
-                    self.relations[cache_key].secondary
+            if not hasattr(rel, 'secondary_wrapped') or \
+                rel.secondary_wrapped is None:
+                rel.secondary_wrapped = BelongsToWrapped(
+                    rel.secondary
                 )
 
-            model = self.relations[cache_key].secondary_wrapped
-            if hasattr(self.relations[cache_key].secondary, 'relations'):
+            model = rel.secondary_wrapped
+            if hasattr(rel.secondary, 'relations'):
                 if not hasattr(model, 'relations'):
                     model.relations = {}
                 if cache_key not in model.relations:
-                    model.relations[cache_key] = self.relations[cache_key]
+                    model.relations[cache_key] = rel
             return model
 
         @secondary.setter
@@ -804,11 +1069,13 @@ class AsyncBelongsTo(AsyncHasOne):
             if not hasattr(model, 'relations'):
                 model.relations = {}
 
-            self.relations[cache_key].secondary = model
-            self.relations[cache_key].secondary_wrapped = BelongsToWrapped(
+            rel = get_relation(self)
+            rel.secondary = model
+            rel.secondary_wrapped = BelongsToWrapped(
                 model
             )
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -817,6 +1084,10 @@ class AsyncBelongsToMany(AsyncRelation):
         and each secondary can have many primary; e.g. users and roles,
         or roles and permissions. This requires the use of a pivot.
     """
+    __slots__ = (
+        '_pivot', 'primary_id_column', 'secondary_id_column',
+        'secondary_wrapped',
+    )
     pivot: Type[AsyncModelProtocol]
     primary_id_column: str
     secondary_id_column: str
@@ -855,45 +1126,54 @@ class AsyncBelongsToMany(AsyncRelation):
             self._secondary = None
             return
 
-        self.multi_model_precondition(secondary)
-        secondary_list = []
-        for model in secondary:
-            tert(isinstance(model, self.secondary_class),
-                 f'secondary must be instance of {self.secondary_class.__name__}')
-            # deduplication without using sets to maintain order
-            if model not in secondary_list:
-                secondary_list.append(model)
-        secondary = tuple(secondary_list)
+        if type(secondary) in (list, tuple) and len(secondary) == 1 \
+            and isinstance(secondary[0], self.secondary_class):
+            # a single model needs no protocol check or deduplication
+            secondary = (secondary[0],)
+        else:
+            self.multi_model_precondition(secondary)
+            for model in secondary:
+                tert(isinstance(model, self.secondary_class),
+                     f'secondary must be instance of {self._secondary_name}')
+            # deduplicate while maintaining order
+            secondary = tuple(dict.fromkeys(secondary))
 
         if not self._secondary:
             self._secondary = secondary
             self.secondary_to_add = secondary
             return
 
-        for item in self._secondary:
-            if item not in secondary and item not in self.secondary_to_add:
-                self.secondary_to_remove.append(item)
-            if item in self.secondary_to_add:
-                self.secondary_to_add.remove(item)
+        new = set(secondary)
+        to_add = set(self.secondary_to_add)
+        self.secondary_to_remove.extend(
+            item for item in self._secondary
+            if item not in new and item not in to_add
+        )
+        self.secondary_to_add = [
+            item for item in self.secondary_to_add
+            if item in new
+        ]
 
+        secondary_ids = {
+            model.data[model.id_column]
+            for model in self._secondary
+        }
+        secondary_to_remove_ids = {
+            model.data[model.id_column]
+            for model in self.secondary_to_remove
+        }
+        new_ids = set()
         for item in secondary:
             item_id = item.data[item.id_column]
-            secondary_ids = (
-                model.data[model.id_column]
-                for model in self._secondary
-            )
-            secondary_to_remove_ids = (
-                model.data[model.id_column]
-                for model in self.secondary_to_remove
-            )
-
+            new_ids.add(item_id)
             if item_id not in secondary_ids and item_id not in secondary_to_remove_ids:
                 self.secondary_to_add.append(item)
-            if item_id in secondary_to_remove_ids:
-                self.secondary_to_remove = [
-                    model for model in self.secondary_to_remove
-                    if model.data[model.id_column] != item_id
-                ]
+
+        if secondary_to_remove_ids & new_ids:
+            self.secondary_to_remove = [
+                model for model in self.secondary_to_remove
+                if model.data[model.id_column] not in new_ids
+            ]
 
         self._secondary = tuple(secondary)
 
@@ -934,45 +1214,58 @@ class AsyncBelongsToMany(AsyncRelation):
             (self.primary or self.primary_to_add) is not None
         must_add_primary = self.primary_to_add is not None
 
-        if must_remove_secondary:
-            await query_builder.is_in(
-                self.secondary_id_column,
-                secondary_ids_to_remove
-            ).is_in(
-                self.primary_id_column,
-                primary_ids_for_delete
-            ).delete()
-
-        if must_remove_primary:
-            primary_to_remove_id = self.primary_to_remove.data[self.primary_class.id_column]
-            await query_builder.reset().equal(
-                self.primary_id_column,
-                primary_to_remove_id
-            ).is_in(
-                self.secondary_id_column,
-                secondary_ids_to_remove + [
-                    secondary.data[secondary.id_column] for secondary in self.secondary
-                ]
-            ).delete()
+        # run the pivot queries in one transaction
+        async with _transaction(query_builder):
+            if must_remove_secondary:
+                await query_builder.is_in(
+                    self.secondary_id_column,
+                    secondary_ids_to_remove
+                ).is_in(
+                    self.primary_id_column,
+                    primary_ids_for_delete
+                ).delete()
+
+            if must_remove_primary:
+                primary_to_remove_id = self.primary_to_remove.data[self.primary_class.id_column]
+                await query_builder.reset().equal(
+                    self.primary_id_column,
+                    primary_to_remove_id
+                ).is_in(
+                    self.secondary_id_column,
+                    secondary_ids_to_remove + [
+                        secondary.data[secondary.id_column] for secondary in self.secondary
+                    ]
+                ).delete()
 
-        if must_add_primary or must_add_secondary:
-            primary_id = self._primary.data[self.primary_class.id_column]
-            already_exists = await query_builder.reset().equal(
-                self.primary_id_column,
-                primary_id
-            ).get()
-            already_added_ids = [
-                item.data[self.secondary_class.id_column]
-                for item in already_exists
-            ]
-            await self.pivot.insert_many([
-                {
-                    self.primary_id_column: primary_id,
-                    self.secondary_id_column: item.data[item.id_column]
-                }
-                for item in self.secondary
-                if item.data[self.secondary_class.id_column] not in already_added_ids
-            ])
+            if must_add_primary or must_add_secondary:
+                primary_id = self._primary.data[self.primary_class.id_column]
+                secondary_ids = [
+                    item.data[self.secondary_class.id_column]
+                    for item in self.secondary
+                ]
+                already_added_ids = set()
+                if secondary_ids:
+                    already_exists = await query_builder.reset().equal(
+                        self.primary_id_column,
+                        primary_id
+                    ).is_in(
+                        self.secondary_id_column,
+                        secondary_ids
+                    ).get()
+                    already_added_ids = {
+                        item.data[self.secondary_id_column]
+                        for item in already_exists
+                    }
+                items = [
+                    {
+                        self.primary_id_column: primary_id,
+                        self.secondary_id_column: secondary_id
+                    }
+                    for secondary_id in secondary_ids
+                    if secondary_id not in already_added_ids
+                ]
+                if items:
+                    await self.pivot.insert_many(items)
 
         self.primary_to_add = None
         self.primary_to_remove = None
@@ -988,13 +1281,25 @@ class AsyncBelongsToMany(AsyncRelation):
 
         if self.primary and self.primary_class.id_column in self.primary.data:
             primary_id = self.primary.data[self.primary.id_column]
-            pivots = await self.pivot.query({
-                self.primary_id_column: primary_id
-            }).get()
-            self._secondary = await self.secondary_class.query().is_in(
-                self.secondary_class.id_column,
-                [pivot.data[self.secondary_id_column] for pivot in pivots]
-            ).get()
+            secondary_table = self.secondary_class.table
+            joined = await self.secondary_class.query().join(
+                self.pivot,
+                [self.secondary_class.id_column, self.secondary_id_column]
+            ).equal(
+                f'{self.pivot.table}.{self.primary_id_column}',
+                primary_id
+            ).select([
+                f'{secondary_table}.{column}'
+                for column in self.secondary_class.columns
+            ]).get()
+            # deduplicate by id in case of repeated pivots
+            secondary = {}
+            for item in joined:
+                data = item.data[secondary_table]
+                if data[self.secondary_class.id_column] not in secondary:
+                    secondary[data[self.secondary_class.id_column]] = \
+                        self.secondary_class(data)
+            self._secondary = list(secondary.values())
             return self
 
         if self.secondary and len(self.secondary):
@@ -1007,15 +1312,12 @@ class AsyncBelongsToMany(AsyncRelation):
                 [secondary.data[secondary.id_column] for secondary in self.secondary]
             ).order_by(self.primary_id_column).get()
 
-            primary_ids = [pivot.data[self.primary_id_column] for pivot in pivots]
-            unique_ids = tuple(set(primary_ids))
+            pivot_counts = Counter(
+                pivot.data[self.primary_id_column] for pivot in pivots
+            )
 
-            for primary_id in unique_ids:
-                subset = [
-                    pivot for pivot in pivots
-                    if pivot.data[self.primary_id_column] == primary_id
-                ]
-                if len(subset) == len(self.secondary):
+            for primary_id, count in pivot_counts.items():
+                if count == len(self.secondary):
                     self._primary = await self.primary_class.find(primary_id)
                     return self
 
@@ -1023,6 +1325,48 @@ class AsyncBelongsToMany(AsyncRelation):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncBelongsToMany]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single join query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        id_column = first.primary_class.id_column
+        relations = await _reset_loadable(relations, id_column)
+        if not relations:
+            return
+
+        primary_ids = list({r.primary.data[id_column] for r in relations})
+        secondary_table = first.secondary_class.table
+        secondary_id_column = first.secondary_class.id_column
+        pivot_column = f'{first.pivot.table}.{first.primary_id_column}'
+        joined = await first.secondary_class.query().join(
+            first.pivot,
+            [secondary_id_column, first.secondary_id_column]
+        ).is_in(
+            pivot_column,
+            _pad_ids(primary_ids)
+        ).select([
+            f'{secondary_table}.{column}'
+            for column in first.secondary_class.columns
+        ] + [pivot_column]).get()
+        # group by primary id and deduplicate by secondary id
+        secondary = {}
+        for item in joined:
+            primary_id = item.data[first.pivot.table][first.primary_id_column]
+            data = item.data[secondary_table]
+            models = secondary.setdefault(primary_id, {})
+            if data[secondary_id_column] not in models:
+                models[data[secondary_id_column]] = first.secondary_class(data)
+
+        for relation in relations:
+            relation._secondary = list(
+                secondary.get(relation.primary.data[id_column], {}).values()
+            )
+
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation. This will
             return the query for a join between the pivot and the
@@ -1056,18 +1400,27 @@ class AsyncBelongsToMany(AsyncRelation):
         cache_key = self.get_cache_key()
 
 
-        class BelongsToManyTuple(tuple):
+        class BelongsToManyTuple(_RelatedTuple):
             def __call__(self) -> AsyncBelongsToMany:
                 return self.relation
 
-        BelongsToManyTuple.__name__ = f'AsyncBelongsToMany{self.secondary_class.__name__}'
+        BelongsToManyTuple.__name__ = f'AsyncBelongsToMany{self._secondary_name}'
 
         def setup_relation(self: AsyncModelProtocol):
-            """Sets up the AsyncHasMany relation during instance initialization."""
+            """Sets up the AsyncHasMany relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: AsyncModelProtocol) -> AsyncRelation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -1079,35 +1432,32 @@ class AsyncBelongsToMany(AsyncRelation):
             """The secondary model instances. Setting raises TypeError
                 if a precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
-
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
+            rel = get_relation(self)
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    run(self.relations[cache_key].reload())
+                    run(rel.reload())
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = BelongsToManyTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = BelongsToManyTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = BelongsToManyTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: AsyncModelProtocol, models: Optional[list[AsyncModelProtocol]]) -> None:
             """Sets the secondary model instances. Raises TypeError if
                 the precondition check fails.
             """
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -1119,6 +1469,7 @@ class AsyncContains(AsyncHasMany):
         HashedModel or something similar. IDs are sorted for
         deterministic hashing via HashedModel.
     """
+    __slots__ = ()
     secondary: tuple[AsyncModelProtocol]
     _secondary: tuple[AsyncModelProtocol]
 
@@ -1164,7 +1515,7 @@ class AsyncContains(AsyncHasMany):
         if self.primary and self.foreign_id_column in self.primary.data:
             secondary_ids = self.primary.data[self.foreign_id_column].split(',')
             self._secondary = await self.secondary_class.query().is_in(
-                self.secondary_class.id_column, secondary_ids).get()
+                self.secondary_class.id_column, _pad_ids(secondary_ids)).get()
             return self
 
         if self.secondary and all([
@@ -1181,6 +1532,40 @@ class AsyncContains(AsyncHasMany):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncContains]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        relations = await _reset_loadable(relations, first.foreign_id_column)
+        if not relations:
+            return
+
+        secondary_ids = {
+            relation: [
+                i for i in
+                (relation.primary.data[first.foreign_id_column] or '').split(',')
+                if i
+            ]
+            for relation in relations
+        }
+        all_ids = list({i for ids in secondary_ids.values() for i in ids})
+        secondary = {}
+        if all_ids:
+            secondary = {
+                item.data[first.secondary_class.id_column]: item
+                for item in await first.secondary_class.query().is_in(
+                    first.secondary_class.id_column, _pad_ids(all_ids)
+                ).get()
+            }
+
+        for relation, ids in secondary_ids.items():
+            relation._secondary = [secondary[i] for i in ids if i in secondary]
+
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.foreign_id_column in self.primary.data:
@@ -1212,18 +1597,27 @@ class AsyncContains(AsyncHasMany):
         cache_key = self.get_cache_key()
 
 
-        class ContainsTuple(tuple):
+        class ContainsTuple(_RelatedTuple):
             def __call__(self) -> AsyncContains:
                 return self.relation
 
-        ContainsTuple.__name__ = f'(AsyncContains){self.secondary_class.__name__}'
+        ContainsTuple.__name__ = f'(AsyncContains){self._secondary_name}'
 
         def setup_relation(self: AsyncModelProtocol):
-            """Sets up the AsyncContains relation during instance initialization."""
+            """Sets up the AsyncContains relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: AsyncModelProtocol) -> AsyncRelation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -1235,33 +1629,30 @@ class AsyncContains(AsyncHasMany):
             """The secondary model instances. Setting raises TypeError
                 if the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
-
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
+            rel = get_relation(self)
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    run(self.relations[cache_key].reload())
+                    run(rel.reload())
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = ContainsTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = ContainsTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = ContainsTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: AsyncModelProtocol, models: Optional[list[AsyncModelProtocol]]) -> None:
             """Sets the secondary model instances."""
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -1273,6 +1664,7 @@ class AsyncWithin(AsyncHasMany):
         similar. IDs are sorted for deterministic hashing via
         HashedModel.
     """
+    __slots__ = ()
     secondary: tuple[AsyncModelProtocol]
 
     async def save(self) -> None:
@@ -1285,22 +1677,25 @@ class AsyncWithin(AsyncHasMany):
         if self.primary.data[self.primary_class.id_column] is None:
             await self.primary.save()
 
+        primary_id = self.primary.data[self.primary_class.id_column]
+        remove_id = None
+        if self.primary_to_remove is not None:
+            remove_id = self.primary_to_remove.data.get(self.primary_class.id_column, None)
+
+        # models added since the last reload or save may not exist yet
+        added = {id(s) for s in self.secondary_to_add}
+
         for s in self.secondary:
-            ids = s.data.get(self.foreign_id_column, '')
-            ids: list = ids.split(',')
-            if self.primary.data[self.primary_class.id_column] not in ids:
-                ids.append(self.primary.data[self.primary_class.id_column])
-
-            if self.primary_to_remove is not None and \
-            self.primary_class.id_column in self.primary_to_remove.data:
-                if self.primary_to_remove.data[self.primary_class.id_column] in ids:
-                    ids.remove(self.primary_to_remove.data.get(
-                        self.primary_class.id_column, None
-                    ))
-
-            ids.sort()
-            s.data[self.foreign_id_column] = ",".join(ids)
-            await s.save()
+            ids = set(s.data.get(self.foreign_id_column, '').split(','))
+            ids.add(primary_id)
+            if remove_id is not None:
+                ids.discard(remove_id)
+
+            s.data[self.foreign_id_column] = ",".join(sorted(ids))
+            # skip secondaries that are persisted and unchanged
+            if id(s) in added or s.data.get(s.id_column, None) is None or \
+                s.data != s.data_original:
+                await s.save()
 
         self.primary_to_add = None
         self.primary_to_remove = None
@@ -1321,6 +1716,20 @@ class AsyncWithin(AsyncHasMany):
         ).get())
         return self
 
+    @classmethod
+    async def reload_many(cls, relations: list[AsyncWithin]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database. Each relation is reloaded individually,
+            since the foreign_id_column holds a list of ids that cannot
+            be matched with a single is_in query. Empty relations are
+            skipped.
+        """
+        for relation in relations:
+            try:
+                await relation.reload()
+            except ValueError:
+                pass
+
     def query(self) -> AsyncQueryBuilderProtocol|None:
         """Creates the base query for the underlying relation (i.e. to
             query the secondary class).
@@ -1343,18 +1752,27 @@ class AsyncWithin(AsyncHasMany):
         cache_key = self.get_cache_key()
 
 
-        class WithinTuple(tuple):
+        class WithinTuple(_RelatedTuple):
             def __call__(self) -> AsyncWithin:
                 return self.relation
 
-        WithinTuple.__name__ = f'(AsyncWithin){self.secondary_class.__name__}'
+        WithinTuple.__name__ = f'(AsyncWithin){self._secondary_name}'
 
         def setup_relation(self: AsyncModelProtocol):
-            """Sets up the AsyncWithin relation during instance initialization."""
+            """Sets up the AsyncWithin relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: AsyncModelProtocol) -> AsyncRelation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -1366,41 +1784,105 @@ class AsyncWithin(AsyncHasMany):
             """The secondary model instances. Setting raises TypeError
                 if a precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
-
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
+            rel = get_relation(self)
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    run(self.relations[cache_key].reload())
+                    run(rel.reload())
                 except ValueError:
                     pass
                 except KeyError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = WithinTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = WithinTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = WithinTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: AsyncModelProtocol, models: Optional[list[AsyncModelProtocol]]) -> None:
             """Sets the secondary model instances. Raises TypeError if
                 the precondition check fails.
             """
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
+class _RelatedTuple(tuple):
+    """Tuple of related models with a faster membership check."""
+    def __contains__(self, item: Any) -> bool:
+        """Checks identity with a cached set first, then compares only
+            the models with the same id as item, since comparing models
+            packs both of them.
+        """
+        identities = self.__dict__.get('_identities', None)
+        if identities is None:
+            identities = self._identities = {id(model) for model in self}
+        if id(item) in identities:
+            return True
+        if not isinstance(getattr(item, 'data', None), dict) or \
+            not hasattr(item, 'id_column'):
+            return tuple.__contains__(self, item)
+        item_id = item.data.get(item.id_column, None)
+        return any(
+            model.data.get(model.id_column, None) == item_id and model == item
+            for model in self
+        )
+
+
+def _pad_ids(ids: list) -> list:
+    """Pads a non-empty list of ids for an is_in clause to the next
+        power of two by repeating the last id, so that batches of
+        different sizes share a few distinct SQL statements.
+    """
+    size = 1 << (len(ids) - 1).bit_length()
+    return ids + [ids[-1]] * (size - len(ids))
+
+
+async def _reset_loadable(relations: list[AsyncRelation], column: str) -> list[AsyncRelation]:
+    """Reloads the relations whose primary lacks the column one at a
+        time, skipping empty ones, and returns the others after
+        resetting their change tracking properties.
+    """
+    loadable = []
+    for relation in relations:
+        if relation.primary and column in relation.primary.data:
+            relation.primary_to_add = None
+            relation.primary_to_remove = None
+            relation.secondary_to_add = []
+            relation.secondary_to_remove = []
+            loadable.append(relation)
+            continue
+        try:
+            await relation.reload()
+        except ValueError:
+            # empty relations are left unloaded, as on first access
+            pass
+    return loadable
+
+def _transaction(query_builder: AsyncQueryBuilderProtocol):
+    """Returns an async_transaction for the query builder if it uses
+        AsyncSqliteContext; otherwise, returns a null context.
+    """
+    context_manager = getattr(query_builder, 'context_manager', None)
+    if isinstance(context_manager, type) and \
+        issubclass(context_manager, AsyncSqliteContext):
+        return async_transaction(query_builder.connection_info)
+    return nullcontext()
+
+
 def _get_id_column(cls: Type[AsyncModelProtocol]) -> str:
+    """Returns the default foreign id column for cls, derived from its
+        current __name__. Relations store the column when they are
+        created, so renaming the class afterwards does not affect them.
+    """
     return _pascalcase_to_snake_case(cls.__name__) + f'_{cls.id_column}'
 
 def async_has_one(cls: Type[AsyncModelProtocol], owned_model: Type[AsyncModelProtocol],
@@ -1509,3 +1991,42 @@ def async_within(cls: Type[AsyncModelProtocol], other_model: Type[AsyncModelProt
     prop.__doc__ = f'The related {other_model.__name__}s. Setting raises ' +\
         'TypeError if the precondition check fails.'
     return prop
+
+def _relation_getter(cls: Type[AsyncModelProtocol], name: str) -> Callable:
+    """Returns the function that returns the relation of an instance of
+        cls for the related property called name. Raises TypeError if
+        name is not a related property of cls.
+    """
+    prop = getattr(cls, name, None)
+    getter = None
+    if isinstance(prop, property) and prop.fget is not None:
+        getter = _relation_getters.get(prop.fget, None)
+    tert(getter is not None, f'{name} must be a related property')
+    return getter
+
+def async_relation_of(model: AsyncModelProtocol, name: str) -> AsyncRelation:
+    """Returns the relation behind the related property called name on
+        the model, creating it on first use. Raises TypeError if name is
+        not a related property of the model.
+    """
+    return _relation_getter(type(model), name)(model)
+
+async def async_prefetch(models: list[AsyncModelProtocol], name: str) -> list[AsyncModelProtocol]:
+    """Loads the related property called name for all the models at
+        once, using a single query for each supported relation type
+        instead of one query per model on first access. Returns the
+        models. Raises TypeError if name is not a related property of
+        the models.
+    """
+    tert(type(models) in (list, tuple), 'models must be list[AsyncModelProtocol]')
+    if not models:
+        return models
+    get_relation = _relation_getter(type(models[0]), name)
+    # instances with the same id can share a relation
+    relations = {}
+    for model in models:
+        relation = get_relation(model)
+        relations[id(relation)] = relation
+    relations = list(relations.values())
+    await type(relations[0]).reload_many(relations)
+    return models
@@ -6,12 +6,19 @@ from .interfaces import (
     QueryBuilderProtocol,
     ModelProtocol,
 )
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
+from functools import lru_cache
 from hashlib import sha256
+from json import dumps
+from os import stat
+from threading import Lock, local
 from time import time
 from types import MappingProxyType, TracebackType, UnionType
 from typing import Any, Generator, Optional, Type, Callable
 from uuid import uuid4
+from weakref import WeakKeyDictionary, WeakSet, WeakValueDictionary
 import packify
 import sqlite3
 
@@ -20,21 +27,187 @@ class Default(list):
     """Class for representing a default value for a column annotation."""
 
 
+# maps each where() condition type to the TypeError message for
+# non-dict condition data, or None if the data is passed through as is
+WHERE_CONDITION_TYPES: dict[str, str|None] = {
+    'is_null': None,
+    'not_null': None,
+    'equal': 'equal must be dict[str, Any]',
+    'not_equal': 'not_equal must be dict[str, Any]',
+    'less': 'less must be dict[str, Any]',
+    'greater': 'greater must be dict[str, Any]',
+    'like': 'like must be dict[str, tuple[str, str]]',
+    'not_like': 'not_like must be dict[str, tuple[str, str]]',
+    'starts_with': 'starts_with must be dict[str, str]',
+    'does_not_start_with': 'does_not_start_with must be dict[str, str]',
+    'contains': 'contains must be dict[str, str]',
+    'excludes': 'excludes must be dict[str, str]',
+    'ends_with': 'ends_with must be dict',
+    'does_not_end_with': 'does_not_end_with must be dict',
+    'is_in': 'is_in must be dict',
+    'not_in': 'not_in must be dict',
+}
+
+# prepared statement cache size for connections held open by transaction
+# or kept in the connection pool
+TRANSACTION_CACHED_STATEMENTS = 512
+
+# is_in/not_in str lists longer than this are bound as one JSON array param
+# if the SQLite library has the JSON1 functions
+JSON_IN_LIST_SIZE = 500
+
+# insert_many inserts at most this many rows per multi-row insert statement
+INSERT_MANY_BATCH_SIZE = 500
+
+# bound parameter limit of sqlite builds before 3.32; caps insert_many batches
+SQLITE_MAX_VARIABLES = 999
+
+_transactions: ContextVar[dict[str|bytes, sqlite3.Connection]] = ContextVar(
+    'sqloquent_transactions', default={}
+)
+
+# idle connections kept per database file in each thread; pooling is
+# disabled by default, set to a positive int to enable it
+CONNECTION_POOL_SIZE = 0
+
+_connection_pool = local()
+_connection_pools: WeakSet[_IdleConnections] = WeakSet()
+_connection_pool_lock = Lock()
+
+
+class _IdleConnections(dict):
+    """Maps connection_info to the idle (connection, database file)
+        pairs pooled by one thread. Compared and hashed by identity so
+        that each thread's pool can be tracked in a WeakSet.
+    """
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+
+def _database_file(connection_info: str|bytes) -> tuple[int, int]|None:
+    """Returns the (device, inode) of the database file, or None if
+        connection_info does not name an existing file.
+    """
+    if connection_info in (':memory:', b':memory:') or \
+            connection_info[:5] in ('file:', b'file:'):
+        return None
+    try:
+        info = stat(connection_info)
+    except (OSError, ValueError):
+        return None
+    return (info.st_dev, info.st_ino)
+
+
+def _acquire_connection(
+        connection_info: str|bytes
+    ) -> tuple[sqlite3.Connection, tuple[int, int]|None]:
+    """Returns an idle pooled connection for connection_info if one
+        is still open on the same database file; otherwise, returns a
+        new connection. Also returns the database file the connection
+        is open on if pooling is enabled, or None.
+    """
+    if CONNECTION_POOL_SIZE <= 0:
+        return (sqlite3.connect(connection_info), None)
+
+    idle = getattr(_connection_pool, 'idle', None)
+    database_file = _database_file(connection_info)
+    if idle and database_file is not None:
+        stale = []
+        with _connection_pool_lock:
+            pooled = idle.get(connection_info, [])
+            while pooled:
+                connection, pooled_file = pooled.pop()
+                if pooled_file == database_file:
+                    break
+                stale.append(connection)
+            else:
+                connection = None
+        for old in stale:
+            old.close()
+        if connection is not None:
+            return (connection, database_file)
+
+    # pooled connections may be closed by close_pooled_connections from
+    # another thread while idle, but are only ever used by this thread
+    connection = sqlite3.connect(
+        connection_info, cached_statements=TRANSACTION_CACHED_STATEMENTS,
+        check_same_thread=False,
+    )
+    return (connection, database_file or _database_file(connection_info))
+
+
+def _release_connection(connection_info: str|bytes,
+                        connection: sqlite3.Connection,
+                        database_file: tuple[int, int]|None) -> None:
+    """Returns the connection to the pool for the current thread, or
+        closes it if pooling is disabled, the pool is full, or the
+        database is not a file.
+    """
+    if database_file is None or CONNECTION_POOL_SIZE <= 0:
+        return connection.close()
+
+    idle = getattr(_connection_pool, 'idle', None)
+    if idle is None:
+        idle = _connection_pool.idle = _IdleConnections()
+        with _connection_pool_lock:
+            _connection_pools.add(idle)
+
+    with _connection_pool_lock:
+        pooled = idle.setdefault(connection_info, [])
+        if len(pooled) < CONNECTION_POOL_SIZE:
+            pooled.append((connection, database_file))
+            return
+    connection.close()
+
+
+def close_pooled_connections(connection_info: str|bytes|None = None,
+                             all_threads: bool = False) -> None:
+    """Closes the idle pooled connections for connection_info, or for
+        every database if it is None. Only the connections pooled by
+        the current thread are closed unless all_threads is True. Call
+        this before deleting or replacing a database file while
+        connection pooling is enabled.
+    """
+    closing = []
+    with _connection_pool_lock:
+        if all_threads:
+            pools = [*_connection_pools]
+        else:
+            pools = [getattr(_connection_pool, 'idle', {})]
+        for idle in pools:
+            keys = [*idle] if connection_info is None else [connection_info]
+            for key in keys:
+                closing.extend(connection for connection, _ in idle.pop(key, ()))
+    for connection in closing:
+        connection.close()
+
+
 class SqliteContext:
     """Context manager for sqlite."""
     connection: sqlite3.Connection
     cursor: sqlite3.Cursor
     connection_info: str
+    in_transaction: bool
+    database_file: tuple[int, int]|None
 
     def __init__(self, connection_info: str = '') -> None:
         """Initialize the instance. Raises TypeError for non-str table.
+            Reuses the connection of an enclosing `transaction` block
+            for the same connection_info.
         """
         if not connection_info and hasattr(self, 'connection_info'):
             connection_info = self.connection_info
         tert(type(connection_info) in (str, bytes),
             'connection_info must be str or bytes')
         tressa(len(connection_info) > 0, 'cannot use with empty connection_info')
-        self.connection = sqlite3.connect(connection_info)
+        self.connection_info = connection_info
+        connection = _transactions.get().get(connection_info, None)
+        self.in_transaction = connection is not None
+        self.database_file = None
+        if connection is None:
+            connection, self.database_file = _acquire_connection(connection_info)
+        self.connection = connection
         self.cursor = self.connection.cursor()
 
     def __enter__(self) -> CursorProtocol:
@@ -45,14 +218,96 @@ class SqliteContext:
                 __exc_value: Optional[BaseException],
                 __traceback: Optional[TracebackType]) -> None:
         """Exit the context block. Commit or rollback as appropriate,
-            then close the connection.
+            then return the connection to the pool, or close it after a
+            rollback. Within a `transaction` block, only the cursor is
+            closed.
         """
+        self.cursor.close()
+        if self.in_transaction:
+            return
+
         if __exc_type is not None:
             self.connection.rollback()
+            self.connection.close()
         else:
             self.connection.commit()
+            _release_connection(
+                self.connection_info, self.connection, self.database_file
+            )
+
+
+@contextmanager
+def transaction(connection_info: str) -> Generator[sqlite3.Connection, None, None]:
+    """Context manager that makes SqliteContext use a single
+        connection for connection_info within the block, so that all
+        queries run in it are committed together on exit or rolled back
+        if an exception is raised. Nested blocks join the outermost
+        transaction. Raises TypeError for invalid connection_info.
+    """
+    tert(type(connection_info) in (str, bytes),
+        'connection_info must be str or bytes')
+    active = _transactions.get()
+    if connection_info in active:
+        yield active[connection_info]
+        return
+
+    connection = sqlite3.connect(
+        connection_info, cached_statements=TRANSACTION_CACHED_STATEMENTS
+    )
+    token = _transactions.set({**active, connection_info: connection})
+    try:
+        yield connection
+    except BaseException:
+        connection.rollback()
+        raise
+    else:
+        connection.commit()
+    finally:
+        _transactions.reset(token)
+        connection.close()
+
+
+
+_identity_maps: ContextVar[WeakValueDictionary|None] = ContextVar(
+    'sqloquent_identity_map', default=None
+)
+
+
+@contextmanager
+def identity_map() -> Generator[WeakValueDictionary, None, None]:
+    """Context manager that makes SqlModel.find return the instance
+        already found or inserted for the same class and id within the
+        block instead of querying the database again. Updates, deletes,
+        and raw queries run through SqlQueryBuilder clear the map.
+        Nested blocks share the outermost map. Instances are held
+        weakly, so only models still referenced elsewhere are kept.
+    """
+    active = _identity_maps.get()
+    if active is not None:
+        yield active
+        return
+
+    token = _identity_maps.set(WeakValueDictionary())
+    try:
+        yield _identity_maps.get()
+    finally:
+        _identity_maps.reset(token)
+
+
+def _clear_identity_map() -> None:
+    """Clears the active identity map, if any."""
+    active = _identity_maps.get()
+    if active is not None:
+        active.clear()
 
-        self.connection.close()
+
+def _remember(model: Any) -> Any:
+    """Adds a model to the active identity map, if any, and returns it."""
+    active = _identity_maps.get()
+    if active is not None and model is not None and \
+        model.data.get(model.id_column, None) is not None:
+        active[(type(model), model.data[model.id_column])] = model
+    return model
 
 
 @dataclass
@@ -85,34 +340,18 @@ class JoinedModel:
         tert(type(data) is dict, 'data must be dict')
         result = {}
         for model in models:
-            annotations = {
-                c: str(model.__annotations__.get(c)) for c in model.columns
-            }
-            for key, value in annotations.items():
-                # convert "<class 'x'>" to "x"
-                if value.startswith("<class"):
-                    annotations[key] = value.split("'")[1]
-
-            boolean_columns = [
-                c for c in model.columns
-                if annotations[c].startswith('bool')
-            ]
-            nullable_columns = [
-                c for c in model.columns
-                if 'None' in annotations[c]
-            ]
-            result[model.table] = {}
-            for column in model.columns:
-                key = f"{model.table}.{column}"
+            parsed = result[model.table] = {}
+            for column, key, is_bool in joined_columns(
+                model, model.table, tuple(model.columns)
+            ):
                 # skip unselected columns
                 if key not in data:
                     continue
-                value = data.get(key)
+                value = data[key]
                 # cast appropriate columns to bool
-                if value is not None or column in nullable_columns:
-                    if column in boolean_columns and value is not None:
-                        value = bool(value)
-                result[model.table][column] = value
+                if is_bool and value is not None:
+                    value = bool(value)
+                parsed[column] = value
         return result
 
     def get_models(self) -> list[SqlModel]:
@@ -127,6 +366,33 @@ class JoinedModel:
                     instances.append(model.find(model_id))
         return instances
 
+    @classmethod
+    def get_models_many(cls, joined_models: list[JoinedModel]) -> list[list[SqlModel]]:
+        """Returns the underlying models of each of the joined models.
+            Loads the models of each class with a single query instead
+            of calling the find method once per model.
+        """
+        ids = {}
+        for joined in joined_models:
+            for model in joined.models:
+                model_id = joined.data.get(model.table, {}).get(model.id_column)
+                if model_id is not None:
+                    ids.setdefault(model, set()).add(model_id)
+
+        found = {}
+        for model, model_ids in ids.items():
+            for instance in model.query().is_in(model.id_column, [*model_ids]).get():
+                found[(model, instance.data[model.id_column])] = instance
+
+        return [
+            [
+                found.get((model, joined.data[model.table][model.id_column]))
+                for model in joined.models
+                if model.id_column in joined.data.get(model.table, {})
+            ]
+            for joined in joined_models
+        ]
+
 
 @dataclass
 class JoinSpec:
@@ -172,13 +438,15 @@ def quote_sql_str_value(value: str) -> str:
     value = value.replace("'", "''")
     return f"'{value}'"
 
+@lru_cache(maxsize=512)
 def quote_identifier(identifier: str) -> str:
     """Quotes an identifier for use in an SQL statement, ensuring
         that each identifier component (e.g. part1.part2 has two
         components) is properly quoted. Raises ValueError if any
         component has an unmatched quotation mark (e.g. part1.part2").
-        Raises ValueError if identifier contains a single quote. Used
-        internally.
+        Raises ValueError if identifier contains a single quote. Quoted
+        identifiers are cached, since the same few column names are
+        quoted for every clause built on them. Used internally.
     """
     vert("'" not in identifier, 'identifier cannot contain single quotes')
     parts = identifier.split('.')
@@ -196,12 +464,276 @@ def quote_identifier(identifier: str) -> str:
     ]
     return '.'.join(parts)
 
+@lru_cache(maxsize=256)
+def placeholders_sql(count: int) -> str:
+    """Returns a comma-separated list of count ? placeholders, cached
+        per count so that repeated statements and in clauses of the
+        same size reuse one str. Used internally.
+    """
+    return ",".join("?" * count)
+
+@lru_cache(maxsize=256)
+def insert_sql(table: str, columns: tuple[str, ...],
+               id_column: str|None = None) -> str:
+    """Returns the parameterized INSERT statement for the table and
+        columns. If id_column is given, the statement takes the id as
+        an additional last parameter and inserts nothing if a record
+        with that id already exists. Statements are cached so that
+        repeated inserts of the same shape reuse the same SQL str,
+        which also lets sqlite3 reuse its prepared statement on a
+        shared connection. Used internally.
+    """
+    placeholders = placeholders_sql(len(columns))
+    if id_column is None:
+        return f'insert into {table} ({",".join(columns)})' + \
+            f' values ({placeholders})'
+    return f'insert into {table} ({",".join(columns)})' + \
+        f' select {placeholders} where not exists' + \
+        f' (select 1 from {table} where {id_column} = ?)'
+
+
+@lru_cache(maxsize=256)
+def insert_many_sql(table: str, columns: tuple[str, ...], rows: int) -> str:
+    """Returns the parameterized INSERT statement for the table and
+        columns with a values list for the given number of rows.
+        Statements are cached like those from insert_sql. Used
+        internally.
+    """
+    values = ",".join([f'({placeholders_sql(len(columns))})'] * rows)
+    return f'insert into {table} ({",".join(columns)}) values {values}'
+
+def insert_many_batches(columns: tuple[str, ...],
+                        rows: list[tuple]) -> Generator[tuple[int, list], None, None]:
+    """Yields (row count, flattened params) batches of rows for
+        insert_many_sql, keeping each batch within INSERT_MANY_BATCH_SIZE
+        rows and SQLITE_MAX_VARIABLES params. Used internally.
+    """
+    size = max(1, min(
+        INSERT_MANY_BATCH_SIZE, SQLITE_MAX_VARIABLES // max(1, len(columns))
+    ))
+    for i in range(0, len(rows), size):
+        batch = rows[i:i+size]
+        yield len(batch), [v for row in batch for v in row]
+
+
+@lru_cache(maxsize=256)
+def upsert_sql(table: str, columns: tuple[str, ...],
+               conflict_columns: tuple[str, ...]) -> str:
+    """Returns the parameterized INSERT statement for the table and
+        columns that updates the other columns of the existing record
+        instead when a record with the same conflict_columns values
+        already exists. Statements are cached like those from
+        insert_sql. Used internally.
+    """
+    sql = f'insert into {table} ({",".join(columns)})' + \
+        f' values ({placeholders_sql(len(columns))})' + \
+        f' on conflict ({",".join(conflict_columns)}) do '
+    updates = [f'{c} = excluded.{c}' for c in columns if c not in conflict_columns]
+    return sql + (f'update set {",".join(updates)}' if updates else 'nothing')
+
+
+@lru_cache(maxsize=256)
+def find_sql(table: str, columns: tuple[str, ...], id_column: str) -> str:
+    """Returns the parameterized SELECT statement for finding a record
+        of the table by its id. Statements are cached like those from
+        insert_sql. Used internally.
+    """
+    return f'select {",".join(columns)} from {table} where {id_column} = ?'
+
+
+@lru_cache(maxsize=1024)
+def like_sql(column: str, negated: bool = False) -> str:
+    """Returns the parameterized 'column like ?' clause, or the
+        'column not like ?' clause if negated is True. Clauses are
+        cached so that repeated like conditions on the same column
+        skip quoting the identifier again. Raises ValueError for
+        invalid column (calls quote_identifier). Used internally.
+    """
+    if negated:
+        return f'{quote_identifier(column)} not like ?'
+    return f'{quote_identifier(column)} like ?'
+
+
+def _sqlite_has_json1() -> bool:
+    """Returns True if the SQLite library used by sqlite3 provides the
+        JSON1 functions, which are not included in every build.
+    """
+    connection = sqlite3.connect(':memory:')
+    try:
+        connection.execute("select value from json_each('[]')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+# checked once at import; in_sql falls back to placeholders without JSON1
+SQLITE_HAS_JSON1 = _sqlite_has_json1()
+
+
+def in_sql(column: str, data: tuple|list,
+           negated: bool = False) -> tuple[str, list]:
+    """Returns the 'column in (...)' (or 'not in' if negated) clause
+        and its params for the values. Lists of more than
+        JSON_IN_LIST_SIZE str values are bound as a single JSON array
+        param read with json_each, which keeps the statement under the
+        SQLite bound parameter limit and its text independent of the
+        list length. This requires the JSON1 extension of SQLite; if
+        the SQLite library lacks it (see SQLITE_HAS_JSON1), one
+        placeholder per value is used instead. Used internally by
+        is_in and not_in.
+    """
+    operator = 'not in' if negated else 'in'
+    if SQLITE_HAS_JSON1 and len(data) > JSON_IN_LIST_SIZE and \
+            all(type(v) is str for v in data):
+        return (
+            f'{quote_identifier(column)} {operator} (select value from json_each(?))',
+            [dumps([*data])]
+        )
+    return (
+        f'{quote_identifier(column)} {operator} ({placeholders_sql(len(data))})',
+        [*data]
+    )
+
+
+def _column_annotations(model: type, columns: tuple[str, ...]) -> tuple:
+    """Returns the annotation of each column on the model, or None for
+        columns without one. Used internally to tell whether a result
+        cached for a model class is still valid.
+    """
+    annotations = model.__annotations__
+    return tuple(annotations.get(c) for c in columns)
+
+
+_boolean_column_sets: WeakKeyDictionary[type, dict] = WeakKeyDictionary()
+
+
+def boolean_column_set(model: type, columns: tuple[str, ...]) -> frozenset[str]:
+    """Returns the set of columns annotated as bool on the model, so
+        that query results can be converted without inspecting the
+        annotations for every query. The result is cached on a weak
+        reference to the model class and recomputed if the column
+        annotations change. Used internally.
+    """
+    annotations = _column_annotations(model, columns)
+    cache = _boolean_column_sets.get(model)
+    if cache is None:
+        cache = _boolean_column_sets[model] = {}
+    cached = cache.get(columns)
+    if cached is not None and cached[0] == annotations:
+        return cached[1]
+
+    result = frozenset(
+        c for c, annotation in zip(columns, annotations)
+        if 'bool' in str(annotation)
+    )
+    cache[columns] = (annotations, result)
+    return result
+
+
+_joined_columns: WeakKeyDictionary[type, dict] = WeakKeyDictionary()
+
+
+def joined_columns(model: type, table: str,
+                   columns: tuple[str, ...]) -> tuple[tuple[str, str, bool], ...]:
+    """Returns a (column, 'table.column' key, is bool) tuple for each
+        column, with the bool flag parsed from the column annotation.
+        The result is cached on a weak reference to the model class and
+        parsed again if the column annotations change. Used internally
+        by JoinedModel.parse_data.
+    """
+    annotations = _column_annotations(model, columns)
+    cache = _joined_columns.get(model)
+    if cache is None:
+        cache = _joined_columns[model] = {}
+    cached = cache.get((table, columns))
+    if cached is not None and cached[0] == annotations:
+        return cached[1]
+
+    result = []
+    for column, annotation in zip(columns, annotations):
+        annotation = str(annotation)
+        # convert "<class 'x'>" to "x"
+        if annotation.startswith("<class"):
+            annotation = annotation.split("'")[1]
+        result.append((column, f'{table}.{column}', annotation.startswith('bool')))
+    result = tuple(result)
+    cache[(table, columns)] = (annotations, result)
+    return result
+
+
+@lru_cache(maxsize=None)
+def hashed_columns(columns: tuple[str, ...], id_column: str,
+                   excluded: tuple[str, ...]) -> tuple[str, ...]:
+    """Returns the columns whose values make up a HashedModel preimage:
+        every column except the id column and the columns excluded from
+        the hash. Used internally by HashedModel.generate_id.
+    """
+    return tuple(c for c in columns if c != id_column and c not in excluded)
+
+
+_column_defaults: WeakKeyDictionary[type, dict] = WeakKeyDictionary()
+
+
+def column_defaults(model: type, columns: tuple[str, ...],
+                    id_column: str) -> MappingProxyType:
+    """Returns a read-only mapping of each non-id column to the default
+        value parsed from its `Default[...]` annotation, or None if the
+        column has no default. The result is cached on a weak reference
+        to the model class and parsed again if the column annotations
+        change; used internally by HashedModel.generate_id.
+    """
+    annotations = _column_annotations(model, columns)
+    cache = _column_defaults.get(model)
+    if cache is None:
+        cache = _column_defaults[model] = {}
+    cached = cache.get((columns, id_column))
+    if cached is not None and cached[0] == annotations:
+        return cached[1]
+
+    defaults = {}
+    for name, annotation in zip(columns, annotations):
+        if name == id_column:
+            continue
+        defaults[name] = None
+        if annotation is None:
+            continue
+        annotation = str(annotation)
+        if 'Default' not in annotation:
+            continue
+        default = annotation[annotation.index('Default') + 8:-1]
+        if default.lower() == 'true':
+            defaults[name] = True
+        elif default.lower() == 'false':
+            defaults[name] = False
+        elif 'int' in annotation and default.isnumeric():
+            defaults[name] = int(default)
+        elif 'float' in annotation:
+            defaults[name] = float(default)
+        elif 'bytes' in annotation:
+            if default[0] == 'b':
+                defaults[name] = default[2:-1].encode('utf-8')
+            else:
+                defaults[name] = default.encode('utf-8')
+        elif default[0] == "'" or default[0] == '"':
+            defaults[name] = default[1:-1]
+        else:
+            defaults[name] = default
+    defaults = MappingProxyType(defaults)
+    cache[(columns, id_column)] = (annotations, defaults)
+    return defaults
+
 
 class SqlQueryBuilder:
     """Main query builder class. Extend with child class to bind to a
         specific database by supplying the context_manager param to a
         call to `super().__init__()`. Default binding is to sqlite3.
     """
+    __slots__ = (
+        '_model', '_table', 'context_manager', 'connection_info',
+        'clauses', 'params', 'order_column', 'order_dir', 'limit',
+        'offset', 'joins', 'columns', 'grouping',
+    )
     model: Type[ModelProtocol]
     context_manager: Type[DBContextProtocol]
     connection_info: str
@@ -214,6 +746,14 @@ class SqlQueryBuilder:
     joins: list[JoinSpec]
     columns: list[str]
     grouping: str
+    _reset_state: MappingProxyType = MappingProxyType({
+        'order_column': None,
+        'order_dir': 'desc',
+        'limit': None,
+        'offset': None,
+        'columns': None,
+        'grouping': None,
+    })
 
     def __init__(self, model_or_table: Type[SqlModel]|str = None,
                  context_manager: Type[DBContextProtocol] = SqliteContext,
@@ -239,8 +779,11 @@ class SqlQueryBuilder:
              'context_manager must be class implementing DBContextProtocol')
         tressa(type(model_or_table) is type or len(columns),
                'must provide class implementing ModelProtocol or columns')
-        if not connection_info and hasattr(self.__class__, 'connection_info'):
-            connection_info = self.__class__.connection_info
+        if not connection_info:
+            # a class-level str binding; the slot itself is a descriptor
+            bound_info = getattr(self.__class__, 'connection_info', None)
+            if type(bound_info) in (str, bytes):
+                connection_info = bound_info
         if type(model_or_table) is type:
             self._model = model_or_table
         else:
@@ -292,10 +835,11 @@ class SqlQueryBuilder:
         tert(type(column) in (str, list, tuple),
              'column must be str, list[str,], or tuple[str,]')
         if type(column) in (list, tuple):
-            tert(all([type(c) is str for c in column]),
-                 'column must be str or list[str]')
+            clauses = []
             for c in column:
-                self.clauses.append(f'{quote_identifier(c)} is null')
+                tert(type(c) is str, 'column must be str or list[str]')
+                clauses.append(f'{quote_identifier(c)} is null')
+            self.clauses.extend(clauses)
         else:
             self.clauses.append(f'{quote_identifier(column)} is null')
         return self
@@ -308,10 +852,11 @@ class SqlQueryBuilder:
         tert(type(column) in (str, list, tuple),
              'column must be str, list[str,], or tuple[str,]')
         if type(column) in (list, tuple):
-            tert(all([type(c) is str for c in column]),
-                 'column must be str or list[str]')
+            clauses = []
             for c in column:
-                self.clauses.append(f'{quote_identifier(c)} is not null')
+                tert(type(c) is str, 'column must be str or list[str]')
+                clauses.append(f'{quote_identifier(c)} is not null')
+            self.clauses.extend(clauses)
         else:
             self.clauses.append(f'{quote_identifier(column)} is not null')
         return self
@@ -328,10 +873,13 @@ class SqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} = ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} = ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} = ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def not_equal(self, column: str = None, data: Any = None,
@@ -346,10 +894,13 @@ class SqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} != ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} != ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} != ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def less(self, column: str = None, data: Any = None,
@@ -364,10 +915,13 @@ class SqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} < ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} < ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} < ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def greater(self, column: str = None, data: Any = None,
@@ -382,12 +936,31 @@ class SqlQueryBuilder:
             self.clauses.append(f'{quote_identifier(column)} > ?')
             self.params.append(data)
 
+        clauses, params = [], []
         for column, data in conditions.items():
             tert(type(column) is str, 'each column must be str')
-            self.clauses.append(f'{quote_identifier(column)} > ?')
-            self.params.append(data)
+            clauses.append(f'{quote_identifier(column)} > ?')
+            params.append(data)
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
+    def _like_pattern(self, column: str, pattern: str, data: str,
+                      negated: bool = False) -> None:
+        """Save the like (or not like if negated) clause for the column
+            and the pattern with each ? replaced by the data as the
+            param. Raises TypeError or ValueError for invalid column,
+            pattern, or data. Used internally by like and not_like.
+        """
+        tert(type(column) is str, 'column must be str')
+        tert(type(pattern) is str, 'pattern must be str')
+        tert(type(data) is str, 'data must be str')
+        vert(len(column), 'column cannot be empty')
+        vert(len(pattern), 'pattern cannot be empty')
+        vert(len(data), 'data cannot be empty')
+        self.clauses.append(like_sql(column, negated))
+        self.params.append(pattern.replace('?', data))
+
     def like(self, column: str = None, pattern: str = None, data: str = None,
              **conditions: dict[str, tuple[str, str]]) -> SqlQueryBuilder:
         """Save the 'column like {pattern.replace(?, data)}' clause and
@@ -397,14 +970,7 @@ class SqlQueryBuilder:
             `like(column1=(pattern1,str1), column2=(pattern2,str2), etc=(pattern3,str3))`.
         """
         if column is not None:
-            tert(type(column) is str, 'column must be str')
-            tert(type(pattern) is str, 'pattern must be str')
-            tert(type(data) is str, 'data must be str')
-            vert(len(column), 'column cannot be empty')
-            vert(len(pattern), 'pattern cannot be empty')
-            vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} like ?')
-            self.params.append(pattern.replace('?', data))
+            self._like_pattern(column, pattern, data)
 
         for column, val in conditions.items():
             tert(type(val) in (tuple, list),
@@ -412,7 +978,7 @@ class SqlQueryBuilder:
             vert(len(val) == 2,
                  'each value must be tuple or list with 2 elements: pattern, data')
             pattern, data = val
-            self.like(column, pattern, data)
+            self._like_pattern(column, pattern, data)
         return self
 
     def not_like(self, column: str = None, pattern: str = None, data: str = None,
@@ -424,14 +990,7 @@ class SqlQueryBuilder:
             `not_like(column1=(pattern1,str1), column2=(pattern2,str2), etc=(pattern3,str3))`.
         """
         if column is not None:
-            tert(type(column) is str, 'column must be str')
-            tert(type(pattern) is str, 'pattern must be str')
-            tert(type(data) is str, 'data must be str')
-            vert(len(column), 'column cannot be empty')
-            vert(len(pattern), 'pattern cannot be empty')
-            vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} not like ?')
-            self.params.append(pattern.replace('?', data))
+            self._like_pattern(column, pattern, data, True)
 
         for column, val in conditions.items():
             tert(type(val) in (tuple, list),
@@ -445,9 +1004,24 @@ class SqlQueryBuilder:
             vert(len(column), 'column cannot be empty')
             vert(len(pattern), 'pattern cannot be empty')
             vert(len(data), 'data cannot be empty')
-            self.not_like(column, pattern, data)
+            self._like_pattern(column, pattern, data, True)
         return self
 
+    def _like(self, column: str, data: str, prefix: str = '',
+              suffix: str = '', negated: bool = False) -> None:
+        """Save the like (or not like if negated) clause for the column
+            and the data wrapped in the prefix and suffix wildcards as
+            the param. Raises TypeError or ValueError for invalid column
+            or data. Used internally by the starts_with, contains,
+            ends_with, and negated methods.
+        """
+        tert(type(column) is str, 'column must be str')
+        tert(type(data) is str, 'data must be str')
+        vert(len(column), 'column cannot be empty')
+        vert(len(data), 'data cannot be empty')
+        self.clauses.append(like_sql(column, negated))
+        self.params.append(prefix + data + suffix)
+
     def starts_with(self, column: str = None, data: str = None,
                     **conditions: dict[str, Any]) -> SqlQueryBuilder:
         """Save the 'column like data%' clause and param, then return
@@ -456,10 +1030,10 @@ class SqlQueryBuilder:
             or `starts_with(column1=str1, column2=str2, etc=str3)`.
         """
         if column is not None:
-            self.like(column, '?%', data)
+            self._like(column, data, '', '%')
 
         for column, data in conditions.items():
-            self.like(column, '?%', data)
+            self._like(column, data, '', '%')
         return self
 
     def does_not_start_with(self, column: str = None, data: str = None,
@@ -471,10 +1045,10 @@ class SqlQueryBuilder:
             `does_not_start_with(column1=str1, column2=str2, etc=str3)`.
         """
         if column is not None:
-            self.not_like(column, '?%', data)
+            self._like(column, data, '', '%', True)
 
         for column, data in conditions.items():
-            self.not_like(column, '?%', data)
+            self._like(column, data, '', '%', True)
         return self
 
     def contains(self, column: str = None, data: str = None,
@@ -485,10 +1059,10 @@ class SqlQueryBuilder:
             or `contains(column1=str1, column2=str2, etc=str3)`.
         """
         if column is not None:
-            self.like(column, '%?%', data)
+            self._like(column, data, '%', '%')
 
         for column, data in conditions.items():
-            self.like(column, '%?%', data)
+            self._like(column, data, '%', '%')
         return self
 
     def excludes(self, column: str = None, data: str = None,
@@ -500,10 +1074,10 @@ class SqlQueryBuilder:
             `excludes(column1=str1, column2=str2, etc=str3)`.
         """
         if column is not None:
-            self.not_like(column, '%?%', data)
+            self._like(column, data, '%', '%', True)
 
         for column, data in conditions.items():
-            self.not_like(column, '%?%', data)
+            self._like(column, data, '%', '%', True)
         return self
 
     def ends_with(self, column: str = None, data: str = None,
@@ -514,10 +1088,10 @@ class SqlQueryBuilder:
             or `ends_with(column1=str1, column2=str2, etc=str3)`.
         """
         if column is not None:
-            self.like(column, '%?', data)
+            self._like(column, data, '%')
 
         for column, data in conditions.items():
-            self.like(column, '%?', data)
+            self._like(column, data, '%')
         return self
 
     def does_not_end_with(self, column: str = None, data: str = None,
@@ -529,10 +1103,10 @@ class SqlQueryBuilder:
             `does_not_end_with(column1=str1, column2=str2, etc=str3)`.
         """
         if column is not None:
-            self.not_like(column, '%?', data)
+            self._like(column, data, '%', '', True)
 
         for column, data in conditions.items():
-            self.not_like(column, '%?', data)
+            self._like(column, data, '%', '', True)
         return self
 
     def is_in(self, column: str = None, data: tuple|list = None,
@@ -547,11 +1121,21 @@ class SqlQueryBuilder:
             tert(type(data) in (tuple, list), 'data must be tuple or list')
             vert(len(column), 'column cannot be empty')
             vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} in ({",".join(["?" for _ in data])})')
-            self.params.extend(data)
+            clause, values = in_sql(column, data)
+            self.clauses.append(clause)
+            self.params.extend(values)
 
+        clauses, params = [], []
         for column, data in conditions.items():
-            self.is_in(column, data)
+            tert(type(column) is str, 'column must be str')
+            tert(type(data) in (tuple, list), 'data must be tuple or list')
+            vert(len(column), 'column cannot be empty')
+            vert(len(data), 'data cannot be empty')
+            clause, values = in_sql(column, data)
+            clauses.append(clause)
+            params += values
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def not_in(self, column: str = None, data: tuple|list = None,
@@ -566,11 +1150,21 @@ class SqlQueryBuilder:
             tert(type(data) in (tuple, list), 'data must be tuple or list')
             vert(len(column), 'column cannot be empty')
             vert(len(data), 'data cannot be empty')
-            self.clauses.append(f'{quote_identifier(column)} not in ({",".join(["?" for _ in data])})')
-            self.params.extend(data)
+            clause, values = in_sql(column, data, True)
+            self.clauses.append(clause)
+            self.params.extend(values)
 
+        clauses, params = [], []
         for column, data in conditions.items():
-            self.not_in(column, data)
+            tert(type(column) is str, 'column must be str')
+            tert(type(data) in (tuple, list), 'data must be tuple or list')
+            vert(len(column), 'column cannot be empty')
+            vert(len(data), 'data cannot be empty')
+            clause, values = in_sql(column, data, True)
+            clauses.append(clause)
+            params += values
+        self.clauses.extend(clauses)
+        self.params.extend(params)
         return self
 
     def where(self, **conditions: dict[str, dict[str, Any]|list[str]]) -> SqlQueryBuilder:
@@ -592,61 +1186,27 @@ class SqlQueryBuilder:
             does_not_end_with={'column1':str1, 'column2':str2, 'etc':str3},
             is_in={'column1':list1, 'column2':list2, 'etc':list3},
             not_in={'column1':list1, 'column2':list2, 'etc':list3})`. All
-            kwargs are optional.
-        """
-        for condition_type, condition_data in conditions.items():
-            vert(condition_type in (
-                'is_null', 'not_null', 'equal', 'not_equal', 'less', 'greater',
-                'like', 'not_like', 'starts_with', 'does_not_start_with',
-                'contains', 'excludes', 'ends_with', 'does_not_end_with',
-                'is_in', 'not_in'
-            ), 'unrecognized condition type')
-            if condition_type == 'is_null':
-                self.is_null(condition_data)
-            elif condition_type == 'not_null':
-                self.not_null(condition_data)
-            elif condition_type == 'equal':
-                tert(type(condition_data) is dict, 'equal must be dict[str, Any]')
-                self.equal(**condition_data)
-            elif condition_type == 'not_equal':
-                tert(type(condition_data) is dict, 'not_equal must be dict[str, Any]')
-                self.not_equal(**condition_data)
-            elif condition_type == 'less':
-                tert(type(condition_data) is dict, 'less must be dict[str, Any]')
-                self.less(**condition_data)
-            elif condition_type == 'greater':
-                tert(type(condition_data) is dict, 'greater must be dict[str, Any]')
-                self.greater(**condition_data)
-            elif condition_type == 'like':
-                tert(type(condition_data) is dict, 'like must be dict[str, tuple[str, str]]')
-                self.like(**condition_data)
-            elif condition_type == 'not_like':
-                tert(type(condition_data) is dict, 'not_like must be dict[str, tuple[str, str]]')
-                self.not_like(**condition_data)
-            elif condition_type == 'starts_with':
-                tert(type(condition_data) is dict, 'starts_with must be dict[str, str]')
-                self.starts_with(**condition_data)
-            elif condition_type == 'does_not_start_with':
-                tert(type(condition_data) is dict, 'does_not_start_with must be dict[str, str]')
-                self.does_not_start_with(**condition_data)
-            elif condition_type == 'contains':
-                tert(type(condition_data) is dict, 'contains must be dict[str, str]')
-                self.contains(**condition_data)
-            elif condition_type == 'excludes':
-                tert(type(condition_data) is dict, 'excludes must be dict[str, str]')
-                self.excludes(**condition_data)
-            elif condition_type == 'ends_with':
-                tert(type(condition_data) is dict, 'ends_with must be dict')
-                self.ends_with(**condition_data)
-            elif condition_type == 'does_not_end_with':
-                tert(type(condition_data) is dict, 'does_not_end_with must be dict')
-                self.does_not_end_with(**condition_data)
-            elif condition_type == 'is_in':
-                tert(type(condition_data) is dict, 'is_in must be dict')
-                self.is_in(**condition_data)
-            elif condition_type == 'not_in':
-                tert(type(condition_data) is dict, 'not_in must be dict')
-                self.not_in(**condition_data)
+            kwargs are optional. The conditions are collected separately
+            and saved in one batch, so nothing is saved if any of them
+            is invalid.
+        """
+        clauses, params = self.clauses, self.params
+        self.clauses, self.params = [], []
+        try:
+            for condition_type, condition_data in conditions.items():
+                vert(condition_type in WHERE_CONDITION_TYPES,
+                     'unrecognized condition type')
+                method = getattr(self, condition_type)
+                message = WHERE_CONDITION_TYPES[condition_type]
+                if message is None:
+                    method(condition_data)
+                else:
+                    tert(type(condition_data) is dict, message)
+                    method(**condition_data)
+            clauses.extend(self.clauses)
+            params.extend(self.params)
+        finally:
+            self.clauses, self.params = clauses, params
         return self
 
     def order_by(self, column: str = None, direction: str = 'desc',
@@ -681,12 +1241,43 @@ class SqlQueryBuilder:
         self.offset = offset
         return self
 
+    def _clone(self) -> SqlQueryBuilder:
+        """Returns a shallow copy of the instance, including any
+            attributes set by subclasses, without calling __init__.
+        """
+        sqb = object.__new__(self.__class__)
+        for name in SqlQueryBuilder.__slots__:
+            setattr(sqb, name, getattr(self, name))
+        if hasattr(self, '__dict__'):
+            sqb.__dict__.update(self.__dict__)
+        return sqb
+
     def reset(self) -> SqlQueryBuilder:
-        """Returns a fresh instance using the configured model."""
-        return self.__class__(
-            model=self.model, context_manager=self.context_manager,
-            connection_info=self.connection_info
-        )
+        """Returns a fresh instance using the configured model. Skips
+            the validation done in __init__.
+        """
+        sqb = self._clone()
+        for name, value in self._reset_state.items():
+            setattr(sqb, name, value)
+        sqb._table = self._model.table
+        sqb.connection_info = self._model.connection_info
+        sqb.clauses = []
+        sqb.params = []
+        sqb.joins = []
+        return sqb
+
+    def copy(self) -> SqlQueryBuilder:
+        """Returns a copy of the instance with its own clauses, params,
+            joins, and columns lists. Skips the validation done in
+            __init__.
+        """
+        sqb = self._clone()
+        sqb.clauses = [*self.clauses]
+        sqb.params = [*self.params]
+        sqb.joins = [*self.joins]
+        if self.columns is not None:
+            sqb.columns = [*self.columns]
+        return sqb
 
     def insert(self, data: dict) -> Optional[SqlModel|Row]:
         """Insert a record and return a model instance. Raises TypeError
@@ -696,26 +1287,26 @@ class SqlQueryBuilder:
         tert(isinstance(data, dict), 'data must be dict')
         columns, params = [], []
 
-        for key in data:
-            if key in data:
-                if key in self.model.columns:
-                    columns.append(key)
-                    params.append(data[key])
-
+        # walk the model columns rather than the data keys so that the
+        # same set of columns always yields the same cached statement
         for key in self.model.columns:
-            if key not in data and key != self.model.id_column:
+            if key in data:
+                columns.append(key)
+                params.append(data[key])
+            elif key != self.model.id_column:
                 data[key] = None
 
+        # check for an existing record in the insert statement itself
         if self.model.id_column in columns:
-            vert(self.find(data[self.model.id_column]) is None,
-                 'record with this id already exists')
-
-        sql = f'insert into {self.model.table} ({",".join(columns)})' + \
-            f' values ({",".join(["?" for p in params])})'
+            sql = insert_sql(self.model.table, tuple(columns), self.model.id_column)
+            params.append(data[self.model.id_column])
+        else:
+            sql = insert_sql(self.model.table, tuple(columns))
 
         with self.context_manager(self.connection_info) as cursor:
             cursor.execute(sql, params)
-            return self.model(data=data) if self.model else Row(data=data)
+            vert(cursor.rowcount != 0, 'record with this id already exists')
+            return _remember(self.model(data=data)) if self.model else Row(data=data)
 
     def insert_many(self, items: list[dict]) -> int:
         """Insert a batch of records and return the number inserted.
@@ -730,18 +1321,52 @@ class SqlQueryBuilder:
                     item[key] = None
             rows.append(tuple([item[key] for key in self.model.columns]))
 
-        sql = f"insert into {self.model.table} values "\
-            f"({','.join(['?' for f in self.model.columns])})"
+        columns = tuple(self.model.columns)
+        inserted = 0
 
         with self.context_manager(self.connection_info) as cursor:
-            return cursor.executemany(sql, rows).rowcount
+            for count, params in insert_many_batches(columns, rows):
+                sql = insert_many_sql(self.model.table, columns, count)
+                inserted += cursor.execute(sql, params).rowcount
+            return inserted
+
+    def upsert(self, data: dict,
+               conflict_columns: tuple[str, ...]|list[str] = None) -> int:
+        """Insert a record, or update the existing record with the same
+            values for the conflict_columns (the id column by default),
+            in a single statement and return the number of records
+            changed (not a model instance, unlike insert). The
+            conflict_columns must have a primary key or unique index.
+            No model event hooks are invoked. Cannot be used with a
+            HashedModel, since updating the record in place would make its
+            content no longer match its id. Raises TypeError for invalid
+            data or conflict_columns or a HashedModel model or ValueError if
+            data has no columns.
+        """
+        tert(isinstance(data, dict), 'data must be dict')
+        tert(not (isinstance(self.model, type) and issubclass(self.model, HashedModel)),
+             'upsert cannot be used with HashedModel')
+        if conflict_columns is None:
+            conflict_columns = (self.model.id_column,)
+        tert(type(conflict_columns) in (tuple, list),
+             'conflict_columns must be tuple[str]|list[str]')
+        # same column order as insert so that statements are reused
+        columns = tuple(c for c in self.model.columns if c in data)
+        vert(len(columns) > 0, 'data must include at least one column')
+
+        sql = upsert_sql(self.model.table, columns, tuple(conflict_columns))
+        _clear_identity_map()
+        with self.context_manager(self.connection_info) as cursor:
+            return cursor.execute(sql, [data[c] for c in columns]).rowcount
 
     def find(self, id: Any) -> Optional[SqlModel|Row]:
         """Find a record by its id and return it."""
         with self.context_manager(self.connection_info) as cursor:
             cursor.execute(
-                f'select {",".join(self.model.columns)} from {self.model.table}' +
-                f' where {self.model.id_column} = ?',
+                find_sql(
+                    self.model.table, tuple(self.model.columns),
+                    self.model.id_column
+                ),
                 [id]
             )
             result = cursor.fetchone()
@@ -750,10 +1375,9 @@ class SqlQueryBuilder:
             return None
 
         # find boolean columns
-        boolean_columns = [
-            c for c in self.model.columns
-            if 'bool' in str(self.model.__annotations__.get(c))
-        ] if self.model else []
+        boolean_columns = boolean_column_set(
+            self.model, tuple(self.model.columns)
+        ) if self.model else frozenset()
 
         data = {
             column: bool(value)
@@ -762,7 +1386,7 @@ class SqlQueryBuilder:
             for column, value in zip(self.model.columns, result)
         }
 
-        return self.model(data=data) if self.model else Row(data=data)
+        return _remember(self.model(data=data)) if self.model else Row(data=data)
 
     def join(self, model_or_table: Type[SqlModel]|str, on: list[str],
              kind: str = "inner", joined_table_columns: tuple[str] = (),
@@ -780,7 +1404,8 @@ class SqlQueryBuilder:
         if type(model) is not type:
             model = dynamic_sqlmodel(self.connection_info, model, joined_table_columns)
         tert(type(on) is list, "on must be list[str]")
-        tert(all([type(o) is str for o in on]), "on must be list[str]")
+        for o in on:
+            tert(type(o) is str, "on must be list[str]")
         tert(type(kind) is str, "kind must be str")
         vert(len(on) in (2, 3),
              "on must be of form [column, column] or [column, comparison, column]")
@@ -832,7 +1457,8 @@ class SqlQueryBuilder:
             columns.
         """
         tert(type(columns) in (list, tuple), "select columns must be list[str]")
-        tert(all([type(c) is str for c in columns]), "select columns must be list[str]")
+        for c in columns:
+            tert(type(c) is str, "select columns must be list[str]")
         self.columns = [*columns]
         return self
 
@@ -890,20 +1516,7 @@ class SqlQueryBuilder:
             for j in self.joins
         ])
 
-        if len(self.clauses) > 0:
-            sql += ' where ' + ' and '.join(self.clauses)
-
-        if self.grouping:
-            sql += f' group by {self.grouping}'
-
-        if self.order_column is not None:
-            sql += f' order by {self.order_column} {self.order_dir}'
-
-        if type(self.limit) is int and self.limit > 0:
-            sql += f' limit {self.limit}'
-
-            if type(self.offset) is int and self.offset > 0:
-                sql += f' offset {self.offset}'
+        sql += self._select_tail_sql()
 
         with self.context_manager(self.connection_info) as cursor:
             cursor.execute(sql, self.params)
@@ -935,50 +1548,53 @@ class SqlQueryBuilder:
         quoted_columns = [quote_identifier(c) for c in columns]
         sql = f'select {",".join(quoted_columns)} from {quote_identifier(self.model.table)}'
 
+        sql += self._select_tail_sql()
+
+        boolean_columns = boolean_column_set(
+            self.model, tuple(self.model.columns)
+        ) if self.model else frozenset()
+
+        with self.context_manager(self.connection_info) as cursor:
+            cursor.execute(sql, self.params)
+            rows = cursor.fetchall()
+            # pick the result type and conversion once for all rows
+            result_class = Row if self.grouping or not self.model else self.model
+            if not boolean_columns.intersection(columns):
+                return [result_class(data=dict(zip(columns, row))) for row in rows]
+            # flag the bool columns by position rather than by set lookup
+            is_bool = [c in boolean_columns for c in columns]
+            return [
+                result_class(data={
+                    key: bool(value) if (flag and value is not None) else value
+                    for key, value, flag in zip(columns, row, is_bool)
+                })
+                for row in rows
+            ]
+
+    def _select_tail_sql(self) -> str:
+        """Returns the where, group by, order by, limit, and offset
+            parts of a select query, joined from a list of fragments.
+            Used by the `get` method. Do not call this method manually.
+        """
+        parts = []
+
         if len(self.clauses) > 0:
-            sql += ' where ' + ' and '.join(self.clauses)
+            parts.append(' where ')
+            parts.append(' and '.join(self.clauses))
 
         if self.grouping:
-            sql += f' group by {self.grouping}'
+            parts.append(f' group by {self.grouping}')
 
         if self.order_column is not None:
-            sql += f' order by {self.order_column} {self.order_dir}'
+            parts.append(f' order by {self.order_column} {self.order_dir}')
 
         if type(self.limit) is int and self.limit > 0:
-            sql += f' limit {self.limit}'
+            parts.append(f' limit {self.limit}')
 
             if type(self.offset) is int and self.offset > 0:
-                sql += f' offset {self.offset}'
+                parts.append(f' offset {self.offset}')
 
-        boolean_columns = [
-            c for c in self.model.columns
-            if 'bool' in str(self.model.__annotations__.get(c))
-        ] if self.model else []
-
-        with self.context_manager(self.connection_info) as cursor:
-            cursor.execute(sql, self.params)
-            rows = cursor.fetchall()
-            if self.grouping or not self.model:
-                models = [
-                    Row(data={
-                        key: bool(value)
-                        if (key in boolean_columns and value is not None)
-                        else value
-                        for key, value in zip(columns, row)
-                    })
-                    for row in rows
-                ]
-            else:
-                models = [
-                    self.model(data={
-                        key: bool(value)
-                        if (key in boolean_columns and value is not None)
-                        else value
-                        for key, value in zip(columns, row)
-                    })
-                    for row in rows
-                ]
-            return models
+        return ''.join(parts)
 
     def count(self) -> int:
         """Returns the number of records matching the query."""
@@ -1009,17 +1625,22 @@ class SqlQueryBuilder:
         return self._chunk(number)
 
     def _chunk(self, number: int) -> Generator[list[SqlModel]|list[JoinedModel]|list[Row], None, None]:
-        """Create the generator for chunking."""
-        original_offset = self.offset
+        """Create the generator for chunking. Stops without another
+            query once a chunk comes back short.
+        """
+        original_offset, original_limit = self.offset, self.limit
         self.offset = self.offset or 0
-        result = self.take(number)
-
-        while len(result) > 0:
-            yield result
-            self.offset += number
+        try:
             result = self.take(number)
 
-        self.offset = original_offset
+            while len(result) > 0:
+                yield result
+                if len(result) < number:
+                    break
+                self.offset += number
+                result = self.take(number)
+        finally:
+            self.offset, self.limit = original_offset, original_limit
 
     def first(self) -> Optional[SqlModel|Row]:
         """Run the query on the datastore and return the first result."""
@@ -1031,10 +1652,9 @@ class SqlQueryBuilder:
         if self.order_column is not None:
             sql += f' order by {self.order_column} {self.order_dir}'
 
-        boolean_columns = [
-            c for c in self.model.columns
-            if 'bool' in str(self.model.__annotations__.get(c))
-        ] if self.model else []
+        boolean_columns = boolean_column_set(
+            self.model, tuple(self.model.columns)
+        ) if self.model else frozenset()
 
         with self.context_manager(self.connection_info) as cursor:
             cursor.execute(sql, self.params)
@@ -1087,6 +1707,7 @@ class SqlQueryBuilder:
             sql += f' where {" and ".join(condition_columns)}'
 
         # update database
+        _clear_identity_map()
         with self.context_manager(self.connection_info) as cursor:
             return cursor.execute(sql, [*params, *condition_params]).rowcount
 
@@ -1099,6 +1720,7 @@ class SqlQueryBuilder:
         if len(self.clauses) > 0:
             sql += ' where ' + ' and '.join(self.clauses)
 
+        _clear_identity_map()
         with self.context_manager(self.connection_info) as cursor:
             return cursor.execute(sql, self.params).rowcount
 
@@ -1111,27 +1733,36 @@ class SqlQueryBuilder:
             question marks, and an additional list of params will be
             returned along with the SQL str.
         """
-        sql = f' where {" and ".join(self.clauses)}'
+        parts = [' where ']
 
         if interpolate_params:
-            bindings = []
-            for clause, param in zip(self.clauses, self.params):
-                if type(param) in (tuple, list):
-                    bindings.append(clause.replace('?', f'[{",".join(quote_sql_str_value(str(p)) for p in param)}]'))
-                else:
-                    bindings.append(clause.replace('?', quote_sql_str_value(str(param))))
-
-            sql = f' where {" and ".join(bindings)}'
+            # each ? in each clause consumes the next param in order
+            params = iter(self.params)
+            for i, clause in enumerate(self.clauses):
+                if i:
+                    parts.append(' and ')
+                segments = clause.split('?')
+                parts.append(segments[0])
+                for segment in segments[1:]:
+                    param = next(params, None)
+                    if type(param) in (tuple, list):
+                        parts.append(f'[{",".join(quote_sql_str_value(str(p)) for p in param)}]')
+                    else:
+                        parts.append(quote_sql_str_value(str(param)))
+                    parts.append(segment)
+        else:
+            parts.append(' and '.join(self.clauses))
 
         if self.order_column is not None:
-            sql += f' order by {self.order_column} {self.order_dir}'
+            parts.append(f' order by {self.order_column} {self.order_dir}')
 
         if type(self.limit) is int and self.limit > 0:
-            sql += f' limit {self.limit}'
+            parts.append(f' limit {self.limit}')
 
             if type(self.offset) is int and self.offset > 0:
-                sql += f' offset {self.offset}'
+                parts.append(f' offset {self.offset}')
 
+        sql = ''.join(parts)
         return sql if interpolate_params else (sql, self.params)
 
     def execute_raw(self, sql: str) -> tuple[int, list[tuple[Any]]]:
@@ -1139,6 +1770,7 @@ class SqlQueryBuilder:
             fetchall results.
         """
         tert(type(sql) is str, 'sql must be str')
+        _clear_identity_map()
         with self.context_manager(self.connection_info) as cursor:
             cursor.execute(sql)
             return (cursor.rowcount, cursor.fetchall())
@@ -1161,17 +1793,21 @@ class SqlModel:
         """Initialize the instance. Raises TypeError or ValueError if
             _post_init_hooks is not dict[Any, callable].
         """
-        self.data = {}
+        columns = tuple(self.columns)
+        self.data = {
+            key: data[key] for key in data
+            if key in columns and type(key) is str
+        }
 
-        if not hasattr(self.__class__, 'disable_column_property_mapping'):
+        # map the column properties once per class and set of columns
+        cls = self.__class__
+        if not hasattr(cls, 'disable_column_property_mapping') and \
+                cls.__dict__.get('_mapped_columns', None) != columns:
             names = dir(self)
-            for column in self.columns:
+            for column in columns:
                 if column not in names:
-                    setattr(self.__class__, column, self.create_property(column))
-
-        for key in data:
-            if key in self.columns and type(key) is str:
-                self.data[key] = data[key]
+                    setattr(cls, column, self.create_property(column))
+            cls._mapped_columns = columns
 
         self.data_original = MappingProxyType({**self.data})
 
@@ -1221,9 +1857,10 @@ class SqlModel:
         """Invoke the hooks for the event, passing cls, *args, and
             **kwargs.
         """
-        if cls._event_hooks.get('class', None) != cls.__name__:
-            cls._event_hooks = {'class': cls.__name__} # give each class its own event hooks dict
-        for hook in cls._event_hooks.get(event, []):
+        hooks = cls._event_hooks
+        if hooks.get('class', None) != cls.__name__:
+            return # no hooks have been added for this class
+        for hook in hooks.get(event, ()):
             hook(cls, *args, event=event, **kwargs)
 
     @staticmethod
@@ -1276,8 +1913,14 @@ class SqlModel:
     @classmethod
     def find(cls, id: Any) -> Optional[SqlModel]:
         """Find a record by its id and return it. Return None if it does
-            not exist.
+            not exist. Within an identity_map block, an
+            instance already loaded for the id is returned instead.
         """
+        active = _identity_maps.get()
+        if active is not None:
+            model = active.get((cls, id), None)
+            if model is not None:
+                return model
         return cls().query().find(id)
 
     @classmethod
@@ -1404,7 +2047,8 @@ class SqlModel:
             self.invoke_hooks('before_reload', self=self)
         tressa(self.id_column in self.data,
                'id_column must be set in self.data to reload from db')
-        reloaded = self.find(self.data[self.id_column])
+        # bypass any identity map to read the stored values
+        reloaded = self.query().find(self.data[self.id_column])
         if reloaded:
             self.data = reloaded.data
             self.data_original = reloaded.data_original
@@ -1418,11 +2062,22 @@ class SqlModel:
             Conditions are parsed as key=value and cannot handle other
             comparison types. If connection_info is not injected and was
             added as a class attribute, that class attribute will be
-            passed to the query_builder_class instead.
+            passed to the query_builder_class instead. Query builders
+            subclassing SqlQueryBuilder are copied from one cached per class.
         """
         if not connection_info and hasattr(cls, 'connection_info'):
             connection_info = cls.connection_info
-        sqb = cls.query_builder_class(model=cls, connection_info=connection_info)
+        key = (cls.query_builder_class, connection_info, cls.table)
+        cached = cls.__dict__.get('_query_prototype', None)
+        if cached is not None and cached[0] == key:
+            sqb = cached[1].copy()
+        else:
+            sqb = cls.query_builder_class(model=cls, connection_info=connection_info)
+            # subclasses may keep state set up by __init__, which the
+            # prototype copy would skip and share between queries
+            if type(sqb) is SqlQueryBuilder:
+                cls._query_prototype = (key, sqb)
+                sqb = sqb.copy()
 
         if conditions is not None:
             for key in conditions:
@@ -1510,39 +2165,16 @@ class HashedModel(SqlModel):
             columns_excluded_from_hash tuple will be excluded from the
             sha256 hash.
         """
-        for name in cls.columns:
-            if name not in data and name != cls.id_column:
-                # if the column annotation has a default value, use it
-                if name in cls.__annotations__:
-                    annotation = str(cls.__annotations__[name])
-                    if 'Default' in annotation:
-                        default = annotation[annotation.index('Default') + 8:-1]
-                        if default.lower() == 'true':
-                            data[name] = True
-                        elif default.lower() == 'false':
-                            data[name] = False
-                        elif 'int' in annotation and default.isnumeric():
-                            data[name] = int(default)
-                        elif 'float' in annotation:
-                            data[name] = float(default)
-                        elif 'bytes' in annotation:
-                            if default[0] == 'b':
-                                data[name] = default[2:-1].encode('utf-8')
-                            else:
-                                data[name] = default.encode('utf-8')
-                        elif default[0] == "'" or default[0] == '"':
-                            data[name] = default[1:-1]
-                        else:
-                            data[name] = default
-                    else:
-                        data[name] = None
-                else:
-                    data[name] = None
-        data = {
-            k: data[k] for k in data
-            if k in cls.columns and k != cls.id_column and k not in cls.columns_excluded_from_hash
-        }
-        preimage = packify.pack(data)
+        columns = tuple(cls.columns)
+        defaults = column_defaults(cls, columns, cls.id_column)
+        for name, default in defaults.items():
+            if name not in data:
+                data[name] = default
+        preimage = packify.pack({
+            k: data[k] for k in hashed_columns(
+                columns, cls.id_column, tuple(cls.columns_excluded_from_hash)
+            )
+        })
         return sha256(preimage).digest().hex()
 
     @classmethod
@@ -1576,7 +2208,7 @@ class HashedModel(SqlModel):
 
         vals = cls.query().insert_many(items)
         if not suppress_events:
-            cls.invoke_hooks('before_insert_many', items=items, vals=vals)
+            cls.invoke_hooks('after_insert_many', items=items, vals=vals)
         return vals
 
     def update(self, updates: dict, /, *, suppress_events: bool = False) -> HashedModel:
@@ -6,11 +6,15 @@ from .interfaces import (
     RelatedCollection,
     RelatedModel,
 )
+from .classes import SqliteContext, transaction
 from .tools import _pascalcase_to_snake_case
 from abc import abstractmethod
+from collections import Counter
+from contextlib import nullcontext
 from copy import deepcopy
 from types import MappingProxyType
-from typing import Optional, Type
+from typing import Any, Callable, Optional, Type
+from weakref import WeakKeyDictionary
 
 
 """
@@ -24,8 +28,19 @@ from typing import Optional, Type
 """
 
 
+# maps the getter of each related property to the function returning
+# the relation of a model instance; see relation_of
+_relation_getters: WeakKeyDictionary[Callable, Callable] = WeakKeyDictionary()
+
+
 class Relation:
     """Base class for setting up relations."""
+    __slots__ = (
+        '_primary', '_secondary', 'primary_class', 'secondary_class',
+        'primary_to_add', 'primary_to_remove', 'secondary_to_add',
+        'secondary_to_remove', '_primary_name', '_secondary_name',
+        '_prefetched',
+    )
     primary_class: Type[ModelProtocol]
     secondary_class: Type[ModelProtocol]
     primary_to_add: ModelProtocol
@@ -49,8 +64,13 @@ class Relation:
     ) -> None:
         self._primary = None
         self._secondary = None
+        # set by reload_many so that a missing secondary is not queried
+        # again on first access
+        self._prefetched = False
         self.primary_class = primary_class
         self.secondary_class = secondary_class
+        self._primary_name = primary_class.__name__
+        self._secondary_name = secondary_class.__name__
         self.primary_to_add = primary_to_add
         self.primary_to_remove = primary_to_remove
         self.secondary_to_add = secondary_to_add
@@ -120,20 +140,29 @@ class Relation:
         """Sets the secondary model instance(s)."""
         pass
 
+    def has_pending_changes(self) -> bool:
+        """Returns True if the relation has changes that were not yet
+            saved.
+        """
+        return self.primary_to_add is not None or \
+            self.primary_to_remove is not None or \
+            len(self.secondary_to_add) > 0 or \
+            len(self.secondary_to_remove) > 0
+
     def primary_model_precondition(self, primary: ModelProtocol) -> None:
         """Precondition check for the primary instance. Raises TypeError
             if the check fails.
         """
         if self.primary_class is not None:
             tert(isinstance(primary, self.primary_class),
-                f'primary must be instance of {self.primary_class.__name__}')
+                f'primary must be instance of {self._primary_name}')
 
     def secondary_model_precondition(self, secondary: ModelProtocol) -> None:
         """Precondition check for a secondary instance. Raises TypeError
             if the check fails.
         """
         tert(isinstance(secondary, self.secondary_class),
-            f'secondary must be instance of {self.secondary_class.__name__}')
+            f'secondary must be instance of {self._secondary_name}')
 
     @staticmethod
     def pivot_preconditions(pivot: Type[ModelProtocol]) -> None:
@@ -156,6 +185,19 @@ class Relation:
         """Reload the relation from the database. Return self in monad pattern."""
         pass
 
+    @classmethod
+    def reload_many(cls, relations: list[Relation]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database. Subclasses that support it load all of
+            them with a single query; otherwise, each relation is
+            reloaded individually. Empty relations are skipped.
+        """
+        for relation in relations:
+            try:
+                relation.reload()
+            except ValueError:
+                pass
+
     @abstractmethod
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
@@ -163,8 +205,8 @@ class Relation:
 
     def get_cache_key(self) -> str:
         """Returns the cache key for the Relation."""
-        return (f'{self.primary_class.__name__}_{self.__class__.__name__}'
-                     f'_{self.secondary_class.__name__}')
+        return (f'{self._primary_name}_{self.__class__.__name__}'
+                     f'_{self._secondary_name}')
 
     @abstractmethod
     def create_property(self) -> property:
@@ -177,6 +219,7 @@ class HasOne(Relation):
         primary.data[id_column] = secondary.data[foreign_id_column]. An
         owner model.
     """
+    __slots__ = ('foreign_id_column', 'secondary_wrapped')
     foreign_id_column: str
 
     def __init__(self, foreign_id_column: str, *args, **kwargs) -> None:
@@ -317,6 +360,31 @@ class HasOne(Relation):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    def reload_many(cls, relations: list[HasOne]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        id_column = first.primary_class.id_column
+        relations = _reset_loadable(relations, id_column)
+        if not relations:
+            return
+
+        primary_ids = list({r.primary.data[id_column] for r in relations})
+        secondary = {}
+        for item in first.secondary_class.query().is_in(
+            first.foreign_id_column, _pad_ids(primary_ids)
+        ).get():
+            secondary.setdefault(item.data[first.foreign_id_column], item)
+
+        for relation in relations:
+            relation._secondary = secondary.get(relation.primary.data[id_column], None)
+            relation._prefetched = True
+
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.primary_class.id_column in self.primary.data:
@@ -354,14 +422,23 @@ class HasOne(Relation):
             def __bool__(self) -> bool:
                 return len(self.data.keys()) > 0
 
-        HasOneWrapped.__name__ = f'(HasOne){self.secondary_class.__name__}'
+        HasOneWrapped.__name__ = f'(HasOne){self._secondary_name}'
 
         def setup_relation(self: ModelProtocol):
-            """Sets up the HasOne relation during instance initialization."""
+            """Sets up the HasOne relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: ModelProtocol) -> Relation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -373,39 +450,32 @@ class HasOne(Relation):
             """The secondary model instance. Setting raises TypeError if
                 the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
-
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            relation = self.relations[cache_key]
+            rel = get_relation(self)
 
-            if relation.secondary is None:
+            if rel.secondary is None and not rel._prefetched:
                 try:
-                    relation.reload()
+                    rel.reload()
                 except ValueError:
                     pass
 
-            if relation.secondary is None:
+            if rel.secondary is None:
                 empty = HasOneWrapped()
                 empty.relations = {}
-                empty.relations[cache_key] = relation
+                empty.relations[cache_key] = rel
                 return empty
 
-            if not hasattr(relation, 'secondary_wrapped') or \
-                relation.secondary_wrapped is None:
-                relation.secondary_wrapped = HasOneWrapped(
-                    relation.secondary
+            if not hasattr(rel, 'secondary_wrapped') or \
+                rel.secondary_wrapped is None:
+                rel.secondary_wrapped = HasOneWrapped(
+                    rel.secondary
                 )
 
-            model = relation.secondary_wrapped
-            if hasattr(relation.secondary, 'relations'):
+            model = rel.secondary_wrapped
+            if hasattr(rel.secondary, 'relations'):
                 if not hasattr(model, 'relations'):
                     model.relations = {}
                 if cache_key not in model.relations:
-                    model.relations[cache_key] = relation
+                    model.relations[cache_key] = rel
 
             return model
 
@@ -419,13 +489,15 @@ class HasOne(Relation):
             if not hasattr(model, 'relations'):
                 model.relations = {}
 
-            self.relations[cache_key].secondary = model
-            self.relations[cache_key].secondary_wrapped = HasOneWrapped(
+            rel = get_relation(self)
+            rel.secondary = model
+            rel.secondary_wrapped = HasOneWrapped(
                 model
             )
 
-            model.relations[cache_key] = self.relations[cache_key]
+            model.relations[cache_key] = rel
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -434,6 +506,7 @@ class HasMany(HasOne):
         models: model.data[foreign_id_column] = primary.data[id_column]
         instance of this class is set on the owner model.
     """
+    __slots__ = ()
     @property
     def secondary(self) -> Optional[tuple[ModelProtocol]]:
         """The secondary model instance. Setting raises TypeError if the
@@ -451,40 +524,52 @@ class HasMany(HasOne):
 
         if secondary is None:
             if secondary_is_set:
-                secondary_to_add_ids = (
-                    model.data[model.id_column]
+                secondary_to_add_ids = {
+                    model.data.get(model.id_column)
                     for model in self.secondary_to_add
-                )
-                secondary_to_remove_ids = (
-                    model.data[model.id_column]
+                }
+                secondary_to_remove_ids = {
+                    model.data.get(model.id_column)
                     for model in self.secondary_to_remove
-                )
+                }
+                pending_ids = set()
                 for item in self._secondary:
                     item_id = item.data[item.id_column]
                     if item_id in secondary_to_add_ids:
-                        self.secondary_to_add.remove(item)
+                        pending_ids.add(item_id)
                     elif item_id not in secondary_to_remove_ids:
                         self.secondary_to_remove.append(item)
+                if pending_ids:
+                    self.secondary_to_add = [
+                        model for model in self.secondary_to_add
+                        if model.data.get(model.id_column) not in pending_ids
+                    ]
             self._secondary = None
             return
 
-        self.multi_model_precondition(secondary)
-        secondary_list = []
-        for model in secondary:
-            self.secondary_model_precondition(model)
-            # deduplication without using sets to maintain order
-            if model not in secondary_list:
-                secondary_list.append(model)
-        secondary = tuple(secondary_list)
+        if type(secondary) in (list, tuple) and len(secondary) == 1 \
+            and isinstance(secondary[0], self.secondary_class):
+            # a single model needs no protocol check or deduplication
+            secondary = (secondary[0],)
+        else:
+            self.multi_model_precondition(secondary)
+            for model in secondary:
+                self.secondary_model_precondition(model)
+            # deduplicate while maintaining order
+            secondary = tuple(dict.fromkeys(secondary))
 
         if secondary_is_set:
+            current = set(self._secondary)
+            to_remove = set(self.secondary_to_remove)
             self.secondary_to_add = [
                 item for item in secondary
-                if item not in self.secondary_to_remove and item not in self._secondary
+                if item not in to_remove and item not in current
             ]
+            to_add = set(self.secondary_to_add)
+            new = set(secondary)
             self.secondary_to_remove += [
                 item for item in self._secondary
-                if item not in self.secondary_to_add and item not in secondary
+                if item not in to_add and item not in new
             ]
         else:
             self.secondary_to_add = secondary
@@ -499,8 +584,16 @@ class HasMany(HasOne):
         tressa(self.primary is not None, 'cannot save incomplete HasMany')
         tressa(self.secondary is not None, 'cannot save incomplete HasMany')
 
-        qb = self.secondary_class.query()
         owner_id = self.primary.data[self.primary_class.id_column]
+        if not self.has_pending_changes() and all(
+            model.data_original.get(self.secondary_class.id_column) is not None and
+            model.data_original.get(self.foreign_id_column) == owner_id
+            for model in self.secondary
+        ):
+            # the loaded secondaries are already owned in the database
+            return
+
+        qb = self.secondary_class.query()
         for model in self.secondary:
             if self.secondary_class.id_column not in model.data:
                 model.save()
@@ -511,24 +604,35 @@ class HasMany(HasOne):
         for model in self.secondary:
             model.data[self.foreign_id_column] = owner_id
 
-        if self.secondary_to_remove:
-            secondary_ids = [
-                item.data[self.secondary_class.id_column]
-                for item in self.secondary_to_remove
-                if item.data[self.foreign_id_column] == owner_id
-            ]
-            if secondary_ids:
-                qb.is_in(self.secondary_class.id_column, secondary_ids).update({
-                    self.foreign_id_column: None
-                })
-                qb = qb.reset()
-                for item in self.secondary_to_remove:
-                    if item.data[self.secondary_class.id_column] in secondary_ids:
-                        item.data[self.foreign_id_column] = None
-
-        qb.is_in(self.secondary_class.id_column, owned_ids).update({
-            self.foreign_id_column: owner_id
-        })
+        # run the updates in one transaction
+        with _transaction(qb):
+            if self.secondary_to_remove:
+                secondary_ids = [
+                    item.data[self.secondary_class.id_column]
+                    for item in self.secondary_to_remove
+                    if item.data[self.foreign_id_column] == owner_id
+                ]
+                if secondary_ids:
+                    qb.is_in(self.secondary_class.id_column, secondary_ids).update({
+                        self.foreign_id_column: None
+                    })
+                    qb = qb.reset()
+                    for item in self.secondary_to_remove:
+                        if item.data[self.secondary_class.id_column] in secondary_ids:
+                            item.data[self.foreign_id_column] = None
+                            item.data_original = MappingProxyType({
+                                **item.data_original, self.foreign_id_column: None
+                            })
+
+            qb.is_in(self.secondary_class.id_column, owned_ids).update({
+                self.foreign_id_column: owner_id
+            })
+
+        # the owner id is now stored for each secondary
+        for model in self.secondary:
+            model.data_original = MappingProxyType({
+                **model.data_original, self.foreign_id_column: owner_id
+            })
 
         self.primary_to_add = None
         self.primary_to_remove = None
@@ -556,6 +660,30 @@ class HasMany(HasOne):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    def reload_many(cls, relations: list[HasMany]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        id_column = first.primary_class.id_column
+        relations = _reset_loadable(relations, id_column)
+        if not relations:
+            return
+
+        primary_ids = list({r.primary.data[id_column] for r in relations})
+        secondary = {}
+        for item in first.secondary_class.query().is_in(
+            first.foreign_id_column, _pad_ids(primary_ids)
+        ).get():
+            secondary.setdefault(item.data[first.foreign_id_column], []).append(item)
+
+        for relation in relations:
+            relation._secondary = secondary.get(relation.primary.data[id_column], [])
+
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.primary_class.id_column in self.primary.data:
@@ -580,27 +708,40 @@ class HasMany(HasOne):
         cache_key = self.get_cache_key()
 
 
-        class HasManyTuple(tuple):
+        class HasManyTuple(_RelatedTuple):
             def __call__(self) -> HasMany:
                 return self.relation
 
-        HasManyTuple.__name__ = f'(HasMany){self.secondary_class.__name__}'
+        HasManyTuple.__name__ = f'(HasMany){self._secondary_name}'
 
         def setup_relation(self: ModelProtocol):
-            """Sets up the HasMany relation during instance initialization."""
+            """Sets up the HasMany relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self.__class__, 'id_relations'):
                 self.__class__.id_relations = {}
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
 
-            if self.id_column in self.data and self.data[self.id_column] is not None:
+        def get_relation(self: ModelProtocol) -> Relation:
+            """Returns the relation for the instance, creating it on
+                first use. Instances with the same id share a relation.
+            """
+            if self.relations.get(cache_key, None) is not None:
+                return self.relations[cache_key]
+
+            id_cache_key = None
+            if self.data.get(self.id_column, None) is not None:
                 id_cache_key = cache_key + ':' + self.data[self.id_column]
                 if id_cache_key in self.__class__.id_relations:
                     self.relations[cache_key] = self.__class__.id_relations[id_cache_key]
-                else:
-                    self.__class__.id_relations[id_cache_key] = self.relations[cache_key]
+                    return self.relations[cache_key]
+
+            self.relations[cache_key] = deepcopy(relation)
+            self.relations[cache_key].primary = self
+            if id_cache_key is not None:
+                self.__class__.id_relations[id_cache_key] = self.relations[cache_key]
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -612,27 +753,22 @@ class HasMany(HasOne):
             """The secondary model instances. Setting raises TypeError
                 if the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
+            rel = get_relation(self)
 
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    self.relations[cache_key].reload()
+                    rel.reload()
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = HasManyTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = HasManyTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = HasManyTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: ModelProtocol, models: Optional[list[ModelProtocol]]) -> None:
@@ -643,8 +779,10 @@ class HasMany(HasOne):
                  'models must be list[ModelProtocol] or tuple[ModelProtocol]')
             tert(all([isinstance(m, ModelProtocol) for m in models]),
                  'models must be list[ModelProtocol] or tuple[ModelProtocol]')
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -654,6 +792,7 @@ class BelongsTo(HasOne):
         Inverse of HasOne and HasMany. An instance of this class is set
         on the owned model.
     """
+    __slots__ = ()
     def save(self) -> None:
         """Persists the relation to the database. Raises UsageError if
             the relation is incomplete.
@@ -701,6 +840,38 @@ class BelongsTo(HasOne):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    def reload_many(cls, relations: list[BelongsTo]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        relations = _reset_loadable(relations, first.foreign_id_column)
+        if not relations:
+            return
+
+        secondary_ids = list({
+            r.primary.data[first.foreign_id_column] for r in relations
+            if r.primary.data[first.foreign_id_column] is not None
+        })
+        secondary = {}
+        if secondary_ids:
+            secondary = {
+                item.data[first.secondary_class.id_column]: item
+                for item in first.secondary_class.query().is_in(
+                    first.secondary_class.id_column, _pad_ids(secondary_ids)
+                ).get()
+            }
+
+        for relation in relations:
+            relation._secondary = secondary.get(
+                relation.primary.data[first.foreign_id_column], None
+            )
+            relation._prefetched = True
+
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.foreign_id_column in self.primary.data:
@@ -730,18 +901,27 @@ class BelongsTo(HasOne):
                 self.data = original.data if original else {}
                 self.data_original = MappingProxyType({**self.data})
             def __call__(self) -> Relation:
-                return self.relations[f'{cache_key}']
+                return self.relations[cache_key]
             def __bool__(self) -> bool:
                 return len(self.data.keys()) > 0
 
-        BelongsToWrapped.__name__ = f'(BelongsTo){self.secondary_class.__name__}'
+        BelongsToWrapped.__name__ = f'(BelongsTo){self._secondary_name}'
 
         def setup_relation(self: ModelProtocol):
-            """Sets up the BelongsTo relation during instance initialization."""
+            """Sets up the BelongsTo relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: ModelProtocol) -> Relation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -753,37 +933,32 @@ class BelongsTo(HasOne):
             """The secondary model instance. Setting raises TypeError if
                 the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
-
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
+            rel = get_relation(self)
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None and not rel._prefetched:
                 try:
-                    self.relations[cache_key].reload()
+                    rel.reload()
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 empty = BelongsToWrapped()
                 empty.relations = {}
-                empty.relations[f'{cache_key}'] = self.relations[cache_key]
+                empty.relations[cache_key] = rel
                 return empty
 
-            if not hasattr(self.relations[cache_key], 'secondary_wrapped') or \
-                self.relations[cache_key].secondary_wrapped is None:
-                self.relations[cache_key].secondary_wrapped = BelongsToWrapped(
-                    self.relations[cache_key].secondary
+            if not hasattr(rel, 'secondary_wrapped') or \
+                rel.secondary_wrapped is None:
+                rel.secondary_wrapped = BelongsToWrapped(
+                    rel.secondary
                 )
 
-            model = self.relations[cache_key].secondary_wrapped
-            if hasattr(self.relations[cache_key].secondary, 'relations'):
+            model = rel.secondary_wrapped
+            if hasattr(rel.secondary, 'relations'):
                 if not hasattr(model, 'relations'):
                     model.relations = {}
                 if cache_key not in model.relations:
-                    model.relations[cache_key] = self.relations[cache_key]
+                    model.relations[cache_key] = rel
             return model
 
         @secondary.setter
@@ -793,11 +968,13 @@ class BelongsTo(HasOne):
             if not hasattr(model, 'relations'):
                 model.relations = {}
 
-            self.relations[cache_key].secondary = model
-            self.relations[cache_key].secondary_wrapped = BelongsToWrapped(
+            rel = get_relation(self)
+            rel.secondary = model
+            rel.secondary_wrapped = BelongsToWrapped(
                 model
             )
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -806,6 +983,10 @@ class BelongsToMany(Relation):
         and each secondary can have many primary; e.g. users and roles,
         or roles and permissions. This requires the use of a pivot.
     """
+    __slots__ = (
+        '_pivot', 'primary_id_column', 'secondary_id_column',
+        'secondary_wrapped',
+    )
     pivot: Type[ModelProtocol]
     primary_id_column: str
     secondary_id_column: str
@@ -844,45 +1025,54 @@ class BelongsToMany(Relation):
             self._secondary = None
             return
 
-        self.multi_model_precondition(secondary)
-        secondary_list = []
-        for model in secondary:
-            tert(isinstance(model, self.secondary_class),
-                 f'secondary must be instance of {self.secondary_class.__name__}')
-            # deduplication without using sets to maintain order
-            if model not in secondary_list:
-                secondary_list.append(model)
-        secondary = tuple(secondary_list)
+        if type(secondary) in (list, tuple) and len(secondary) == 1 \
+            and isinstance(secondary[0], self.secondary_class):
+            # a single model needs no protocol check or deduplication
+            secondary = (secondary[0],)
+        else:
+            self.multi_model_precondition(secondary)
+            for model in secondary:
+                tert(isinstance(model, self.secondary_class),
+                     f'secondary must be instance of {self._secondary_name}')
+            # deduplicate while maintaining order
+            secondary = tuple(dict.fromkeys(secondary))
 
         if not self._secondary:
             self._secondary = secondary
             self.secondary_to_add = secondary
             return
 
-        for item in self._secondary:
-            if item not in secondary and item not in self.secondary_to_add:
-                self.secondary_to_remove.append(item)
-            if item in self.secondary_to_add:
-                self.secondary_to_add.remove(item)
+        new = set(secondary)
+        to_add = set(self.secondary_to_add)
+        self.secondary_to_remove.extend(
+            item for item in self._secondary
+            if item not in new and item not in to_add
+        )
+        self.secondary_to_add = [
+            item for item in self.secondary_to_add
+            if item in new
+        ]
 
+        secondary_ids = {
+            model.data[model.id_column]
+            for model in self._secondary
+        }
+        secondary_to_remove_ids = {
+            model.data[model.id_column]
+            for model in self.secondary_to_remove
+        }
+        new_ids = set()
         for item in secondary:
             item_id = item.data[item.id_column]
-            secondary_ids = (
-                model.data[model.id_column]
-                for model in self._secondary
-            )
-            secondary_to_remove_ids = (
-                model.data[model.id_column]
-                for model in self.secondary_to_remove
-            )
-
+            new_ids.add(item_id)
             if item_id not in secondary_ids and item_id not in secondary_to_remove_ids:
                 self.secondary_to_add.append(item)
-            if item_id in secondary_to_remove_ids:
-                self.secondary_to_remove = [
-                    model for model in self.secondary_to_remove
-                    if model.data[model.id_column] != item_id
-                ]
+
+        if secondary_to_remove_ids & new_ids:
+            self.secondary_to_remove = [
+                model for model in self.secondary_to_remove
+                if model.data[model.id_column] not in new_ids
+            ]
 
         self._secondary = tuple(secondary)
 
@@ -923,45 +1113,58 @@ class BelongsToMany(Relation):
             (self.primary or self.primary_to_add) is not None
         must_add_primary = self.primary_to_add is not None
 
-        if must_remove_secondary:
-            query_builder.is_in(
-                self.secondary_id_column,
-                secondary_ids_to_remove
-            ).is_in(
-                self.primary_id_column,
-                primary_ids_for_delete
-            ).delete()
-
-        if must_remove_primary:
-            primary_to_remove_id = self.primary_to_remove.data[self.primary_class.id_column]
-            query_builder.reset().equal(
-                self.primary_id_column,
-                primary_to_remove_id
-            ).is_in(
-                self.secondary_id_column,
-                secondary_ids_to_remove + [
-                    secondary.data[secondary.id_column] for secondary in self.secondary
-                ]
-            ).delete()
+        # run the pivot queries in one transaction
+        with _transaction(query_builder):
+            if must_remove_secondary:
+                query_builder.is_in(
+                    self.secondary_id_column,
+                    secondary_ids_to_remove
+                ).is_in(
+                    self.primary_id_column,
+                    primary_ids_for_delete
+                ).delete()
+
+            if must_remove_primary:
+                primary_to_remove_id = self.primary_to_remove.data[self.primary_class.id_column]
+                query_builder.reset().equal(
+                    self.primary_id_column,
+                    primary_to_remove_id
+                ).is_in(
+                    self.secondary_id_column,
+                    secondary_ids_to_remove + [
+                        secondary.data[secondary.id_column] for secondary in self.secondary
+                    ]
+                ).delete()
 
-        if must_add_primary or must_add_secondary:
-            primary_id = self._primary.data[self.primary_class.id_column]
-            already_exists = query_builder.reset().equal(
-                self.primary_id_column,
-                primary_id
-            ).get()
-            already_added_ids = [
-                item.data[self.secondary_class.id_column]
-                for item in already_exists
-            ]
-            self.pivot.insert_many([
-                {
-                    self.primary_id_column: primary_id,
-                    self.secondary_id_column: item.data[item.id_column]
-                }
-                for item in self.secondary
-                if item.data[self.secondary_class.id_column] not in already_added_ids
-            ])
+            if must_add_primary or must_add_secondary:
+                primary_id = self._primary.data[self.primary_class.id_column]
+                secondary_ids = [
+                    item.data[self.secondary_class.id_column]
+                    for item in self.secondary
+                ]
+                already_added_ids = set()
+                if secondary_ids:
+                    already_exists = query_builder.reset().equal(
+                        self.primary_id_column,
+                        primary_id
+                    ).is_in(
+                        self.secondary_id_column,
+                        secondary_ids
+                    ).get()
+                    already_added_ids = {
+                        item.data[self.secondary_id_column]
+                        for item in already_exists
+                    }
+                items = [
+                    {
+                        self.primary_id_column: primary_id,
+                        self.secondary_id_column: secondary_id
+                    }
+                    for secondary_id in secondary_ids
+                    if secondary_id not in already_added_ids
+                ]
+                if items:
+                    self.pivot.insert_many(items)
 
         self.primary_to_add = None
         self.primary_to_remove = None
@@ -977,13 +1180,25 @@ class BelongsToMany(Relation):
 
         if self.primary and self.primary_class.id_column in self.primary.data:
             primary_id = self.primary.data[self.primary.id_column]
-            pivots = self.pivot.query({
-                self.primary_id_column: primary_id
-            }).get()
-            self._secondary = self.secondary_class.query().is_in(
-                self.secondary_class.id_column,
-                [pivot.data[self.secondary_id_column] for pivot in pivots]
-            ).get()
+            secondary_table = self.secondary_class.table
+            joined = self.secondary_class.query().join(
+                self.pivot,
+                [self.secondary_class.id_column, self.secondary_id_column]
+            ).equal(
+                f'{self.pivot.table}.{self.primary_id_column}',
+                primary_id
+            ).select([
+                f'{secondary_table}.{column}'
+                for column in self.secondary_class.columns
+            ]).get()
+            # deduplicate by id in case of repeated pivots
+            secondary = {}
+            for item in joined:
+                data = item.data[secondary_table]
+                if data[self.secondary_class.id_column] not in secondary:
+                    secondary[data[self.secondary_class.id_column]] = \
+                        self.secondary_class(data)
+            self._secondary = list(secondary.values())
             return self
 
         if self.secondary and len(self.secondary):
@@ -996,15 +1211,12 @@ class BelongsToMany(Relation):
                 [secondary.data[secondary.id_column] for secondary in self.secondary]
             ).order_by(self.primary_id_column).get()
 
-            primary_ids = [pivot.data[self.primary_id_column] for pivot in pivots]
-            unique_ids = tuple(set(primary_ids))
+            pivot_counts = Counter(
+                pivot.data[self.primary_id_column] for pivot in pivots
+            )
 
-            for primary_id in unique_ids:
-                subset = [
-                    pivot for pivot in pivots
-                    if pivot.data[self.primary_id_column] == primary_id
-                ]
-                if len(subset) == len(self.secondary):
+            for primary_id, count in pivot_counts.items():
+                if count == len(self.secondary):
                     self._primary = self.primary_class.find(primary_id)
                     return self
 
@@ -1012,6 +1224,48 @@ class BelongsToMany(Relation):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    def reload_many(cls, relations: list[BelongsToMany]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single join query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        id_column = first.primary_class.id_column
+        relations = _reset_loadable(relations, id_column)
+        if not relations:
+            return
+
+        primary_ids = list({r.primary.data[id_column] for r in relations})
+        secondary_table = first.secondary_class.table
+        secondary_id_column = first.secondary_class.id_column
+        pivot_column = f'{first.pivot.table}.{first.primary_id_column}'
+        joined = first.secondary_class.query().join(
+            first.pivot,
+            [secondary_id_column, first.secondary_id_column]
+        ).is_in(
+            pivot_column,
+            _pad_ids(primary_ids)
+        ).select([
+            f'{secondary_table}.{column}'
+            for column in first.secondary_class.columns
+        ] + [pivot_column]).get()
+        # group by primary id and deduplicate by secondary id
+        secondary = {}
+        for item in joined:
+            primary_id = item.data[first.pivot.table][first.primary_id_column]
+            data = item.data[secondary_table]
+            models = secondary.setdefault(primary_id, {})
+            if data[secondary_id_column] not in models:
+                models[data[secondary_id_column]] = first.secondary_class(data)
+
+        for relation in relations:
+            relation._secondary = list(
+                secondary.get(relation.primary.data[id_column], {}).values()
+            )
+
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation. This will
             return the query for a join between the pivot and the
@@ -1042,18 +1296,27 @@ class BelongsToMany(Relation):
         cache_key = self.get_cache_key()
 
 
-        class BelongsToManyTuple(tuple):
+        class BelongsToManyTuple(_RelatedTuple):
             def __call__(self) -> BelongsToMany:
                 return self.relation
 
-        BelongsToManyTuple.__name__ = f'(BelongsToMany){self.secondary_class.__name__}'
+        BelongsToManyTuple.__name__ = f'(BelongsToMany){self._secondary_name}'
 
         def setup_relation(self: ModelProtocol):
-            """Sets up the BelongsToMany relation during instance initialization."""
+            """Sets up the BelongsToMany relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: ModelProtocol) -> Relation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -1065,35 +1328,32 @@ class BelongsToMany(Relation):
             """The secondary model instances. Setting raises TypeError
                 if a precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
+            rel = get_relation(self)
 
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    self.relations[cache_key].reload()
+                    rel.reload()
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = BelongsToManyTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = BelongsToManyTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = BelongsToManyTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: ModelProtocol, models: Optional[list[ModelProtocol]]) -> None:
             """Sets the secondary model instances. Raises TypeError if
                 the precondition check fails.
             """
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -1105,6 +1365,7 @@ class Contains(HasMany):
         HashedModel or something similar. IDs are sorted for
         deterministic hashing via HashedModel.
     """
+    __slots__ = ()
     secondary: tuple[ModelProtocol]
     _secondary: tuple[ModelProtocol]
 
@@ -1150,7 +1411,7 @@ class Contains(HasMany):
         if self.primary and self.foreign_id_column in self.primary.data:
             secondary_ids = self.primary.data[self.foreign_id_column].split(',')
             self._secondary = self.secondary_class.query().is_in(
-                self.secondary_class.id_column, secondary_ids).get()
+                self.secondary_class.id_column, _pad_ids(secondary_ids)).get()
             return self
 
         if self.secondary and all([
@@ -1167,6 +1428,40 @@ class Contains(HasMany):
 
         raise ValueError('cannot reload an empty relation')
 
+    @classmethod
+    def reload_many(cls, relations: list[Contains]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database, loading the secondaries of all relations
+            with a primary in a single query.
+        """
+        if not relations:
+            return
+        first = relations[0]
+        relations = _reset_loadable(relations, first.foreign_id_column)
+        if not relations:
+            return
+
+        secondary_ids = {
+            relation: [
+                i for i in
+                (relation.primary.data[first.foreign_id_column] or '').split(',')
+                if i
+            ]
+            for relation in relations
+        }
+        all_ids = list({i for ids in secondary_ids.values() for i in ids})
+        secondary = {}
+        if all_ids:
+            secondary = {
+                item.data[first.secondary_class.id_column]: item
+                for item in first.secondary_class.query().is_in(
+                    first.secondary_class.id_column, _pad_ids(all_ids)
+                ).get()
+            }
+
+        for relation, ids in secondary_ids.items():
+            relation._secondary = [secondary[i] for i in ids if i in secondary]
+
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation."""
         if self.primary and self.foreign_id_column in self.primary.data:
@@ -1195,18 +1490,27 @@ class Contains(HasMany):
         cache_key = self.get_cache_key()
 
 
-        class ContainsTuple(tuple):
+        class ContainsTuple(_RelatedTuple):
             def __call__(self) -> Contains:
                 return self.relation
 
-        ContainsTuple.__name__ = f'(Contains){self.secondary_class.__name__}'
+        ContainsTuple.__name__ = f'(Contains){self._secondary_name}'
 
         def setup_relation(self: ModelProtocol):
-            """Sets up the Contains relation during instance initialization."""
+            """Sets up the Contains relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: ModelProtocol) -> Relation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -1218,33 +1522,30 @@ class Contains(HasMany):
             """The secondary model instances. Setting raises TypeError
                 if the precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
+            rel = get_relation(self)
 
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    self.relations[cache_key].reload()
+                    rel.reload()
                 except ValueError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = ContainsTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = ContainsTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = ContainsTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: ModelProtocol, models: Optional[list[ModelProtocol]]) -> None:
             """Sets the secondary model instances."""
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
@@ -1256,6 +1557,7 @@ class Within(HasMany):
         similar. IDs are sorted for deterministic hashing via
         HashedModel.
     """
+    __slots__ = ()
     secondary: tuple[ModelProtocol]
 
     def save(self) -> None:
@@ -1268,22 +1570,25 @@ class Within(HasMany):
         if self.primary.data[self.primary_class.id_column] is None:
             self.primary.save()
 
+        primary_id = self.primary.data[self.primary_class.id_column]
+        remove_id = None
+        if self.primary_to_remove is not None:
+            remove_id = self.primary_to_remove.data.get(self.primary_class.id_column, None)
+
+        # models added since the last reload or save may not exist yet
+        added = {id(s) for s in self.secondary_to_add}
+
         for s in self.secondary:
-            ids = s.data.get(self.foreign_id_column, '')
-            ids: list = ids.split(',')
-            if self.primary.data[self.primary_class.id_column] not in ids:
-                ids.append(self.primary.data[self.primary_class.id_column])
-
-            if self.primary_to_remove is not None and \
-            self.primary_class.id_column in self.primary_to_remove.data:
-                if self.primary_to_remove.data[self.primary_class.id_column] in ids:
-                    ids.remove(self.primary_to_remove.data.get(
-                        self.primary_class.id_column, None
-                    ))
-
-            ids.sort()
-            s.data[self.foreign_id_column] = ",".join(ids)
-            s.save()
+            ids = set(s.data.get(self.foreign_id_column, '').split(','))
+            ids.add(primary_id)
+            if remove_id is not None:
+                ids.discard(remove_id)
+
+            s.data[self.foreign_id_column] = ",".join(sorted(ids))
+            # skip secondaries that are persisted and unchanged
+            if id(s) in added or s.data.get(s.id_column, None) is None or \
+                s.data != s.data_original:
+                s.save()
 
         self.primary_to_add = None
         self.primary_to_remove = None
@@ -1304,6 +1609,20 @@ class Within(HasMany):
         ).get())
         return self
 
+    @classmethod
+    def reload_many(cls, relations: list[Within]) -> None:
+        """Reload multiple relations that share the same configuration
+            from the database. Each relation is reloaded individually,
+            since the foreign_id_column holds a list of ids that cannot
+            be matched with a single is_in query. Empty relations are
+            skipped.
+        """
+        for relation in relations:
+            try:
+                relation.reload()
+            except ValueError:
+                pass
+
     def query(self) -> QueryBuilderProtocol|None:
         """Creates the base query for the underlying relation (i.e. to
             query the secondary class).
@@ -1323,18 +1642,27 @@ class Within(HasMany):
         cache_key = self.get_cache_key()
 
 
-        class WithinTuple(tuple):
+        class WithinTuple(_RelatedTuple):
             def __call__(self) -> Within:
                 return self.relation
 
-        WithinTuple.__name__ = f'(Within){self.secondary_class.__name__}'
+        WithinTuple.__name__ = f'(Within){self._secondary_name}'
 
         def setup_relation(self: ModelProtocol):
-            """Sets up the Within relation during instance initialization."""
+            """Sets up the Within relation during instance initialization.
+                The relation itself is created on first use.
+            """
             if not hasattr(self, 'relations'):
                 self.relations = {}
-            self.relations[cache_key] = deepcopy(relation)
-            self.relations[cache_key].primary = self
+
+        def get_relation(self: ModelProtocol) -> Relation:
+            """Returns the relation for the instance, creating it on
+                first use.
+            """
+            if self.relations.get(cache_key, None) is None:
+                self.relations[cache_key] = deepcopy(relation)
+                self.relations[cache_key].primary = self
+            return self.relations[cache_key]
 
         if not hasattr(self.primary_class, '_post_init_hooks'):
             self.primary_class._post_init_hooks = {}
@@ -1346,41 +1674,105 @@ class Within(HasMany):
             """The secondary model instances. Setting raises TypeError
                 if a precondition check fails.
             """
-            if cache_key not in self.relations or \
-                self.relations[cache_key] is None:
+            rel = get_relation(self)
 
-                if cache_key not in self.relations or self.relations[cache_key] is None:
-                    self.relations[cache_key] = deepcopy(relation)
-                    self.relations[cache_key].primary = self
-
-            if self.relations[cache_key].secondary is None:
+            if rel.secondary is None:
                 try:
-                    self.relations[cache_key].reload()
+                    rel.reload()
                 except ValueError:
                     pass
                 except KeyError:
                     pass
 
-            if self.relations[cache_key].secondary is None:
-                empty = WithinTuple()
-                empty.relation = self.relations[cache_key]
-                return empty
-
-            models = WithinTuple(self.relations[cache_key].secondary)
-            models.relation = self.relations[cache_key]
-            return models
+            # rebuild the tuple only when the secondary models change
+            wrapped = getattr(rel, 'secondary_wrapped', None)
+            if wrapped is None or wrapped.source is not rel.secondary:
+                wrapped = WithinTuple(rel.secondary or ())
+                wrapped.relation = rel
+                wrapped.source = rel.secondary
+                rel.secondary_wrapped = wrapped
+            return wrapped
 
         @secondary.setter
         def secondary(self: ModelProtocol, models: Optional[list[ModelProtocol]]) -> None:
             """Sets the secondary model instances. Raises TypeError if
                 the precondition check fails.
             """
-            self.relations[cache_key].secondary = models
+            rel = get_relation(self)
+            rel.secondary = models
 
+        _relation_getters[secondary.fget] = get_relation
         return secondary
 
 
+class _RelatedTuple(tuple):
+    """Tuple of related models with a faster membership check."""
+    def __contains__(self, item: Any) -> bool:
+        """Checks identity with a cached set first, then compares only
+            the models with the same id as item, since comparing models
+            packs both of them.
+        """
+        identities = self.__dict__.get('_identities', None)
+        if identities is None:
+            identities = self._identities = {id(model) for model in self}
+        if id(item) in identities:
+            return True
+        if not isinstance(getattr(item, 'data', None), dict) or \
+            not hasattr(item, 'id_column'):
+            return tuple.__contains__(self, item)
+        item_id = item.data.get(item.id_column, None)
+        return any(
+            model.data.get(model.id_column, None) == item_id and model == item
+            for model in self
+        )
+
+
+def _pad_ids(ids: list) -> list:
+    """Pads a non-empty list of ids for an is_in clause to the next
+        power of two by repeating the last id, so that batches of
+        different sizes share a few distinct SQL statements.
+    """
+    size = 1 << (len(ids) - 1).bit_length()
+    return ids + [ids[-1]] * (size - len(ids))
+
+
+def _reset_loadable(relations: list[Relation], column: str) -> list[Relation]:
+    """Reloads the relations whose primary lacks the column one at a
+        time, skipping empty ones, and returns the others after
+        resetting their change tracking properties.
+    """
+    loadable = []
+    for relation in relations:
+        if relation.primary and column in relation.primary.data:
+            relation.primary_to_add = None
+            relation.primary_to_remove = None
+            relation.secondary_to_add = []
+            relation.secondary_to_remove = []
+            loadable.append(relation)
+            continue
+        try:
+            relation.reload()
+        except ValueError:
+            # empty relations are left unloaded, as on first access
+            pass
+    return loadable
+
+def _transaction(query_builder: QueryBuilderProtocol):
+    """Returns a transaction for the query builder if it uses
+        SqliteContext; otherwise, returns a null context.
+    """
+    context_manager = getattr(query_builder, 'context_manager', None)
+    if isinstance(context_manager, type) and \
+        issubclass(context_manager, SqliteContext):
+        return transaction(query_builder.connection_info)
+    return nullcontext()
+
+
 def _get_id_column(cls: Type[ModelProtocol]) -> str:
+    """Returns the default foreign id column for cls, derived from its
+        current __name__. Relations store the column when they are
+        created, so renaming the class afterwards does not affect them.
+    """
     return _pascalcase_to_snake_case(cls.__name__) + f'_{cls.id_column}'
 
 def has_one(cls: Type[ModelProtocol], owned_model: Type[ModelProtocol],
@@ -1489,3 +1881,42 @@ def within(cls: Type[ModelProtocol], other_model: Type[ModelProtocol],
     prop.__doc__ = f'The related {other_model.__name__}s. Setting raises ' +\
         'TypeError if the precondition check fails.'
     return prop
+
+def _relation_getter(cls: Type[ModelProtocol], name: str) -> Callable:
+    """Returns the function that returns the relation of an instance of
+        cls for the related property called name. Raises TypeError if
+        name is not a related property of cls.
+    """
+    prop = getattr(cls, name, None)
+    getter = None
+    if isinstance(prop, property) and prop.fget is not None:
+        getter = _relation_getters.get(prop.fget, None)
+    tert(getter is not None, f'{name} must be a related property')
+    return getter
+
+def relation_of(model: ModelProtocol, name: str) -> Relation:
+    """Returns the relation behind the related property called name on
+        the model, creating it on first use. Raises TypeError if name is
+        not a related property of the model.
+    """
+    return _relation_getter(type(model), name)(model)
+
+def prefetch(models: list[ModelProtocol], name: str) -> list[ModelProtocol]:
+    """Loads the related property called name for all the models at
+        once, using a single query for each supported relation type
+        instead of one query per model on first access. Returns the
+        models. Raises TypeError if name is not a related property of
+        the models.
+    """
+    tert(type(models) in (list, tuple), 'models must be list[ModelProtocol]')
+    if not models:
+        return models
+    get_relation = _relation_getter(type(models[0]), name)
+    # instances with the same id can share a relation
+    relations = {}
+    for model in models:
+        relation = get_relation(model)
+        relations[id(relation)] = relation
+    relations = list(relations.values())
+    type(relations[0]).reload_many(relations)
+    return models
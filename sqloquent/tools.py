@@ -3,6 +3,7 @@ from .errors import tert, vert, tressa
 from .interfaces import MigrationProtocol, ModelProtocol
 from .migration import Migration, Table
 from datetime import datetime
+from functools import lru_cache
 from genericpath import isdir, isfile
 from os import listdir, environ
 from sys import argv
@@ -21,6 +22,7 @@ def _import(path: str) -> ModuleType:
     spec.loader.exec_module(module)
     return module
 
+@lru_cache(maxsize=256)
 def _pascalcase_to_snake_case(name: str) -> str:
     """Simple function to turn PascalCase to snake_case.
         Borrowed from https://stackoverflow.com/a/1176023
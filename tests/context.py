@@ -1,5 +1,7 @@
+import asyncio
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import sqloquent
@@ -16,4 +18,49 @@ from sqloquent.asyncql import (
     classes as async_classes,
     interfaces as async_interfaces,
     relations as async_relations,
-)
\ No newline at end of file
+)
+
+# keep the test databases on a RAM-backed filesystem when one is available
+DB_DIR = os.environ.get('SQLOQUENT_TEST_DB_DIR') or (
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+)
+
+def db_path(name: str) -> str:
+    """Returns a path in DB_DIR that is unique to this test process, so
+        that parallel test workers do not share database files or
+        migration directories.
+    """
+    return os.path.join(DB_DIR, f'sqloquent_{name}_{os.getpid()}')
+
+
+try:
+    # uvloop loops are created directly instead of through the global
+    # policy, which nest_asyncio (used by sqloquent.asyncql) cannot patch
+    from uvloop import new_event_loop, run as _uvloop_run
+except ImportError:
+    new_event_loop = None
+
+_runner = None
+
+def run(coro):
+    """Runs the coroutine to completion. Reuses one event loop for every
+        run call until close_event_loop is called, where asyncio.Runner
+        is available.
+    """
+    global _runner
+    if not hasattr(asyncio, 'Runner'):
+        if new_event_loop is not None:
+            return _uvloop_run(coro)
+        return asyncio.run(coro)
+    if _runner is None:
+        _runner = asyncio.Runner(loop_factory=new_event_loop)
+    return _runner.run(coro)
+
+def close_event_loop() -> None:
+    """Closes the event loop reused by run, if any. Call this from the
+        tearDownModule of each async test module.
+    """
+    global _runner
+    if _runner is not None:
+        _runner.close()
+        _runner = None
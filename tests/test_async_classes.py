@@ -1,16 +1,68 @@
-from asyncio import run
 from secrets import token_bytes
-from context import async_classes, errors, async_interfaces, interfaces
-from genericpath import isfile
+from context import (
+    async_classes, errors, async_interfaces, interfaces, db_path, run,
+    close_event_loop,
+)
+from contextlib import nullcontext
 from hashlib import sha256
+from pathlib import Path
 from types import AsyncGeneratorType
 import aiosqlite
+import asyncio
 import os
 import packify
+import shutil
+import sqlite3
 import unittest
 
+def tearDownModule():
+    close_event_loop()
+
+
+DB_FILEPATH = db_path('async_classes') + '.db'
+TEMPLATE_DB_FILEPATH = db_path('async_classes') + '_template.db'
+
+EXAMPLE_COLUMNS = '''
+    id text,
+    field1 text, field2 integer, field3 boolean, field4 blob,
+    field5 real, field1n text nullable, field2n integer nullable,
+    field3n boolean nullable, field4n blob nullable, field5n real nullable,
+    field1d text default 'foobar', field2d integer default 123,
+    field3d boolean default true, field4d blob default (x'313233'),
+    field5d real default 1.23, field1nd text nullable default 'foobar',
+    field2nd integer nullable default 123, field3nd boolean nullable default true,
+    field4nd blob nullable default (x'313233'), field5nd real nullable default 1.23
+'''
+
+SCHEMA = f'''
+    create table deleted_records (id text not null,
+        model_class text not null, record_id text not null,
+        record blob not null, timestamp text not null);
+    create table example (id text, name text);
+    create table hashed_records (id text, details text);
+    create table hashed_subclass (id text, column1 text, column2 text);
+    create table attachments (id text,
+        related_model text, related_id text, details blob);
+    create table example_models ({EXAMPLE_COLUMNS});
+    create table example_hashed_models ({EXAMPLE_COLUMNS});
+'''
+
+# values and their expected encode_value outputs
+ENCODE_VALUE_CASES = [
+    (value, packify.pack(value).hex())
+    for value in (
+        b'123',
+        [b'123', b'321'],
+        (b'123', b'321'),
+        {b'123': b'321', 1: '123'},
+    )
+]
 
-DB_FILEPATH = 'test.db'
+DEFAULT_STR = async_classes.Default['foobar']
+DEFAULT_INT = async_classes.Default[123]
+DEFAULT_BOOL = async_classes.Default[True]
+DEFAULT_BYTES = async_classes.Default[b'123']
+DEFAULT_FLOAT = async_classes.Default[1.23]
 
 
 class ExampleModel(async_classes.AsyncSqlModel):
@@ -32,16 +84,16 @@ class ExampleModel(async_classes.AsyncSqlModel):
     field3n: bool|None
     field4n: bytes|None
     field5n: float|None
-    field1d: str|async_classes.Default['foobar']
-    field2d: int|async_classes.Default[123]
-    field3d: bool|async_classes.Default[True]
-    field4d: bytes|async_classes.Default[b'123']
-    field5d: float|async_classes.Default[1.23]
-    field1nd: str|None|async_classes.Default['foobar']
-    field2nd: int|None|async_classes.Default[123]
-    field3nd: bool|None|async_classes.Default[True]
-    field4nd: bytes|None|async_classes.Default[b'123']
-    field5nd: float|None|async_classes.Default[1.23]
+    field1d: str|DEFAULT_STR
+    field2d: int|DEFAULT_INT
+    field3d: bool|DEFAULT_BOOL
+    field4d: bytes|DEFAULT_BYTES
+    field5d: float|DEFAULT_FLOAT
+    field1nd: str|None|DEFAULT_STR
+    field2nd: int|None|DEFAULT_INT
+    field3nd: bool|None|DEFAULT_BOOL
+    field4nd: bytes|None|DEFAULT_BYTES
+    field5nd: float|None|DEFAULT_FLOAT
 
 class ExampleHashedModel(async_classes.AsyncHashedModel):
     connection_info = DB_FILEPATH
@@ -62,16 +114,16 @@ class ExampleHashedModel(async_classes.AsyncHashedModel):
     field3n: bool|None
     field4n: bytes|None
     field5n: float|None
-    field1d: str|async_classes.Default['foobar']
-    field2d: int|async_classes.Default[123]
-    field3d: bool|async_classes.Default[True]
-    field4d: bytes|async_classes.Default[b'123']
-    field5d: float|async_classes.Default[1.23]
-    field1nd: str|None|async_classes.Default['foobar']
-    field2nd: int|None|async_classes.Default[123]
-    field3nd: bool|None|async_classes.Default[True]
-    field4nd: bytes|None|async_classes.Default[b'123']
-    field5nd: float|None|async_classes.Default[1.23]
+    field1d: str|DEFAULT_STR
+    field2d: int|DEFAULT_INT
+    field3d: bool|DEFAULT_BOOL
+    field4d: bytes|DEFAULT_BYTES
+    field5d: float|DEFAULT_FLOAT
+    field1nd: str|None|DEFAULT_STR
+    field2nd: int|None|DEFAULT_INT
+    field3nd: bool|None|DEFAULT_BOOL
+    field4nd: bytes|None|DEFAULT_BYTES
+    field5nd: float|None|DEFAULT_FLOAT
 
 
 async def connect(path):
@@ -82,72 +134,62 @@ class TestAsyncClasses(unittest.TestCase):
     db: aiosqlite.Connection = None
     cursor: aiosqlite.Cursor = None
 
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Couple these models to db_filepath for testing purposes and
+            build the schema once into a template database. The
+            template is put in WAL mode, which persists in the copy
+            each test uses, so commits append to the log instead of
+            rewriting a rollback journal.
+        """
+        cls.models = (
+            async_classes.AsyncSqlModel, async_classes.AsyncDeletedModel,
+            async_classes.AsyncHashedModel, async_classes.AsyncAttachment,
+        )
+        cls.original_connection_info = {
+            model: model.__dict__.get('connection_info', None)
+            for model in cls.models
+        }
+        for model in cls.models:
+            model.connection_info = DB_FILEPATH
+
+        Path(TEMPLATE_DB_FILEPATH).unlink(missing_ok=True)
+        db = run(connect(TEMPLATE_DB_FILEPATH))
+        run(db.execute('pragma journal_mode=wal'))
+        run(db.executescript(SCHEMA))
+        run(db.commit())
+        run(db.close())
+        return super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Delete the template database and restore the models'
+            original connection_info.
+        """
+        Path(TEMPLATE_DB_FILEPATH).unlink(missing_ok=True)
+        for model, connection_info in cls.original_connection_info.items():
+            if connection_info is None:
+                del model.connection_info
+            else:
+                model.connection_info = connection_info
+        return super().tearDownClass()
+
     def setUp(self) -> None:
-        """Set up the test database."""
-        try:
-            if isfile(DB_FILEPATH):
-                os.remove(DB_FILEPATH)
-        except:
-            ...
+        """Set up the test database from the template."""
+        shutil.copyfile(TEMPLATE_DB_FILEPATH, DB_FILEPATH)
         self.db = run(connect(DB_FILEPATH))
         self.cursor = run(self.db.cursor())
-        run(self.cursor.execute('create table deleted_records (id text not null, ' +
-            'model_class text not null, record_id text not null, ' +
-            'record blob not null, timestamp text not null)'))
-        run(self.cursor.execute('create table example (id text, name text)'))
-        run(self.cursor.execute('create table hashed_records (id text, details text)'))
-        run(self.cursor.execute('create table hashed_subclass (id text, column1 text, column2 text)'))
-        run(self.cursor.execute('create table attachments (id text, ' +
-            'related_model text, related_id text, details blob)'))
-        run(self.cursor.execute('create table example_models (id text, ' +
-            'field1 text, field2 integer, field3 boolean, field4 blob, ' +
-            'field5 real, field1n text nullable, field2n integer nullable, ' +
-            'field3n boolean nullable, field4n blob nullable, field5n real nullable, ' +
-            "field1d text default 'foobar', field2d integer default 123, " +
-            "field3d boolean default true, field4d blob default (x'313233'), " +
-            'field5d real default 1.23, field1nd text nullable default ''foobar'', ' +
-            'field2nd integer nullable default 123, field3nd boolean nullable default true, ' +
-            "field4nd blob nullable default (x'313233'), field5nd real nullable default 1.23)"))
-        run(self.cursor.execute('create table example_hashed_models (id text, ' +
-            'field1 text, field2 integer, field3 boolean, field4 blob, ' +
-            'field5 real, field1n text nullable, field2n integer nullable, ' +
-            'field3n boolean nullable, field4n blob nullable, field5n real nullable, ' +
-            'field1d text default ''foobar'', field2d integer default 123, ' +
-            'field3d boolean default true, field4d blob default X''313233'', ' +
-            'field5d real default 1.23, field1nd text nullable default ''foobar'', ' +
-            'field2nd integer nullable default 123, field3nd boolean nullable default true, ' +
-            'field4nd blob nullable default X''313233'', field5nd real nullable default 1.23)'))
-
         return super().setUp()
 
-    def setUpClass() -> None:
-        """Couple these models to db_filepath for testing purposes."""
-        async_classes.AsyncSqlModel.connection_info = DB_FILEPATH
-        async_classes.AsyncDeletedModel.connection_info = DB_FILEPATH
-        async_classes.AsyncHashedModel.connection_info = DB_FILEPATH
-        async_classes.AsyncAttachment.connection_info = DB_FILEPATH
-
     def tearDown(self) -> None:
         """Close cursor and delete test database."""
         async_classes.AsyncSqlModel.clear_hooks()
         async_classes.AsyncHashedModel.clear_hooks()
         async_classes.AsyncDeletedModel.clear_hooks()
         async_classes.AsyncAttachment.clear_hooks()
-        q = "select name from sqlite_master where type='table'"
-        run(self.cursor.execute(q))
-        results = run(self.cursor.fetchall())
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                run(self.cursor.execute(q))
-            except BaseException as e:
-                print(e)
         run(self.cursor.close())
         run(self.db.close())
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         return super().tearDown()
 
     # general tests
@@ -181,11 +223,68 @@ class TestAsyncClasses(unittest.TestCase):
             with async_classes.AsyncSqliteContext(str):
                 ...
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^connection_info must be str'):
             with async_classes.AsyncSqliteContext([]):
                 ...
-        assert 'connection_info' in str(e.exception), str(e.exception)
-        assert 'must be str' in str(e.exception)
+
+    def test_async_transaction_commits_queries_together(self):
+        async def inserts():
+            async with async_classes.async_transaction(DB_FILEPATH):
+                await async_classes.AsyncSqlModel.insert({'name': 'Alice'})
+                await async_classes.AsyncSqlModel.insert({'name': 'Bob'})
+                # not visible to other connections until committed
+                cursor = await self.db.execute('select count(*) from example')
+                assert (await cursor.fetchone())[0] == 0
+                assert await async_classes.AsyncSqlModel.query().count() == 2
+        run(inserts())
+        assert run(async_classes.AsyncSqlModel.query().count()) == 2
+
+    def test_async_transaction_rolls_back_on_exception(self):
+        async def inserts():
+            async with async_classes.async_transaction(DB_FILEPATH):
+                await async_classes.AsyncSqlModel.insert({'name': 'Alice'})
+                raise ValueError('abort')
+        with self.assertRaises(ValueError):
+            run(inserts())
+        assert run(async_classes.AsyncSqlModel.query().count()) == 0
+
+    def test_async_identity_map_returns_loaded_instances(self):
+        Model = async_classes.AsyncSqlModel
+        model = run(Model.insert({'name': 'Alice'}))
+        assert run(Model.find(model.id)) is not model
+
+        async def lookups():
+            async with async_classes.async_identity_map():
+                found = await Model.find(model.id)
+                assert await Model.find(model.id) is found
+                inserted = await Model.insert({'name': 'Bob'})
+                assert await Model.find(inserted.id) is inserted
+
+                # stored values are read again by reload
+                await self.db.execute("update example set name = 'Carol'")
+                await self.db.commit()
+                assert (await found.reload()).name == 'Carol'
+
+                # writes through the query builder clear the map
+                await Model.query().equal('id', inserted.id).update({'name': 'Dave'})
+                found_again = await Model.find(inserted.id)
+                assert found_again is not inserted
+                assert found_again.name == 'Dave'
+            return found_again
+        found_again = run(lookups())
+        assert run(Model.find(found_again.id)) is not found_again
+
+    def test_async_transaction_nested_blocks_join_outer_transaction(self):
+        async def inserts():
+            async with async_classes.async_transaction(DB_FILEPATH) as outer:
+                async with async_classes.async_transaction(DB_FILEPATH) as inner:
+                    assert inner is outer
+                    await async_classes.AsyncSqlModel.insert({'name': 'Alice'})
+                await async_classes.AsyncSqlModel.insert({'name': 'Bob'})
+                raise ValueError('abort')
+        with self.assertRaises(ValueError):
+            run(inserts())
+        assert run(async_classes.AsyncSqlModel.query().count()) == 0
 
 
     # AsyncSqlModel tests
@@ -227,61 +326,42 @@ class TestAsyncClasses(unittest.TestCase):
             ...
 
         TestModel._post_init_hooks = []
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^_post_init_hooks must be a dict mapping names to Callables$'):
             _ = TestModel()
-        assert str(e.exception) == '_post_init_hooks must be a dict mapping names to Callables'
 
         TestModel._post_init_hooks = {'name': 'not callable'}
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^_post_init_hooks must be a dict mapping names to Callables$'):
             _ = TestModel()
-        assert str(e.exception) == '_post_init_hooks must be a dict mapping names to Callables'
 
     def test_AsyncSqlModel_encode_value_raises_packify_UsageError_for_unrecognized_type(self):
         with self.assertRaises(packify.UsageError) as e:
             async_classes.AsyncSqlModel.encode_value(async_classes.AsyncSqlModel)
 
     def test_AsyncSqlModel_encode_value_encodes_values_properly(self):
-        bstr = b'123'
-        assert async_classes.AsyncSqlModel.encode_value(bstr) == packify.pack(bstr).hex()
-
-        list_of_bytes = [b'123', b'321']
-        expected = packify.pack(list_of_bytes).hex()
-        assert async_classes.AsyncSqlModel.encode_value(list_of_bytes) == expected
-
-        tuple_of_bytes = (b'123', b'321')
-        expected = packify.pack(tuple_of_bytes).hex()
-        assert async_classes.AsyncSqlModel.encode_value(tuple_of_bytes) == expected
-
-        unencoded_dict = {b'123': b'321', 1: '123'}
-        expected = packify.pack(unencoded_dict).hex()
-        assert async_classes.AsyncSqlModel.encode_value(unencoded_dict) == expected
+        for value, expected in ENCODE_VALUE_CASES:
+            with self.subTest(value=value):
+                assert async_classes.AsyncSqlModel.encode_value(value) == expected
 
     def test_AsyncSqlModel_insert_raises_TypeError_for_nondict_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
             run(async_classes.AsyncSqlModel.insert('not a dict'))
-        assert str(e.exception) == 'data must be dict'
 
     def test_AsyncSqlModel_insert_many_raises_TypeError_for_nonlist_of_dict_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             run(async_classes.AsyncSqlModel.insert_many('not a list'))
-        assert str(e.exception) == 'items must be type list[dict]'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             run(async_classes.AsyncSqlModel.insert_many(['not a dict']))
-        assert str(e.exception) == 'items must be type list[dict]'
 
     def test_AsyncSqlModel_update_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^updates must be dict$'):
             run(async_classes.AsyncSqlModel().update('not a dict'))
-        assert str(e.exception) == 'updates must be dict'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^conditions must be dict or None$'):
             run(async_classes.AsyncSqlModel().update({}, 'not a dict'))
-        assert str(e.exception) == 'conditions must be dict or None'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^instance must have id or conditions defined$'):
             run(async_classes.AsyncSqlModel().update({}))
-        assert str(e.exception) == f'instance must have id or conditions defined'
 
     def test_AsyncSqlModel_insert_and_find(self):
         # e2e test
@@ -357,80 +437,77 @@ class TestAsyncClasses(unittest.TestCase):
         run(async_classes.AsyncSqlModel.invoke_hooks('test', 'abc', foo='bar'))
         assert len(log) == 0, log
 
-    def test_AsyncSqlModel_hooks_fire_on_relevant_methods(self):
+    def test_AsyncSqlModel_invoke_hooks_awaits_parallel_hooks_together(self):
         log = []
-        def addlog(*args, **kwargs):
-            log.append((args, kwargs))
-        # insert
-        assert len(log) == 0
-        run(async_classes.AsyncSqlModel.insert({'name': 'foobar'}))
-        assert len(log) == 0, log
-        async_classes.AsyncSqlModel.add_hook('before_insert', addlog)
-        async_classes.AsyncSqlModel.add_hook('after_insert', addlog)
-        run(async_classes.AsyncSqlModel.insert({'name': 'foobar'}))
-        assert len(log) == 2, log
-        run(async_classes.AsyncSqlModel.insert({'name': 'foobar'}, suppress_events = True))
-        assert len(log) == 2, log
-        log.clear()
-        async_classes.AsyncSqlModel.remove_hook('before_insert', addlog)
-        async_classes.AsyncSqlModel.remove_hook('after_insert', addlog)
-
-        # insert_many
-        run(async_classes.AsyncSqlModel.insert_many([{'name': 'foobar'}]))
-        assert len(log) == 0, log
-        async_classes.AsyncSqlModel.add_hook('before_insert_many', addlog)
-        async_classes.AsyncSqlModel.add_hook('after_insert_many', addlog)
-        run(async_classes.AsyncSqlModel.insert_many([{'name': 'foobar'}]))
-        assert len(log) == 2, log
-        run(async_classes.AsyncSqlModel.insert_many([{'name': 'foobar'}], suppress_events = True))
-        assert len(log) == 2, log
+        async def addlog(cls, *args, **kwargs):
+            log.append('start')
+            await asyncio.sleep(0)
+            log.append('end')
+        async_classes.AsyncSqlModel.add_hook('test_parallel', addlog)
+        async_classes.AsyncSqlModel.add_hook('test_parallel', lambda *a, **kw: addlog(*a, **kw))
+        run(async_classes.AsyncSqlModel.invoke_hooks('test_parallel'))
+        assert log == ['start', 'end', 'start', 'end'], log
         log.clear()
-        async_classes.AsyncSqlModel.remove_hook('before_insert_many', addlog)
-        async_classes.AsyncSqlModel.remove_hook('after_insert_many', addlog)
-
-        # update
-        item = run(async_classes.AsyncSqlModel.query().first())
-        run(item.update({'name': 'foodbar'}))
-        assert len(log) == 0, log
-        async_classes.AsyncSqlModel.add_hook('before_update', addlog)
-        async_classes.AsyncSqlModel.add_hook('after_update', addlog)
-        run(item.update({'name': 'foobar'}))
-        assert len(log) == 2, log
-        run(item.update({'name': 'foobar'}, suppress_events = True))
-        assert len(log) == 2, log
+        run(async_classes.AsyncSqlModel.invoke_hooks(
+            'test_parallel', parallel_events=True
+        ))
+        assert log == ['start', 'start', 'end', 'end'], log
+        async_classes.AsyncSqlModel.clear_hooks('test_parallel')
         log.clear()
-        async_classes.AsyncSqlModel.remove_hook('before_update', addlog)
-        async_classes.AsyncSqlModel.remove_hook('after_update', addlog)
+        run(async_classes.AsyncSqlModel.invoke_hooks('test_parallel'))
+        assert log == [], log
 
-        # delete
-        item = run(async_classes.AsyncSqlModel.query().first())
-        run(item.delete())
-        assert len(log) == 0, log
-        item = run(async_classes.AsyncSqlModel.query().first())
-        async_classes.AsyncSqlModel.add_hook('before_delete', addlog)
-        async_classes.AsyncSqlModel.add_hook('after_delete', addlog)
-        run(item.delete())
-        assert len(log) == 2, log
-        run(item.delete(suppress_events = True))
-        assert len(log) == 2, log
-        log.clear()
-        async_classes.AsyncSqlModel.remove_hook('before_delete', addlog)
-        async_classes.AsyncSqlModel.remove_hook('after_delete', addlog)
+    def test_AsyncSqlModel_hooks_fire_on_relevant_methods(self):
+        log = []
+        def addlog(*args, **kwargs):
+            log.append((args, kwargs))
 
-        # reload
-        item = run(async_classes.AsyncSqlModel.query().first())
-        run(item.reload())
-        assert len(log) == 0, log
-        item = run(async_classes.AsyncSqlModel.query().first())
-        async_classes.AsyncSqlModel.add_hook('before_reload', addlog)
-        async_classes.AsyncSqlModel.add_hook('after_reload', addlog)
-        run(item.reload())
-        assert len(log) == 2, log
-        run(item.reload(suppress_events = True))
-        assert len(log) == 2, log
-        log.clear()
-        async_classes.AsyncSqlModel.remove_hook('before_reload', addlog)
-        async_classes.AsyncSqlModel.remove_hook('after_reload', addlog)
+        add_hook = async_classes.AsyncSqlModel.add_hook
+        remove_hook = async_classes.AsyncSqlModel.remove_hook
+
+        async def fire_hooks(in_transaction: bool):
+            context = async_classes.async_transaction(DB_FILEPATH) \
+                if in_transaction else nullcontext()
+            async with context:
+                item = await async_classes.AsyncSqlModel.insert({'name': 'foobar'})
+
+                async def delete(**kw):
+                    new_item = await async_classes.AsyncSqlModel.insert(
+                        {'name': 'foobar'}
+                    )
+                    await new_item.delete(**kw)
+
+                actions = (
+                    ('insert', lambda **kw: async_classes.AsyncSqlModel.insert(
+                        {'name': 'foobar'}, **kw
+                    )),
+                    ('insert_many', lambda **kw: async_classes.AsyncSqlModel.insert_many(
+                        [{'name': 'foobar'}], **kw
+                    )),
+                    ('update', lambda **kw: item.update({'name': 'foobar'}, **kw)),
+                    ('delete', delete),
+                    ('reload', lambda **kw: item.reload(**kw)),
+                )
+
+                for name, action in actions:
+                    with self.subTest(name=name, in_transaction=in_transaction):
+                        try:
+                            await action()
+                            assert len(log) == 0, log
+                            add_hook(f'before_{name}', addlog)
+                            add_hook(f'after_{name}', addlog)
+                            await action()
+                            assert len(log) == 2, log
+                            await action(suppress_events = True)
+                            assert len(log) == 2, log
+                        finally:
+                            log.clear()
+                            remove_hook(f'before_{name}', addlog)
+                            remove_hook(f'after_{name}', addlog)
+
+        # run every action both in autocommit mode and in a transaction
+        run(fire_hooks(False))
+        run(fire_hooks(True))
 
     def test_AsyncSqlModel_tracks_changes_properly(self):
         sm = run(async_classes.AsyncSqlModel.insert({'name': 'test'}))
@@ -476,203 +553,114 @@ class TestAsyncClasses(unittest.TestCase):
         with self.assertRaises(TypeError) as e:
             sqb = async_classes.AsyncSqlQueryBuilder(model='ssds')
 
-    def test_AsyncSqlQueryBuilder_is_null_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).is_null(b'not a str', '')
-
-    def test_AsyncSqlQueryBuilder_is_null_adds_correct_clause(self):
-        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.is_null('name')
-        assert len(sqb.clauses) == 1, 'equal() must append to clauses'
-        assert len(sqb.params) == 0, 'equal() must not append to params'
-        assert sqb.clauses[0] == '"name" is null'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.is_null(['etc', 'thing'])
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 0, len(sqb.params)
-        assert sqb.clauses[0] == '"etc" is null'
-        assert sqb.clauses[1] == '"thing" is null'
-
-    def test_AsyncSqlQueryBuilder_not_null_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_null(b'not a str', '')
-
-    def test_AsyncSqlQueryBuilder_not_null_adds_correct_clause(self):
-        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.not_null('name')
-        assert len(sqb.clauses) == 1, 'equal() must append to clauses'
-        assert len(sqb.params) == 0, 'equal() must not append to params'
-        assert sqb.clauses[0] == '"name" is not null'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.not_null(['etc', 'thing'])
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 0, len(sqb.params)
-        assert sqb.clauses[0] == '"etc" is not null'
-        assert sqb.clauses[1] == '"thing" is not null'
-
-    def test_AsyncSqlQueryBuilder_equal_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).equal(b'not a str', '')
-
-    def test_AsyncSqlQueryBuilder_equal_adds_correct_clause_and_param(self):
-        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.equal('name', 'test')
-        assert len(sqb.clauses) == 1, 'equal() must append to clauses'
-        assert len(sqb.params) == 1, 'equal() must append to params'
-        assert sqb.clauses[0] == '"name" = ?'
-        assert sqb.params[0] == 'test'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.equal(name='test', etc='test2')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" = ?'
-        assert sqb.clauses[1] == '"etc" = ?'
-        assert sqb.params[0] == 'test'
-        assert sqb.params[1] == 'test2'
-
-    def test_AsyncSqlQueryBuilder_not_equal_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_equal(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
-
-    def test_AsyncSqlQueryBuilder_not_equal_adds_correct_clause_and_param(self):
-        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.not_equal('name', 'test')
-        assert len(sqb.clauses) == 1, 'not_equal() must append to clauses'
-        assert len(sqb.params) == 1, 'not_equal() must append to params'
-        assert sqb.clauses[0] == '"name" != ?'
-        assert sqb.params[0] == 'test'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.not_equal(name='test', etc='test2')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" != ?'
-        assert sqb.clauses[1] == '"etc" != ?'
-        assert sqb.params[0] == 'test'
-        assert sqb.params[1] == 'test2'
-
-    def test_AsyncSqlQueryBuilder_less_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).less(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
-
-    def test_AsyncSqlQueryBuilder_less_adds_correct_clause_and_param(self):
-        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.less('name', '123')
-        assert len(sqb.clauses) == 1, 'less() must append to clauses'
-        assert len(sqb.params) == 1, 'less() must append to params'
-        assert sqb.clauses[0] == '"name" < ?'
-        assert sqb.params[0] == '123'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.less(name='123', etc='456')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" < ?'
-        assert sqb.clauses[1] == '"etc" < ?'
-        assert sqb.params[0] == '123'
-        assert sqb.params[1] == '456'
-
-    def test_AsyncSqlQueryBuilder_greater_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).greater(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
-
-    def test_AsyncSqlQueryBuilder_greater_adds_correct_clause_and_param(self):
-        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.greater('name', '123')
-        assert len(sqb.clauses) == 1, 'greater() must append to clauses'
-        assert len(sqb.params) == 1, 'greater() must append to params'
-        assert sqb.clauses[0] == '"name" > ?'
-        assert sqb.params[0] == '123'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.greater(name='123', etc='456')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" > ?'
-        assert sqb.clauses[1] == '"etc" > ?'
-        assert sqb.params[0] == '123'
-        assert sqb.params[1] == '456'
+    def test_AsyncSqlQueryBuilder_operators_reject_nonstr_column(self):
+        sqb = async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel)
+        column_types = r'^column must be str, list\[str,\], or tuple\[str,\]$'
+        cases = (
+            ('is_null', (b'not a str',), column_types),
+            ('not_null', (b'not a str',), column_types),
+            ('equal', (b'not a str', ''), r'^column must be str$'),
+            ('not_equal', (b'not a str', ''), r'^column must be str$'),
+            ('less', (b'not a str', ''), r'^column must be str$'),
+            ('greater', (b'not a str', ''), r'^column must be str$'),
+            ('like', (b'not a str', '', ''), r'^column must be str$'),
+        )
+        for name, args, message in cases:
+            with self.subTest(name=name):
+                with self.assertRaisesRegex(TypeError, message):
+                    getattr(sqb, name)(*args)
+        assert len(sqb.clauses) == 0, sqb.clauses
+
+    def test_AsyncSqlQueryBuilder_null_clauses_add_correct_clause(self):
+        for name, token in (('is_null', 'is null'), ('not_null', 'is not null')):
+            with self.subTest(name=name):
+                sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+                assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
+                assert len(sqb.params) == 0, 'params must start at 0 len'
+                getattr(sqb, name)('name')
+                assert len(sqb.clauses) == 1, f'{name}() must append to clauses'
+                assert len(sqb.params) == 0, f'{name}() must not append to params'
+                assert sqb.clauses[0] == f'"name" {token}'
+
+                sqb = sqb.reset()
+                assert len(sqb.clauses) == 0, len(sqb.clauses)
+                getattr(sqb, name)(['etc', 'thing'])
+                assert len(sqb.clauses) == 2, len(sqb.clauses)
+                assert len(sqb.params) == 0, len(sqb.params)
+                assert sqb.clauses[0] == f'"etc" {token}'
+                assert sqb.clauses[1] == f'"thing" {token}'
+
+    def test_AsyncSqlQueryBuilder_comparison_clauses_add_correct_clause_and_param(self):
+        operators = (
+            ('equal', '='), ('not_equal', '!='), ('less', '<'), ('greater', '>'),
+        )
+        for name, operator in operators:
+            with self.subTest(name=name):
+                sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+                assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
+                assert len(sqb.params) == 0, 'params must start at 0 len'
+                getattr(sqb, name)('name', '123')
+                assert len(sqb.clauses) == 1, f'{name}() must append to clauses'
+                assert len(sqb.params) == 1, f'{name}() must append to params'
+                assert sqb.clauses[0] == f'"name" {operator} ?'
+                assert sqb.params[0] == '123'
+
+                sqb = sqb.reset()
+                assert len(sqb.clauses) == 0, len(sqb.clauses)
+                getattr(sqb, name)(name='123', etc='456')
+                assert len(sqb.clauses) == 2, len(sqb.clauses)
+                assert len(sqb.params) == 2, len(sqb.params)
+                assert sqb.clauses[0] == f'"name" {operator} ?'
+                assert sqb.clauses[1] == f'"etc" {operator} ?'
+                assert sqb.params[0] == '123'
+                assert sqb.params[1] == '456'
 
     def test_AsyncSqlQueryBuilder_like_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).like(b'not a str', '', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^pattern must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).like('', b'not a str', '')
-        assert str(e.exception) == 'pattern must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).like('', '', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).like('', 'sds', '')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^pattern cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).like('sds', '', '')
-        assert str(e.exception) == 'pattern cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).like('sds', '%?', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel).like(name='thing')
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel).like(name=('thing',))
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'pattern must be str'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel).like(name=(b'not a str', 'test'))
-        assert 'pattern must be str' in str(e.exception), str(e.exception)
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'data must be str'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel).like(name=('thing', b'not a str'))
-        assert 'data must be str' in str(e.exception), str(e.exception)
 
     def test_AsyncSqlQueryBuilder_like_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -695,65 +683,55 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == '456%456', sqb.params
 
     def test_AsyncSqlQueryBuilder_not_like_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like(b'not a str', '', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^pattern must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like('', b'not a str', '')
-        assert str(e.exception) == 'pattern must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like('', '', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like('', 'sds', '')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^pattern cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like('sds', '', '')
-        assert str(e.exception) == 'pattern cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like('sds', '%?', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like(name='thing')
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like(name=('thing',))
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each pattern must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like(name=(b'not a str', 'test'))
-        assert str(e.exception) == 'each pattern must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).not_like(name=('thing', b'not a str'))
-        assert str(e.exception) == 'each data must be str'
 
     def test_AsyncSqlQueryBuilder_not_like_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -776,25 +754,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == '456%456', sqb.params
 
     def test_AsyncSqlQueryBuilder_starts_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).starts_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).starts_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).starts_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).starts_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).starts_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_AsyncSqlQueryBuilder_starts_with_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -817,35 +790,30 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == 'misc%', sqb.params
 
     def test_AsyncSqlQueryBuilder_does_not_start_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_start_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_start_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_start_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_start_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_start_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_AsyncSqlQueryBuilder_does_not_start_with_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -868,25 +836,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == 'misc%', sqb.params
 
     def test_AsyncSqlQueryBuilder_contains_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).contains(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).contains('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).contains('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).contains('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).contains(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_AsyncSqlQueryBuilder_contains_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -909,25 +872,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc%', sqb.params
 
     def test_AsyncSqlQueryBuilder_excludes_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).excludes(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).excludes('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).excludes('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).excludes('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).excludes(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_AsyncSqlQueryBuilder_excludes_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -950,25 +908,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc%', sqb.params
 
     def test_AsyncSqlQueryBuilder_ends_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).ends_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).ends_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).ends_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).ends_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).ends_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_AsyncSqlQueryBuilder_ends_with_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -991,35 +944,30 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc', sqb.params
 
     def test_AsyncSqlQueryBuilder_does_not_end_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_end_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_end_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_end_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_end_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).does_not_end_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_AsyncSqlQueryBuilder_does_not_end_with_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1042,25 +990,26 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc', sqb.params
 
     def test_AsyncSqlQueryBuilder_is_in_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).is_in(b'not a str', 'not list')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be tuple or list$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).is_in('', 'not a list')
-        assert str(e.exception) == 'data must be tuple or list'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).is_in('', ['sds'])
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).is_in('sds', [])
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'data must be tuple or list'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).is_in(name='not a list')
-        assert 'data must be tuple or list' in str(e.exception), str(e.exception)
+
+        sqb = async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel)
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
+            sqb.is_in(name=('123',), other=[])
+        assert sqb.clauses == [] and sqb.params == [], \
+            'is_in() must not save partial kwargs conditions'
 
     def test_AsyncSqlQueryBuilder_is_in_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1086,25 +1035,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[3] == '654', sqb.params
 
     def test_AsyncSqlQueryBuilder_not_in_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_in(b'not a str', 'not list')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be tuple or list$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_in('', 'not a list')
-        assert str(e.exception) == 'data must be tuple or list'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_in('', ['sds'])
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_in('sds', [])
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'data must be tuple or list'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).not_in(name='not a list')
-        assert 'data must be tuple or list' in str(e.exception), str(e.exception)
 
     def test_AsyncSqlQueryBuilder_not_in_adds_correct_clause_and_param(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1130,17 +1074,21 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[3] == '654', sqb.params
 
     def test_SqlQueryBuilder_where_raises_errors_for_invalid_input(self):
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'unrecognized condition type'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).where(not_a_condition='should not work')
-        assert 'unrecognized condition type' in str(e.exception)
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'must be dict'):
             async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel
             ).where(equal=b'not a dict')
-        assert 'must be dict' in str(e.exception)
+
+        sqb = async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).equal('id', 1)
+        with self.assertRaisesRegex(TypeError, r'must be dict'):
+            sqb.where(equal={'name': 'foo'}, less=b'not a dict')
+        assert sqb.clauses == ['"id" = ?'], sqb.clauses
+        assert sqb.params == [1], sqb.params
 
     def test_SqlQueryBuilder_where_adds_correct_clauses_and_params(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1231,25 +1179,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.params[16] == '321', sqb.params[16]
 
     def test_AsyncSqlQueryBuilder_order_by_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).order_by(b'not a str', 'asc')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^direction must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).order_by('', b'not a str')
-        assert str(e.exception) == 'direction must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'unrecognized column'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).order_by('', '')
-        assert 'unrecognized column' in str(e.exception)
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^direction must be asc or desc$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).order_by('id', 'not asc or desc')
-        assert str(e.exception) == 'direction must be asc or desc'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^direction must be str$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).order_by(name=b'not a str')
-        assert str(e.exception) == 'direction must be str'
 
     def test_AsyncSqlQueryBuilder_order_by_sets_order_column_and_order_dir(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1260,13 +1203,11 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.order_dir == 'asc', 'order_dir must become asc'
 
     def test_AsyncSqlQueryBuilder_skip_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^offset must be positive int$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).skip('not an int')
-        assert str(e.exception) == 'offset must be positive int'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^offset must be positive int$'):
             async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).skip(-1)
-        assert str(e.exception) == 'offset must be positive int'
 
     def test_AsyncSqlQueryBuilder_skip_sets_offset(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1274,18 +1215,16 @@ class TestAsyncClasses(unittest.TestCase):
         assert sqb.skip(5).offset == 5, 'offset must become 5'
 
     def test_AsyncSqlQueryBuilder_insert_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).insert('not a dict'))
-        assert str(e.exception) == 'data must be dict'
 
         model_id = run(async_classes.AsyncSqlModel.insert({})).data['id']
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^record with this id already exists$'):
             run(async_classes.AsyncSqlQueryBuilder(
                 async_classes.AsyncSqlModel,
                 async_classes.AsyncSqliteContext
             ).insert({'id': model_id}))
-        assert str(e.exception) == 'record with this id already exists'
 
     def test_AsyncSqlQueryBuilder_insert_inserts_record_into_database(self):
         sqb = async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel, async_classes.AsyncSqliteContext)
@@ -1295,41 +1234,33 @@ class TestAsyncClasses(unittest.TestCase):
         assert run(sqb.find(model_id))
 
     def test_AsyncSqlQueryBuilder_insert_many_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be list\[dict\]$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).insert_many('not a list'))
-        assert str(e.exception) == 'items must be list[dict]'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be list\[dict\]$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).insert_many(['not a dict']))
-        assert str(e.exception) == 'items must be list[dict]'
 
     def test_AsyncSqlQueryBuilder_take_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^limit must be positive int$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).take('not an int'))
-        assert str(e.exception) == 'limit must be positive int'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^limit must be positive int$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).take(0))
-        assert str(e.exception) == 'limit must be positive int'
 
     def test_AsyncSqlQueryBuilder_chunk_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^number must be int > 0$'):
             sqb = async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel, async_classes.AsyncSqliteContext)
             run(sqb.chunk('not an int'))
-        assert str(e.exception) == 'number must be int > 0'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^number must be int > 0$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).chunk(0))
-        assert str(e.exception) == 'number must be int > 0'
 
     def test_AsyncSqlQueryBuilder_update_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^updates must be dict$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).update('not a dict'))
-        assert str(e.exception) == 'updates must be dict'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^conditions must be dict$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).update({}, 'not a dict'))
-        assert str(e.exception) == 'conditions must be dict'
 
     def test_AsyncSqlQueryBuilder_to_sql_returns_correct_sql_str(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1352,6 +1283,24 @@ class TestAsyncClasses(unittest.TestCase):
         sqb.skip(3)
         assert sqb.to_sql() == ' where "name" = \'foo\' order by "id" desc limit 5 offset 3', sqb.to_sql()
 
+    def test_AsyncSqlQueryBuilder_to_sql_reflects_changes_to_clauses_and_params(self):
+        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+        sqb.equal('name', 'foo')
+        assert sqb.to_sql() == ' where "name" = \'foo\'', sqb.to_sql()
+        sqb.params[0] = 'bar'
+        assert sqb.to_sql() == ' where "name" = \'bar\'', sqb.to_sql()
+        sqb.clauses[0] = '"name" != ?'
+        assert sqb.to_sql() == ' where "name" != \'bar\'', sqb.to_sql()
+        sqb.limit = 5
+        assert sqb.to_sql().endswith(' limit 5'), sqb.to_sql()
+        assert sqb.copy().to_sql() == sqb.to_sql()
+
+    def test_AsyncSqlQueryBuilder_to_sql_interpolates_each_placeholder_in_order(self):
+        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+        sqb.is_null('other').is_in('name', ['foo', 'bar']).equal('id', '1')
+        assert sqb.to_sql() == ' where "other" is null and ' + \
+            '"name" in (\'foo\',\'bar\') and "id" = \'1\'', sqb.to_sql()
+
     def test_AsyncSqlQueryBuilder_to_sql_without_interpolate_params_returns_str_and_list(self):
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
         assert type(sqb.to_sql(interpolate_params=False)) is tuple, \
@@ -1393,10 +1342,63 @@ class TestAsyncClasses(unittest.TestCase):
         assert sql1 != sql2
         assert sqb.reset().to_sql() == sql1
 
+        sqb.order_by('id', 'asc').limit = 5
+        fresh = sqb.reset()
+        assert fresh is not sqb
+        assert fresh.model is sqb.model
+        assert fresh.clauses == [] and fresh.params == []
+        assert fresh.order_column is None and fresh.limit is None
+        assert sqb.to_sql() == sql2 + ' order by "id" asc limit 5', sqb.to_sql()
+
+    def test_AsyncSqlQueryBuilder_uses_slots_and_copies_subclass_attributes(self):
+        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+        assert not hasattr(sqb, '__dict__')
+
+        class SQBTagged(async_classes.AsyncSqlQueryBuilder):
+            tag = None
+        sqb = SQBTagged(model=async_classes.AsyncSqlModel).equal('name', 'thing')
+        sqb.tag = 'tagged'
+        assert sqb.copy().tag == 'tagged'
+        assert sqb.copy().to_sql() == sqb.to_sql()
+        assert sqb.reset().tag == 'tagged'
+        assert sqb.reset().clauses == []
+
+    def test_AsyncSqlQueryBuilder_copy_returns_independent_instance(self):
+        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel).equal('name', 'thing')
+        copied = sqb.copy()
+        assert copied is not sqb
+        assert copied.to_sql() == sqb.to_sql()
+        copied.equal('id', '123')
+        assert copied.to_sql() != sqb.to_sql()
+
+    def test_AsyncSqlModel_query_returns_independent_builders(self):
+        sqb1 = async_classes.AsyncSqlModel.query({'name': 'thing'})
+        sqb2 = async_classes.AsyncSqlModel.query()
+        assert isinstance(sqb2, async_classes.AsyncSqlQueryBuilder)
+        assert sqb1 is not sqb2
+        assert sqb1.to_sql() != sqb2.to_sql()
+        assert sqb2.to_sql() == async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel).to_sql()
+
+    def test_AsyncSqlModel_query_initializes_custom_builders_per_query(self):
+        inits = []
+        class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.log = []
+                inits.append(self)
+
+        class Derived(async_classes.AsyncSqlModel):
+            query_builder_class = QueryBuilder
+
+        sqb1 = Derived.query()
+        sqb2 = Derived.query()
+        assert inits == [sqb1, sqb2], inits
+        sqb1.log.append('sqb1')
+        assert sqb2.log == []
+
     def test_AsyncSqlQueryBuilder_execute_raw_raises_TypeError_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^sql must be str$'):
             run(async_classes.AsyncSqlQueryBuilder(async_classes.AsyncSqlModel).execute_raw(b'not str'))
-        assert str(e.exception) == 'sql must be str'
 
     def test_AsyncSqlQueryBuilder_insert_inserts_record_into_datastore(self):
         # e2e test
@@ -1412,6 +1414,15 @@ class TestAsyncClasses(unittest.TestCase):
         assert run(sqb.find('321')) is not None, \
             'find() must return a record that was inserted'
 
+    def test_AsyncSqlQueryBuilder_insert_many_inserts_all_or_nothing(self):
+        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+        with self.assertRaises(sqlite3.Error):
+            run(sqb.insert_many([
+                {'name': 'test1', 'id': '123'},
+                {'name': {'not': 'bindable'}, 'id': '321'},
+            ]))
+        assert run(sqb.count()) == 0, 'failed batch must not insert any rows'
+
     def test_AsyncSqlQueryBuilder_insert_many_inserts_records_into_datastore(self):
         # e2e test
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1510,6 +1521,21 @@ class TestAsyncClasses(unittest.TestCase):
         run(iterate())
         assert observed == expected
 
+    def test_AsyncSqlQueryBuilder_chunk_stops_after_short_chunk_and_restores_state(self):
+        offsets = []
+        class SQBCounting(async_classes.AsyncSqlQueryBuilder):
+            async def get(self):
+                offsets.append(self.offset)
+                return await super().get()
+        sqb = SQBCounting(model=async_classes.AsyncSqlModel)
+        run(sqb.insert_many([{'name': i, 'id': i} for i in range(0, 25)]))
+
+        async def sizes():
+            return [len(r) async for r in sqb.chunk(10)]
+        assert run(sizes()) == [10, 10, 5]
+        assert offsets == [0, 10, 20], offsets
+        assert sqb.offset is None and sqb.limit is None
+
     def test_AsyncSqlQueryBuilder_first_returns_one_record(self):
         # e2e test
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1530,6 +1556,20 @@ class TestAsyncClasses(unittest.TestCase):
         assert updates == 1
         assert run(sqb.find('123')).data['name'] == 'test2'
 
+    def test_AsyncSqlQueryBuilder_upsert_inserts_or_updates_record(self):
+        # e2e test
+        run(self.cursor.execute('create unique index example_id on example (id)'))
+        run(self.db.commit())
+        sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
+        assert run(sqb.upsert({'name': 'test1', 'id': '123'})) == 1
+        assert run(sqb.find('123')).data['name'] == 'test1'
+        assert run(sqb.upsert({'name': 'test2', 'id': '123'})) == 1
+        assert run(sqb.find('123')).data['name'] == 'test2'
+        assert run(sqb.count()) == 1
+
+        with self.assertRaisesRegex(TypeError, r'^upsert cannot be used with AsyncHashedModel$'):
+            run(async_classes.AsyncHashedModel.query().upsert({'id': '123', 'details': 'x'}))
+
     def test_AsyncSqlQueryBuilder_delete_removes_record(self):
         # e2e test
         sqb = async_classes.AsyncSqlQueryBuilder(model=async_classes.AsyncSqlModel)
@@ -1714,9 +1754,8 @@ class TestAsyncClasses(unittest.TestCase):
         assert observed == expected, 'wrong hash encountered'
 
     def test_AsyncHashedModel_insert_raises_TypeError_for_nondict_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
             run(async_classes.AsyncHashedModel.insert('not a dict'))
-        assert str(e.exception) == 'data must be dict'
 
     def test_AsyncHashedModel_insert_generates_id_and_makes_record(self):
         data = { 'details': token_bytes(8).hex() }
@@ -1735,13 +1774,11 @@ class TestAsyncClasses(unittest.TestCase):
         assert found == inserted
 
     def test_AsyncHashedModel_insert_many_raises_TypeError_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             run(async_classes.AsyncHashedModel.insert_many('not a list'))
-        assert str(e.exception) == 'items must be type list[dict]'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             run(async_classes.AsyncHashedModel.insert_many(['not a dict']))
-        assert str(e.exception) == 'items must be type list[dict]'
 
     def test_AsyncHashedModel_insert_many_generates_ids_and_makes_records(self):
         data1 = { 'details': token_bytes(8).hex() }
@@ -1761,13 +1798,11 @@ class TestAsyncClasses(unittest.TestCase):
             assert len(bytes.fromhex(item.data[async_classes.AsyncHashedModel.id_column])) == 32
 
     def test_AsyncHashedModel_update_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^updates must be dict$'):
             run(async_classes.AsyncHashedModel({}).update('not a dict'))
-        assert str(e.exception) == 'updates must be dict'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^unrecognized column: badcolumn$'):
             run(async_classes.AsyncHashedModel({}).update({'badcolumn': '123'}))
-        assert str(e.exception) == 'unrecognized column: badcolumn'
 
     def test_AsyncHashedModel_save_and_update_delete_original_and_makes_new_record(self):
         data1 = { 'details': token_bytes(8).hex() }
@@ -1916,12 +1951,13 @@ class TestAsyncClasses(unittest.TestCase):
         async_classes.AsyncHashedModel.add_hook('before_delete', addlog)
         async_classes.AsyncHashedModel.add_hook('after_delete', addlog)
         assert len(log) == 0, 'invalid test precondition'
-        run(run(async_classes.AsyncHashedModel.query().first()).delete())
+        first, second, third = run(async_classes.AsyncHashedModel.query().take(3))
+        run(first.delete())
         assert len(log) == 2, len(log)
-        run(run(async_classes.AsyncHashedModel.query().first()).delete(suppress_events=True))
+        run(second.delete(suppress_events=True))
         assert len(log) == 2, len(log)
         async_classes.AsyncHashedModel.clear_hooks()
-        run(run(async_classes.AsyncHashedModel.query().first()).delete())
+        run(third.delete())
         assert len(log) == 2, len(log)
 
 
@@ -1962,9 +1998,8 @@ class TestAsyncClasses(unittest.TestCase):
             'timestamp': 123,
         }))
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^model_class must be accessible$'):
             run(deleted.restore())
-        assert str(e.exception) == 'model_class must be accessible'
 
         deleted = run(async_classes.AsyncDeletedModel.query().insert({
             'id': async_classes.AsyncDeletedModel.generate_id(),
@@ -1974,9 +2009,8 @@ class TestAsyncClasses(unittest.TestCase):
             'timestamp': 123,
         }))
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^related_model must inherit from AsyncSqlModel$'):
             run(deleted.restore())
-        assert str(e.exception) == 'related_model must inherit from AsyncSqlModel'
 
     def test_AsyncDeletedModel_event_hooks(self):
         log = []
@@ -2025,9 +2059,8 @@ class TestAsyncClasses(unittest.TestCase):
         class NotValidClass:
             ...
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^related must inherit from AsyncSqlModel$'):
             async_classes.AsyncAttachment({'details': 'should fail'}).attach_to(NotValidClass())
-        assert str(e.exception) == 'related must inherit from AsyncSqlModel'
 
     def test_AsyncAttachment_attach_to_sets_related_model_and_related_id(self):
         data = { 'data': token_bytes(8).hex() }
@@ -2064,18 +2097,16 @@ class TestAsyncClasses(unittest.TestCase):
             'related_id': '321',
             'details': 'chill music is nice to listen to while coding'
         }))
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^model_class must be accessible$'):
             run(attachment.related())
-        assert str(e.exception) == 'model_class must be accessible'
 
         attachment = run(async_classes.AsyncAttachment.insert({
             'related_model': NotValidClass.__name__,
             'related_id': '321',
             'details': 'fail whale incoming'
         }))
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^related_model must inherit from AsyncSqlModel$'):
             run(attachment.related())
-        assert str(e.exception) == 'related_model must inherit from AsyncSqlModel'
 
     def test_AsyncAttachment_related_returns_SqlModel_instance(self):
         data = { 'data': token_bytes(8).hex() }
@@ -1,16 +1,20 @@
-from asyncio import run
-from context import tools
+from context import tools, db_path, run, close_event_loop
 from decimal import Decimal
-from genericpath import isdir, isfile
+from genericpath import isdir
 from integration_vectors import asyncmodels, asyncmodels2
+from pathlib import Path
 from secrets import token_hex
 import os
+import shutil
 import sqlite3
 import unittest
 
+def tearDownModule():
+    close_event_loop()
 
-DB_FILEPATH = 'test.db'
-MIGRATIONS_PATH = 'tests/integration_vectors/migrations'
+
+DB_FILEPATH = db_path('async_integration') + '.db'
+MIGRATIONS_PATH = db_path('async_integration') + '_migrations'
 MODELS_PATH = 'tests/integration_vectors/asyncmodels'
 
 
@@ -35,11 +39,7 @@ class TestAsyncIntegration(unittest.TestCase):
 
     def setUp(self):
         """Set up the test database."""
-        try:
-            if isfile(DB_FILEPATH):
-                os.remove(DB_FILEPATH)
-        except:
-            ...
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         self.db = sqlite3.connect(DB_FILEPATH)
         self.cursor = self.db.cursor()
         if not isdir(MIGRATIONS_PATH):
@@ -51,26 +51,30 @@ class TestAsyncIntegration(unittest.TestCase):
 
     def tearDown(self):
         """Close cursor and delete test database."""
-        q = "select name from sqlite_master where type='table'"
+        q = "select name from sqlite_master where type='table' " + \
+            "and name not like 'sqlite_%'"
         self.cursor.execute(q)
         results = self.cursor.fetchall()
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                self.cursor.execute(q)
-            except BaseException as e:
-                print(e)
+        try:
+            self.cursor.executescript(''.join([
+                f'drop table if exists "{result[0]}";' for result in results
+            ]))
+        except sqlite3.Error as e:
+            print(e)
         self.cursor.close()
         self.db.close()
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         for file in os.listdir(MIGRATIONS_PATH):
             if 'migration' in file and file[-3:] == '.py':
                 os.remove(f"{MIGRATIONS_PATH}/{file}")
         return super().tearDown()
 
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Remove the migrations directory."""
+        shutil.rmtree(MIGRATIONS_PATH, ignore_errors=True)
+        return super().tearDownClass()
+
     def test_integration_e2e(self):
         # generate migrations
         names = ['Account', 'Correspondence', 'Entry', 'Identity', 'Ledger', 'Transaction']
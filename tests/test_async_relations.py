@@ -1,16 +1,41 @@
 from __future__ import annotations
-from asyncio import run
-from context import async_classes, errors, async_interfaces, async_relations
-from genericpath import isfile
+from asyncio import gather
+from context import (
+    async_classes, errors, async_interfaces, async_relations, db_path, run,
+    close_event_loop,
+)
+from pathlib import Path
 import aiosqlite
+import asyncio
 import os
+import shutil
 import unittest
 
+def tearDownModule():
+    close_event_loop()
 
-DB_FILEPATH = 'test.db'
 
-async def connect(path):
-    return await aiosqlite.connect(path)
+DB_FILEPATH = db_path('async_relations') + '.db'
+TEMPLATE_DB_FILEPATH = db_path('async_relations') + '_template.db'
+
+SCHEMA = '''
+    create table pivot (id text, first_id text, second_id text);
+    create table owners (id text, details text);
+    create table owned (id text, owner_id text, details text);
+    create table dag (id text, details text, parent_ids text);
+    create table deleted_records (id text not null,
+        model_class text not null, record_id text not null,
+        record blob not null, timestamp text not null);
+'''
+
+async def create_tables(path):
+    """Create the test tables using a single short-lived connection."""
+    async with aiosqlite.connect(path) as db:
+        await db.executescript(SCHEMA)
+
+async def run_together(*tasks):
+    """Await independent tasks concurrently within a single run call."""
+    return await gather(*tasks)
 
 
 class Pivot(async_classes.AsyncSqlModel):
@@ -20,25 +45,22 @@ class Pivot(async_classes.AsyncSqlModel):
 
 
 class TestRelations(unittest.TestCase):
-    db: aiosqlite.Connection = None
-    cursor: aiosqlite.Cursor = None
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Build the schema once into a template database."""
+        Path(TEMPLATE_DB_FILEPATH).unlink(missing_ok=True)
+        run(create_tables(TEMPLATE_DB_FILEPATH))
+        return super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Delete the template database."""
+        Path(TEMPLATE_DB_FILEPATH).unlink(missing_ok=True)
+        return super().tearDownClass()
 
     def setUp(self) -> None:
-        """Set up the test database."""
-        try:
-            if isfile(DB_FILEPATH):
-                os.remove(DB_FILEPATH)
-        except:
-            ...
-        self.db = run(connect(DB_FILEPATH))
-        self.cursor = run(self.db.cursor())
-        run(self.cursor.execute('create table pivot (id text, first_id text, second_id text)'))
-        run(self.cursor.execute('create table owners (id text, details text)'))
-        run(self.cursor.execute('create table owned (id text, owner_id text, details text)'))
-        run(self.cursor.execute('create table dag (id text, details text, parent_ids text)'))
-        run(self.cursor.execute('create table deleted_records (id text not null, ' +
-            'model_class text not null, record_id text not null, ' +
-            'record blob not null, timestamp text not null)'))
+        """Set up the test database from the template."""
+        shutil.copyfile(TEMPLATE_DB_FILEPATH, DB_FILEPATH)
 
         # rebuild test async_classes because properties will be changed in tests
         class OwnedModel(async_classes.AsyncSqlModel):
@@ -71,22 +93,8 @@ class TestRelations(unittest.TestCase):
         return super().setUp()
 
     def tearDown(self) -> None:
-        """Close cursor and delete test database."""
-        q = "select name from sqlite_master where type='table'"
-        run(self.cursor.execute(q))
-        results = run(self.cursor.fetchall())
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                run(self.cursor.execute(q))
-            except BaseException as e:
-                print(e)
-        run(self.cursor.close())
-        run(self.db.close())
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        """Delete test database."""
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         return super().tearDown()
 
     # Relation tests
@@ -336,6 +344,17 @@ class TestRelations(unittest.TestCase):
         assert owned.data['details'] == '321'
         assert owned.data['owner_id'] == owner.data['id']
 
+    def test_async_has_one_function_fixes_default_foreign_id_column(self):
+        self.OwnerModel.__name__ = 'Owner'
+        self.OwnerModel.owned = async_relations.async_has_one(
+            self.OwnerModel,
+            self.OwnedModel
+        )
+        self.OwnerModel.__name__ = 'Renamed'
+
+        owner = run(self.OwnerModel.insert({'details': '321'}))
+        assert owner.owned().foreign_id_column == 'owner_id'
+
     def test_async_has_one_function_sets_property_from_AsyncHasOne(self):
         self.OwnerModel.owned = async_relations.async_has_one(
             self.OwnerModel,
@@ -403,6 +422,81 @@ class TestRelations(unittest.TestCase):
         assert owner.owned
         assert owner.owned.id == owned.id
 
+    def test_async_related_property_creates_relation_on_first_use(self):
+        self.OwnerModel.owned = async_relations.async_has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = run(self.OwnerModel.insert({'details': '321'}))
+        assert owner.relations == {}
+        owned = run(self.OwnedModel.insert({'details': '321'}))
+        owner.owned = [owned]
+        assert len(owner.relations) == 1
+        assert owner.owned().primary is owner
+
+    def test_async_related_property_reuses_tuple_until_secondary_changes(self):
+        self.OwnerModel.owned = async_relations.async_has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = run(self.OwnerModel.insert({'details': '321'}))
+        owned1 = run(self.OwnedModel.insert({'details': '1'}))
+        owned2 = run(self.OwnedModel.insert({'details': '2'}))
+
+        owner.owned = [owned1, owned2, owned2]
+        models = owner.owned
+        assert models == (owned1, owned2)
+        assert owner.owned is models
+
+        owner.owned = [owned2]
+        assert owner.owned is not models
+        assert owner.owned == (owned2,)
+        assert owner.owned() is models()
+
+        # empty collections are reused as well
+        unsaved = self.OwnerModel({'details': 'unsaved'})
+        assert unsaved.owned == ()
+        assert unsaved.owned is unsaved.owned
+
+    def test_async_related_property_membership_checks_identity_and_equality(self):
+        self.OwnerModel.owned = async_relations.async_has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = run(self.OwnerModel.insert({'details': '321'}))
+        owned1 = run(self.OwnedModel.insert({'details': '1'}))
+        owned2 = run(self.OwnedModel.insert({'details': '2'}))
+        owner.owned = [owned1]
+
+        assert owned1 in owner.owned
+        assert owned2 not in owner.owned
+        assert self.OwnedModel(data={**owned1.data}) in owner.owned
+        changed = self.OwnedModel(data={**owned1.data, 'details': 'changed'})
+        assert changed not in owner.owned
+        assert 'not a model' not in owner.owned
+
+    def test_async_has_one_related_property_rebuilds_missing_relation(self):
+        self.OwnerModel.owned = async_relations.async_has_one(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = run(self.OwnerModel.insert({'details': '321'}))
+        owned = run(self.OwnedModel.insert({
+            'details': '321',
+            'owner_id': owner.id,
+        }))
+        owner.relations = {}
+        assert owner.owned
+        assert owner.owned.id == owned.id
+
     # AsyncHasMany tests
     def test_AsyncHasMany_extends_Relation(self):
         assert issubclass(async_relations.AsyncHasMany, async_relations.AsyncRelation)
@@ -516,6 +610,38 @@ class TestRelations(unittest.TestCase):
         assert not len(hasmany.secondary_to_add)
         assert not len(hasmany.secondary_to_remove)
 
+    def test_AsyncHasMany_save_skips_queries_when_nothing_changed(self):
+        updates = []
+        class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+            async def update(self, updates_: dict, conditions: dict = {}) -> int:
+                updates.append(updates_)
+                return await super().update(updates_, conditions)
+        self.OwnedModel.query_builder_class = QueryBuilder
+
+        hasmany = async_relations.AsyncHasMany(
+            'owner_id',
+            primary_class=self.OwnerModel,
+            secondary_class=self.OwnedModel
+        )
+        hasmany.primary = run(self.OwnerModel.insert({'details': 'owner'}))
+        hasmany.secondary = [run(self.OwnedModel.insert({'details': 'owned'}))]
+        run(hasmany.save())
+        assert len(updates) == 1
+        run(hasmany.save())
+        assert len(updates) == 1
+
+        run(hasmany.reload())
+        run(hasmany.save())
+        assert len(updates) == 1
+
+        hasmany.secondary = [
+            *hasmany.secondary,
+            run(self.OwnedModel.insert({'details': 'owned2'}))
+        ]
+        run(hasmany.save())
+        assert len(updates) == 2
+        assert len(run(hasmany.reload()).secondary) == 2
+
     def test_AsyncHasMany_changing_primary_and_secondary_updates_models_correctly(self):
         hasmany = async_relations.AsyncHasMany(
             'owner_id',
@@ -870,15 +996,125 @@ class TestRelations(unittest.TestCase):
         owner2 = run(self.OwnerModel.insert({'details': 'owner2'}))
 
         owned1.owner = owner1
-        run(owned1.owner().save())
-
         owned2.owner = owner2
-        run(owned2.owner().save())
+        run(run_together(owned1.owner().save(), owned2.owner().save()))
 
         assert owned1.owner() is not owned2.owner()
         assert owned1.owner.data['id'] == owner1.data['id']
         assert owned2.owner.data['id'] == owner2.data['id']
 
+    def test_AsyncBelongsTo_concurrent_reloads_share_one_query(self):
+        queries = []
+        flushes = []
+        class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+            async def get(self):
+                queries.append(self.to_sql())
+                flushes.append(len(async_relations._reload_batcher.tasks))
+                return await super().get()
+        self.OwnerModel.query_builder_class = QueryBuilder
+
+        owner1 = run(self.OwnerModel.insert({'details': 'owner1'}))
+        owner2 = run(self.OwnerModel.insert({'details': 'owner2'}))
+        relations = []
+        for owner in (owner1, owner2, owner2, None):
+            relations.append(async_relations.AsyncBelongsTo(
+                'owner_id',
+                primary_class=self.OwnedModel,
+                secondary_class=self.OwnerModel,
+                primary=run(self.OwnedModel.insert({
+                    'details': 'owned',
+                    'owner_id': owner.id if owner else '123',
+                })),
+            ))
+
+        run(run_together(*[r.reload() for r in relations]))
+        assert len(queries) == 1
+        # the flush task is referenced until it finishes
+        assert flushes == [1], flushes
+        assert not async_relations._reload_batcher.tasks
+        assert relations[0].secondary.data == owner1.data
+        assert relations[1].secondary.data == owner2.data
+        assert relations[2].secondary.data == owner2.data
+        assert relations[1].secondary is not relations[2].secondary
+        assert relations[3].secondary is None
+
+    def test_AsyncBelongsTo_reloads_are_not_batched_across_transactions(self):
+        queries = []
+        class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+            async def get(self):
+                queries.append(self.to_sql())
+                return await super().get()
+        self.OwnerModel.query_builder_class = QueryBuilder
+
+        owner = run(self.OwnerModel.insert({'details': 'committed'}))
+        owned = run(self.OwnedModel.insert({
+            'details': 'owned', 'owner_id': owner.id,
+        }))
+
+        def relation():
+            return async_relations.AsyncBelongsTo(
+                'owner_id',
+                primary_class=self.OwnedModel,
+                secondary_class=self.OwnerModel,
+                primary=owned,
+            )
+        inside, outside = relation(), relation()
+        started = asyncio.Event()
+
+        async def in_transaction():
+            try:
+                async with async_classes.async_transaction(DB_FILEPATH):
+                    await self.OwnerModel.query({'id': owner.id}).update(
+                        {'details': 'uncommitted'}
+                    )
+                    started.set()
+                    await inside.reload()
+                    raise ValueError('roll back')
+            except ValueError:
+                pass
+
+        async def out_of_transaction():
+            await started.wait()
+            await outside.reload()
+
+        run(run_together(in_transaction(), out_of_transaction()))
+        assert len(queries) == 2, queries
+        assert inside.secondary.data['details'] == 'uncommitted'
+        assert outside.secondary.data['details'] == 'committed'
+        assert run(self.OwnerModel.find(owner.id)).data['details'] == 'committed'
+
+    def test_AsyncBelongsTo_reload_uses_identity_map(self):
+        queries = []
+        class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+            async def get(self):
+                queries.append(self.to_sql())
+                return await super().get()
+        self.OwnerModel.query_builder_class = QueryBuilder
+
+        async def reload():
+            async with async_classes.async_identity_map():
+                owner = await self.OwnerModel.insert({'details': 'owner'})
+                belongsto = async_relations.AsyncBelongsTo(
+                    'owner_id',
+                    primary_class=self.OwnedModel,
+                    secondary_class=self.OwnerModel,
+                    primary=await self.OwnedModel.insert({
+                        'details': 'owned',
+                        'owner_id': owner.id,
+                    }),
+                )
+                await belongsto.reload()
+                return owner, belongsto
+
+        owner, belongsto = run(reload())
+        assert len(queries) == 0
+        assert belongsto.secondary is owner
+
+        run(belongsto.reload())
+        assert len(queries) == 1
+        assert belongsto.secondary is not owner
+        assert belongsto.secondary.data == owner.data
+
     def test_AsyncBelongsTo_reload_raises_ValueError_for_empty_relation(self):
         belongsto = async_relations.AsyncBelongsTo(
             'owner_id',
@@ -1030,6 +1266,77 @@ class TestRelations(unittest.TestCase):
         assert not len(belongstomany.secondary_to_add)
         assert not len(belongstomany.secondary_to_remove)
 
+    def test_AsyncBelongsToMany_secondary_setter_tracks_changes_across_reassignment(self):
+        belongstomany = async_relations.AsyncBelongsToMany(
+            Pivot,
+            'first_id',
+            'second_id',
+            primary_class=self.OwnedModel,
+            secondary_class=self.OwnerModel
+        )
+        primary = run(self.OwnedModel.insert({'details':'321'}))
+        secondary1 = run(self.OwnerModel.insert({'details': '321ads'}))
+        secondary2 = run(self.OwnerModel.insert({'details': 'sdsdsd'}))
+
+        belongstomany.primary = primary
+        belongstomany.secondary = [secondary1]
+        belongstomany.secondary = [secondary1, secondary2]
+        assert belongstomany.secondary_to_add == [secondary1, secondary2]
+        assert belongstomany.secondary_to_remove == []
+
+        belongstomany.secondary = [secondary2]
+        assert belongstomany.secondary_to_add == [secondary2]
+        assert belongstomany.secondary_to_remove == []
+
+        run(belongstomany.save())
+        assert run(Pivot.query().count()) == 1
+
+    def test_AsyncBelongsToMany_save_does_not_duplicate_existing_pivots(self):
+        belongstomany = async_relations.AsyncBelongsToMany(
+            Pivot,
+            'first_id',
+            'second_id',
+            primary_class=self.OwnedModel,
+            secondary_class=self.OwnerModel
+        )
+        primary = run(self.OwnedModel.insert({'details':'321'}))
+        secondary1 = run(self.OwnerModel.insert({'details': '321ads'}))
+        secondary2 = run(self.OwnerModel.insert({'details': 'sdsdsd'}))
+
+        belongstomany.primary = primary
+        belongstomany.secondary = [secondary1]
+        run(belongstomany.save())
+        assert run(Pivot.query().count()) == 1
+
+        belongstomany.secondary = [secondary1, secondary2]
+        run(belongstomany.save())
+        assert run(Pivot.query().count()) == 2
+
+    def test_AsyncBelongsToMany_reload_loads_each_secondary_once(self):
+        belongstomany = async_relations.AsyncBelongsToMany(
+            Pivot,
+            'first_id',
+            'second_id',
+            primary_class=self.OwnedModel,
+            secondary_class=self.OwnerModel
+        )
+        primary = run(self.OwnedModel.insert({'details':'321'}))
+        secondary1 = run(self.OwnerModel.insert({'details': '321ads'}))
+        secondary2 = run(self.OwnerModel.insert({'details': 'sdsdsd'}))
+        run(Pivot.insert_many([
+            {'first_id': primary.id, 'second_id': secondary1.id},
+            {'first_id': primary.id, 'second_id': secondary1.id},
+            {'first_id': primary.id, 'second_id': secondary2.id},
+        ]))
+
+        belongstomany.primary = primary
+        run(belongstomany.reload())
+        assert len(belongstomany.secondary) == 2
+        by_id = {s.id: s for s in belongstomany.secondary}
+        assert by_id[secondary1.id].data == secondary1.data
+        assert by_id[secondary2.id].data == secondary2.data
+        assert type(by_id[secondary1.id]) is self.OwnerModel
+
     def test_AsyncBelongsToMany_changing_primary_and_secondary_updates_models_correctly(self):
         belongstomany = async_relations.AsyncBelongsToMany(
             Pivot,
@@ -1155,10 +1462,8 @@ class TestRelations(unittest.TestCase):
         owner2 = run(self.OwnerModel.insert({'details': 'owner2'}))
 
         owned1.owners = [owner1]
-        run(owned1.owners().save())
-
         owned2.owners = [owner2]
-        run(owned2.owners().save())
+        run(run_together(owned1.owners().save(), owned2.owners().save()))
 
         assert owned1.relations != owned2.relations
         assert owned1.owners() is not owned2.owners()
@@ -1418,13 +1723,11 @@ class TestRelations(unittest.TestCase):
         child2 = self.DAGItem({'details': 'child2'})
 
         child1.parents = [parent1]
+        child2.parents = [parent2]
         assert child1.id is None
-        run(child1.parents().save())
+        run(run_together(child1.parents().save(), child2.parents().save()))
         assert child1.id is not None
 
-        child2.parents = [parent2]
-        run(child2.parents().save())
-
         assert child1.relations != child2.relations
         assert child1.parents() is not child2.parents()
         assert child1.parents[0].data['id'] == parent1.data['id']
@@ -1538,6 +1841,47 @@ class TestRelations(unittest.TestCase):
         run(within.save())
         assert run(within.query().count()) == 1
 
+    def test_AsyncWithin_save_skips_unchanged_secondaries(self):
+        within = async_relations.AsyncWithin(
+            'parent_ids',
+            primary_class=self.DAGItem,
+            secondary_class=self.DAGItem
+        )
+        primary = run(self.DAGItem.insert({'details': '321ads'}))
+        secondary = self.DAGItem({'details':'321'})
+
+        within.primary = primary
+        within.secondary = [secondary]
+        run(within.save())
+
+        saved = []
+        def hook(cls, *args, **kwargs):
+            saved.append(kwargs['self'])
+        self.DAGItem.add_hook('before_save', hook)
+        run(within.save())
+        assert saved == []
+
+        secondary.data['details'] = 'changed'
+        run(within.save())
+        assert saved == [secondary]
+
+    def test_AsyncWithin_save_inserts_new_secondaries_with_preset_ids(self):
+        within = async_relations.AsyncWithin(
+            'owner_id',
+            primary_class=self.OwnerModel,
+            secondary_class=self.OwnedModel
+        )
+        primary = run(self.OwnerModel.insert({'details': 'owner'}))
+        secondary = self.OwnedModel({
+            'id': 'owned1', 'owner_id': primary.id, 'details': '321'
+        })
+
+        within.primary = primary
+        within.secondary = [secondary]
+        run(within.save())
+        assert run(self.OwnedModel.find('owned1')) is not None
+        assert run(within.query().count()) == 1
+
     def test_AsyncWithin_save_unsets_change_tracking_properties(self):
         within = async_relations.AsyncWithin(
             'parent_ids',
@@ -1685,7 +2029,7 @@ class TestRelations(unittest.TestCase):
         parent2.children = [child2]
         run(parent2.children().save())
 
-        assert child1.relations != child2.relations
+        assert child1.children() is not child2.children()
         assert parent1.children() is not parent2.children()
         assert parent1.children[0].data['id'] == child1.data['id']
         assert parent2.children[0].data['id'] == child2.data['id']
@@ -1716,6 +2060,197 @@ class TestRelations(unittest.TestCase):
         assert len(parent.children) == 1
         assert parent.children[0].id == child.id
 
+    # prefetch tests
+    def _count_queries(self, model_class) -> list:
+        queries = []
+        class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+            async def get(self):
+                queries.append(self.to_sql())
+                return await super().get()
+        model_class.query_builder_class = QueryBuilder
+        return queries
+
+    def test_async_prefetch_loads_has_many_with_one_query(self):
+        self.OwnerModel.owned = async_relations.async_has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+        owners = [
+            run(self.OwnerModel.insert({'details': 'owner1'})),
+            run(self.OwnerModel.insert({'details': 'owner2'})),
+            run(self.OwnerModel.insert({'details': 'owner3'})),
+        ]
+        owned1 = run(self.OwnedModel.insert({'details': '1', 'owner_id': owners[0].id}))
+        owned2 = run(self.OwnedModel.insert({'details': '2', 'owner_id': owners[0].id}))
+        owned3 = run(self.OwnedModel.insert({'details': '3', 'owner_id': owners[1].id}))
+        owners = [run(self.OwnerModel.find(o.id)) for o in owners]
+        queries = self._count_queries(self.OwnedModel)
+
+        assert run(async_relations.async_prefetch(owners, 'owned')) is owners
+        assert len(queries) == 1
+        assert owners[0].owned == (owned1, owned2)
+        assert owners[1].owned == (owned3,)
+        assert owners[2].owned == ()
+        assert len(queries) == 1
+
+    def test_async_prefetch_loads_belongs_to_with_one_query(self):
+        self.OwnedModel.owner = async_relations.async_belongs_to(
+            self.OwnedModel,
+            self.OwnerModel,
+            'owner_id'
+        )
+        owner1 = run(self.OwnerModel.insert({'details': 'owner1'}))
+        owner2 = run(self.OwnerModel.insert({'details': 'owner2'}))
+        owned = [
+            run(self.OwnedModel.insert({'details': '1', 'owner_id': owner1.id})),
+            run(self.OwnedModel.insert({'details': '2', 'owner_id': owner2.id})),
+            run(self.OwnedModel.insert({'details': '3', 'owner_id': owner2.id})),
+        ]
+        queries = self._count_queries(self.OwnerModel)
+
+        run(async_relations.async_prefetch(owned, 'owner'))
+        assert len(queries) == 1
+        assert owned[0].owner.data == owner1.data
+        assert owned[1].owner.data == owner2.data
+        assert owned[2].owner.data == owner2.data
+        assert len(queries) == 1
+
+    def test_async_prefetch_loads_belongs_to_many_with_one_query(self):
+        self.OwnedModel.owners = async_relations.async_belongs_to_many(
+            self.OwnedModel,
+            self.OwnerModel,
+            Pivot,
+            'first_id',
+            'second_id',
+        )
+        owner1 = run(self.OwnerModel.insert({'details': 'owner1'}))
+        owner2 = run(self.OwnerModel.insert({'details': 'owner2'}))
+        owned = [
+            run(self.OwnedModel.insert({'details': '1'})),
+            run(self.OwnedModel.insert({'details': '2'})),
+            run(self.OwnedModel.insert({'details': '3'})),
+        ]
+        owned[0].owners = [owner1, owner2]
+        run(owned[0].owners().save())
+        owned[1].owners = [owner2]
+        run(owned[1].owners().save())
+        owned = [run(self.OwnedModel.find(o.id)) for o in owned]
+        queries = self._count_queries(self.OwnerModel)
+
+        run(async_relations.async_prefetch(owned, 'owners'))
+        assert len(queries) == 1
+        assert len(owned[0].owners) == 2
+        assert owner1 in owned[0].owners and owner2 in owned[0].owners
+        assert owned[1].owners == (owner2,)
+        assert owned[2].owners == ()
+        assert len(queries) == 1
+
+    def test_async_prefetch_loads_contains_with_one_query(self):
+        self.DAGItem.parents = async_relations.async_contains(
+            self.DAGItem,
+            self.DAGItem,
+            'parent_ids',
+        )
+        parent1 = run(self.DAGItem.insert({'details': 'parent1'}))
+        parent2 = run(self.DAGItem.insert({'details': 'parent2'}))
+        child1 = run(self.DAGItem.insert({'details': 'child1', 'parent_ids': parent1.id}))
+        child2 = run(self.DAGItem.insert({'details': 'child2', 'parent_ids': ','.join(sorted([parent1.id, parent2.id]))}))
+        children = [run(self.DAGItem.find(child1.id)), run(self.DAGItem.find(child2.id))]
+        queries = self._count_queries(self.DAGItem)
+
+        run(async_relations.async_prefetch(children, 'parents'))
+        assert len(queries) == 1
+        assert children[0].parents == (parent1,)
+        assert len(children[1].parents) == 2
+        assert parent1 in children[1].parents and parent2 in children[1].parents
+        assert len(queries) == 1
+
+    def test_async_prefetch_loads_within_for_each_relation(self):
+        self.DAGItem.children = async_relations.async_within(
+            self.DAGItem,
+            self.DAGItem,
+            'parent_ids',
+        )
+        parent1 = run(self.DAGItem.insert({'details': 'parent1'}))
+        parent2 = run(self.DAGItem.insert({'details': 'parent2'}))
+        child1 = run(self.DAGItem.insert({'details': 'child1', 'parent_ids': parent1.id}))
+        child2 = run(self.DAGItem.insert({'details': 'child2', 'parent_ids': ','.join(sorted([parent1.id, parent2.id]))}))
+        parents = [run(self.DAGItem.find(parent1.id)), run(self.DAGItem.find(parent2.id))]
+        queries = self._count_queries(self.DAGItem)
+
+        run(async_relations.async_prefetch(parents, 'children'))
+        assert len(queries) == 2
+        assert type(parents[0].children().secondary) is tuple
+        assert len(parents[0].children) == 2
+        assert child1 in parents[0].children and child2 in parents[0].children
+        assert parents[1].children == (child2,)
+        assert len(queries) == 2
+
+    def test_async_prefetch_marks_missing_single_relations_as_loaded(self):
+        self.OwnerModel.owned = async_relations.async_has_one(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+        self.OwnedModel.owner = async_relations.async_belongs_to(
+            self.OwnedModel,
+            self.OwnerModel,
+            'owner_id'
+        )
+        owners = [run(self.OwnerModel.insert({'details': 'no owned'}))]
+        owned = [
+            run(self.OwnedModel.insert({'details': '1', 'owner_id': '123'})),
+            run(self.OwnedModel.insert({'details': '2', 'owner_id': None})),
+        ]
+        def count_queries(model_class) -> list:
+            queries = []
+            class QueryBuilder(async_classes.AsyncSqlQueryBuilder):
+                async def get(self):
+                    queries.append('get')
+                    return await super().get()
+                async def first(self):
+                    queries.append('first')
+                    return await super().first()
+                async def find(self, id):
+                    queries.append('find')
+                    return await super().find(id)
+            model_class.query_builder_class = QueryBuilder
+            return queries
+        owned_queries = count_queries(self.OwnedModel)
+        owner_queries = count_queries(self.OwnerModel)
+
+        run(async_relations.async_prefetch(owners, 'owned'))
+        run(async_relations.async_prefetch(owned, 'owner'))
+        assert len(owned_queries) == 1
+        assert len(owner_queries) == 1
+        assert not owners[0].owned
+        assert not owned[0].owner
+        assert not owned[1].owner
+        assert len(owned_queries) == 1
+        assert len(owner_queries) == 1
+
+    def test_async_relation_of_returns_relation_of_related_property(self):
+        self.OwnerModel.owned = async_relations.async_has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+        owner = run(self.OwnerModel.insert({'details': 'owner'}))
+        relation = async_relations.async_relation_of(owner, 'owned')
+        assert isinstance(relation, async_relations.AsyncHasMany)
+        assert relation is owner.owned()
+        with self.assertRaises(TypeError) as e:
+            async_relations.async_relation_of(owner, 'details')
+        assert str(e.exception) == 'details must be a related property'
+
+    def test_async_prefetch_raises_TypeError_for_invalid_name(self):
+        owner = run(self.OwnerModel.insert({'details': 'owner'}))
+        with self.assertRaises(TypeError) as e:
+            run(async_relations.async_prefetch([owner], 'details'))
+        assert str(e.exception) == 'details must be a related property'
+        assert run(async_relations.async_prefetch([], 'details')) == []
+
     # e2e tests
     def test_AsyncHasOne_AsyncBelongsTo_e2e(self):
         self.OwnerModel.__name__ = 'Owner'
@@ -1,15 +1,63 @@
 from secrets import token_bytes
-from context import classes, errors, interfaces
-from genericpath import isfile
+from context import classes, errors, interfaces, db_path
+from contextlib import nullcontext
 from hashlib import sha256
+from pathlib import Path
 from types import GeneratorType
+import gc
 import os
 import packify
+import shutil
 import sqlite3
+import threading
 import unittest
+import weakref
+
+
+DB_FILEPATH = db_path('classes') + '.db'
+TEMPLATE_DB_FILEPATH = db_path('classes') + '_template.db'
+
+EXAMPLE_COLUMNS = '''
+    id text,
+    field1 text, field2 integer, field3 boolean, field4 blob,
+    field5 real, field1n text nullable, field2n integer nullable,
+    field3n boolean nullable, field4n blob nullable, field5n real nullable,
+    field1d text default 'foobar', field2d integer default 123,
+    field3d boolean default true, field4d blob default (x'313233'),
+    field5d real default 1.23, field1nd text nullable default 'foobar',
+    field2nd integer nullable default 123, field3nd boolean nullable default true,
+    field4nd blob nullable default (x'313233'), field5nd real nullable default 1.23
+'''
+
+SCHEMA = f'''
+    create table deleted_records (id text not null,
+        model_class text not null, record_id text not null,
+        record blob not null, timestamp text not null);
+    create table example (id text, name text);
+    create table hashed_records (id text, details text);
+    create table hashed_subclass (id text, column1 text, column2 text);
+    create table attachments (id text,
+        related_model text, related_id text, details blob);
+    create table example_models ({EXAMPLE_COLUMNS});
+    create table example_hashed_models ({EXAMPLE_COLUMNS});
+'''
+
+# values and their expected encode_value outputs
+ENCODE_VALUE_CASES = [
+    (value, packify.pack(value).hex())
+    for value in (
+        b'123',
+        [b'123', b'321'],
+        (b'123', b'321'),
+        {b'123': b'321', 1: '123'},
+    )
+]
 
-
-DB_FILEPATH = 'test.db'
+DEFAULT_STR = classes.Default['foobar']
+DEFAULT_INT = classes.Default[123]
+DEFAULT_BOOL = classes.Default[True]
+DEFAULT_BYTES = classes.Default[b'123']
+DEFAULT_FLOAT = classes.Default[1.23]
 
 
 class ExampleModel(classes.SqlModel):
@@ -31,16 +79,16 @@ class ExampleModel(classes.SqlModel):
     field3n: bool|None
     field4n: bytes|None
     field5n: float|None
-    field1d: str|classes.Default['foobar']
-    field2d: int|classes.Default[123]
-    field3d: bool|classes.Default[True]
-    field4d: bytes|classes.Default[b'123']
-    field5d: float|classes.Default[1.23]
-    field1nd: str|None|classes.Default['foobar']
-    field2nd: int|None|classes.Default[123]
-    field3nd: bool|None|classes.Default[True]
-    field4nd: bytes|None|classes.Default[b'123']
-    field5nd: float|None|classes.Default[1.23]
+    field1d: str|DEFAULT_STR
+    field2d: int|DEFAULT_INT
+    field3d: bool|DEFAULT_BOOL
+    field4d: bytes|DEFAULT_BYTES
+    field5d: float|DEFAULT_FLOAT
+    field1nd: str|None|DEFAULT_STR
+    field2nd: int|None|DEFAULT_INT
+    field3nd: bool|None|DEFAULT_BOOL
+    field4nd: bytes|None|DEFAULT_BYTES
+    field5nd: float|None|DEFAULT_FLOAT
 
 class ExampleHashedModel(classes.HashedModel):
     connection_info = DB_FILEPATH
@@ -61,88 +109,79 @@ class ExampleHashedModel(classes.HashedModel):
     field3n: bool|None
     field4n: bytes|None
     field5n: float|None
-    field1d: str|classes.Default['foobar']
-    field2d: int|classes.Default[123]
-    field3d: bool|classes.Default[True]
-    field4d: bytes|classes.Default[b'123']
-    field5d: float|classes.Default[1.23]
-    field1nd: str|None|classes.Default['foobar']
-    field2nd: int|None|classes.Default[123]
-    field3nd: bool|None|classes.Default[True]
-    field4nd: bytes|None|classes.Default[b'123']
-    field5nd: float|None|classes.Default[1.23]
+    field1d: str|DEFAULT_STR
+    field2d: int|DEFAULT_INT
+    field3d: bool|DEFAULT_BOOL
+    field4d: bytes|DEFAULT_BYTES
+    field5d: float|DEFAULT_FLOAT
+    field1nd: str|None|DEFAULT_STR
+    field2nd: int|None|DEFAULT_INT
+    field3nd: bool|None|DEFAULT_BOOL
+    field4nd: bytes|None|DEFAULT_BYTES
+    field5nd: float|None|DEFAULT_FLOAT
 
 
 class TestClasses(unittest.TestCase):
     db: sqlite3.Connection = None
     cursor: sqlite3.Cursor = None
 
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Couple these models to db_filepath for testing purposes and
+            build the schema once into a template database. The
+            template is put in WAL mode, which persists in the copy
+            each test uses, so commits append to the log instead of
+            rewriting a rollback journal.
+        """
+        cls.models = (
+            classes.SqlModel, classes.DeletedModel,
+            classes.HashedModel, classes.Attachment,
+        )
+        cls.original_connection_info = {
+            model: model.__dict__.get('connection_info', None)
+            for model in cls.models
+        }
+        for model in cls.models:
+            model.connection_info = DB_FILEPATH
+
+        Path(TEMPLATE_DB_FILEPATH).unlink(missing_ok=True)
+        db = sqlite3.connect(TEMPLATE_DB_FILEPATH)
+        db.execute('pragma journal_mode=wal')
+        db.executescript(SCHEMA)
+        db.commit()
+        db.close()
+        return super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Delete the template database and restore the models'
+            original connection_info.
+        """
+        Path(TEMPLATE_DB_FILEPATH).unlink(missing_ok=True)
+        for model, connection_info in cls.original_connection_info.items():
+            if connection_info is None:
+                del model.connection_info
+            else:
+                model.connection_info = connection_info
+        return super().tearDownClass()
+
     def setUp(self) -> None:
-        """Set up the test database."""
-        try:
-            if isfile(DB_FILEPATH):
-                os.remove(DB_FILEPATH)
-        except:
-            ...
+        """Set up the test database from the template."""
+        shutil.copyfile(TEMPLATE_DB_FILEPATH, DB_FILEPATH)
         self.db = sqlite3.connect(DB_FILEPATH)
         self.cursor = self.db.cursor()
-        self.cursor.execute('create table deleted_records (id text not null, ' +
-            'model_class text not null, record_id text not null, ' +
-            'record blob not null, timestamp text not null)')
-        self.cursor.execute('create table example (id text, name text)')
-        self.cursor.execute('create table hashed_records (id text, details text)')
-        self.cursor.execute('create table hashed_subclass (id text, column1 text, column2 text)')
-        self.cursor.execute('create table attachments (id text, ' +
-            'related_model text, related_id text, details blob)')
-        self.cursor.execute('create table example_models (id text, ' +
-            'field1 text, field2 integer, field3 boolean, field4 blob, ' +
-            'field5 real, field1n text nullable, field2n integer nullable, ' +
-            'field3n boolean nullable, field4n blob nullable, field5n real nullable, ' +
-            "field1d text default 'foobar', field2d integer default 123, " +
-            "field3d boolean default true, field4d blob default (x'313233'), " +
-            'field5d real default 1.23, field1nd text nullable default ''foobar'', ' +
-            'field2nd integer nullable default 123, field3nd boolean nullable default true, ' +
-            "field4nd blob nullable default (x'313233'), field5nd real nullable default 1.23)")
-        self.cursor.execute('create table example_hashed_models (id text, ' +
-            'field1 text, field2 integer, field3 boolean, field4 blob, ' +
-            'field5 real, field1n text nullable, field2n integer nullable, ' +
-            'field3n boolean nullable, field4n blob nullable, field5n real nullable, ' +
-            'field1d text default ''foobar'', field2d integer default 123, ' +
-            'field3d boolean default true, field4d blob default X''313233'', ' +
-            'field5d real default 1.23, field1nd text nullable default ''foobar'', ' +
-            'field2nd integer nullable default 123, field3nd boolean nullable default true, ' +
-            'field4nd blob nullable default X''313233'', field5nd real nullable default 1.23)')
-
         return super().setUp()
 
-    def setUpClass() -> None:
-        """Couple these models to db_filepath for testing purposes."""
-        classes.SqlModel.connection_info = DB_FILEPATH
-        classes.DeletedModel.connection_info = DB_FILEPATH
-        classes.HashedModel.connection_info = DB_FILEPATH
-        classes.Attachment.connection_info = DB_FILEPATH
-
     def tearDown(self) -> None:
         """Close cursor and delete test database."""
         classes.SqlModel.clear_hooks()
         classes.HashedModel.clear_hooks()
         classes.DeletedModel.clear_hooks()
         classes.Attachment.clear_hooks()
-        q = "select name from sqlite_master where type='table'"
-        self.cursor.execute(q)
-        results = self.cursor.fetchall()
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                self.cursor.execute(q)
-            except BaseException as e:
-                print(e)
         self.cursor.close()
         self.db.close()
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        classes.close_pooled_connections()
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         return super().tearDown()
 
     # general tests
@@ -182,11 +221,124 @@ class TestClasses(unittest.TestCase):
             with classes.SqliteContext(str):
                 ...
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^connection_info must be str'):
             with classes.SqliteContext([]):
                 ...
-        assert 'connection_info' in str(e.exception), str(e.exception)
-        assert 'must be str' in str(e.exception)
+
+    def test_SqliteContext_does_not_pool_connections_by_default(self):
+        assert classes.CONNECTION_POOL_SIZE == 0
+        cxm = classes.SqliteContext(DB_FILEPATH)
+        with cxm as cursor:
+            cursor.execute('select 1')
+        with classes.SqliteContext(DB_FILEPATH) as cursor:
+            assert cursor.connection is not cxm.connection
+        with self.assertRaises(sqlite3.ProgrammingError):
+            cxm.connection.execute('select 1')
+
+    def test_SqliteContext_reuses_pooled_connections(self):
+        classes.CONNECTION_POOL_SIZE = 4
+        try:
+            cxm = classes.SqliteContext(DB_FILEPATH)
+            with cxm as cursor:
+                cursor.execute('select 1')
+            with classes.SqliteContext(DB_FILEPATH) as cursor:
+                assert cursor.connection is cxm.connection
+
+            # connections are not pooled after a rollback
+            with self.assertRaises(ValueError):
+                with classes.SqliteContext(DB_FILEPATH) as cursor:
+                    rolled_back = cursor.connection
+                    raise ValueError('rollback')
+            with classes.SqliteContext(DB_FILEPATH) as cursor:
+                assert cursor.connection is not rolled_back
+                pooled = cursor.connection
+
+            # closing the pool makes the next context connect anew
+            classes.close_pooled_connections(DB_FILEPATH)
+            with classes.SqliteContext(DB_FILEPATH) as cursor:
+                assert cursor.connection is not pooled
+
+            # in-memory databases are never pooled
+            cxm = classes.SqliteContext(':memory:')
+            with cxm as cursor:
+                ...
+            with classes.SqliteContext(':memory:') as cursor:
+                assert cursor.connection is not cxm.connection
+        finally:
+            classes.CONNECTION_POOL_SIZE = 0
+
+    def test_close_pooled_connections_can_close_other_threads_connections(self):
+        classes.CONNECTION_POOL_SIZE = 4
+        pooled, queried, done = [], threading.Event(), threading.Event()
+        def query():
+            with classes.SqliteContext(DB_FILEPATH) as cursor:
+                cursor.execute('select 1')
+                pooled.append(cursor.connection)
+            queried.set()
+            done.wait(5) # keep the thread and its pool alive
+        thread = threading.Thread(target=query)
+        try:
+            thread.start()
+            assert queried.wait(5)
+            # only the current thread's pool is closed by default
+            classes.close_pooled_connections()
+            pooled[0].execute('select 1')
+            classes.close_pooled_connections(all_threads=True)
+            with self.assertRaises(sqlite3.ProgrammingError):
+                pooled[0].execute('select 1')
+        finally:
+            done.set()
+            thread.join()
+            classes.CONNECTION_POOL_SIZE = 0
+
+    def test_transaction_commits_queries_together(self):
+        with classes.transaction(DB_FILEPATH):
+            classes.SqlModel.insert({'name': 'Alice'})
+            classes.SqlModel.insert({'name': 'Bob'})
+            # not visible to other connections until committed
+            assert self.cursor.execute('select count(*) from example').fetchone()[0] == 0
+            assert classes.SqlModel.query().count() == 2
+        assert self.cursor.execute('select count(*) from example').fetchone()[0] == 2
+
+    def test_transaction_rolls_back_on_exception(self):
+        with self.assertRaises(ValueError):
+            with classes.transaction(DB_FILEPATH):
+                classes.SqlModel.insert({'name': 'Alice'})
+                raise ValueError('abort')
+        assert classes.SqlModel.query().count() == 0
+
+    def test_identity_map_returns_loaded_instances(self):
+        model = classes.SqlModel.insert({'name': 'Alice'})
+        assert classes.SqlModel.find(model.id) is not model
+
+        with classes.identity_map():
+            found = classes.SqlModel.find(model.id)
+            assert classes.SqlModel.find(model.id) is found
+            inserted = classes.SqlModel.insert({'name': 'Bob'})
+            assert classes.SqlModel.find(inserted.id) is inserted
+
+            # stored values are read again by reload
+            self.cursor.execute("update example set name = 'Carol'")
+            self.db.commit()
+            assert found.reload().name == 'Carol'
+
+            # writes through the query builder clear the map
+            classes.SqlModel.query().equal('id', inserted.id).update({'name': 'Dave'})
+            found_again = classes.SqlModel.find(inserted.id)
+            assert found_again is not inserted
+            assert found_again.name == 'Dave'
+
+        assert classes.SqlModel.find(inserted.id) is not found_again
+
+    def test_transaction_nested_blocks_join_outer_transaction(self):
+        with self.assertRaises(ValueError):
+            with classes.transaction(DB_FILEPATH) as outer:
+                with classes.transaction(DB_FILEPATH) as inner:
+                    assert inner is outer
+                    classes.SqlModel.insert({'name': 'Alice'})
+                classes.SqlModel.insert({'name': 'Bob'})
+                raise ValueError('abort')
+        assert classes.SqlModel.query().count() == 0
 
 
     # SqlModel tests
@@ -200,6 +352,16 @@ class TestClasses(unittest.TestCase):
         model.name = 'Alice'
         assert model.data['name'] == 'Alice'
 
+    def test_SqlModel_columns_are_mapped_once_per_set_of_columns(self):
+        class Derived(classes.SqlModel):
+            columns: tuple[str] = ('id', 'name')
+        Derived({'id': '1'})
+        assert Derived._mapped_columns == ('id', 'name')
+        Derived.columns = ('id', 'name', 'extra')
+        model = Derived({'id': '1', 'extra': 'value'})
+        assert Derived._mapped_columns == ('id', 'name', 'extra')
+        assert model.extra == 'value'
+
     def test_SqlModel_column_property_mapping_disabled_for_colliding_names(self):
         class Derived(classes.SqlModel):
             columns: tuple[str] = ('id', 'name', 'save', 'data')
@@ -228,61 +390,42 @@ class TestClasses(unittest.TestCase):
             ...
 
         TestModel._post_init_hooks = []
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^_post_init_hooks must be a dict mapping names to Callables$'):
             _ = TestModel()
-        assert str(e.exception) == '_post_init_hooks must be a dict mapping names to Callables'
 
         TestModel._post_init_hooks = {'name': 'not callable'}
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^_post_init_hooks must be a dict mapping names to Callables$'):
             _ = TestModel()
-        assert str(e.exception) == '_post_init_hooks must be a dict mapping names to Callables'
 
     def test_SqlModel_encode_value_raises_packify_UsageError_for_unrecognized_type(self):
         with self.assertRaises(packify.UsageError) as e:
             classes.SqlModel.encode_value(classes.SqlModel)
 
     def test_SqlModel_encode_value_encodes_values_properly(self):
-        bstr = b'123'
-        assert classes.SqlModel.encode_value(bstr) == packify.pack(bstr).hex()
-
-        list_of_bytes = [b'123', b'321']
-        expected = packify.pack(list_of_bytes).hex()
-        assert classes.SqlModel.encode_value(list_of_bytes) == expected
-
-        tuple_of_bytes = (b'123', b'321')
-        expected = packify.pack(tuple_of_bytes).hex()
-        assert classes.SqlModel.encode_value(tuple_of_bytes) == expected
-
-        unencoded_dict = {b'123': b'321', 1: '123'}
-        expected = packify.pack(unencoded_dict).hex()
-        assert classes.SqlModel.encode_value(unencoded_dict) == expected
+        for value, expected in ENCODE_VALUE_CASES:
+            with self.subTest(value=value):
+                assert classes.SqlModel.encode_value(value) == expected
 
     def test_SqlModel_insert_raises_TypeError_for_nondict_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
             classes.SqlModel.insert('not a dict')
-        assert str(e.exception) == 'data must be dict'
 
     def test_SqlModel_insert_many_raises_TypeError_for_nonlist_of_dict_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             classes.SqlModel.insert_many('not a list')
-        assert str(e.exception) == 'items must be type list[dict]'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             classes.SqlModel.insert_many(['not a dict'])
-        assert str(e.exception) == 'items must be type list[dict]'
 
     def test_SqlModel_update_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^updates must be dict$'):
             classes.SqlModel().update('not a dict')
-        assert str(e.exception) == 'updates must be dict'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^conditions must be dict or None$'):
             classes.SqlModel().update({}, 'not a dict')
-        assert str(e.exception) == 'conditions must be dict or None'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^instance must have id or conditions defined$'):
             classes.SqlModel().update({})
-        assert str(e.exception) == f'instance must have id or conditions defined'
 
     def test_SqlModel_insert_and_find(self):
         # e2e test
@@ -360,76 +503,45 @@ class TestClasses(unittest.TestCase):
         log = []
         def addlog(*args, **kwargs):
             log.append((args, kwargs))
-        # insert
-        assert len(log) == 0
-        classes.SqlModel.insert({'name': 'foobar'})
-        assert len(log) == 0, log
-        classes.SqlModel.add_hook('before_insert', addlog)
-        classes.SqlModel.add_hook('after_insert', addlog)
-        classes.SqlModel.insert({'name': 'foobar'})
-        assert len(log) == 2, log
-        classes.SqlModel.insert({'name': 'foobar'}, suppress_events = True)
-        assert len(log) == 2, log
-        log.clear()
-        classes.SqlModel.remove_hook('before_insert', addlog)
-        classes.SqlModel.remove_hook('after_insert', addlog)
-
-        # insert_many
-        classes.SqlModel.insert_many([{'name': 'foobar'}])
-        assert len(log) == 0, log
-        classes.SqlModel.add_hook('before_insert_many', addlog)
-        classes.SqlModel.add_hook('after_insert_many', addlog)
-        classes.SqlModel.insert_many([{'name': 'foobar'}])
-        assert len(log) == 2, log
-        classes.SqlModel.insert_many([{'name': 'foobar'}], suppress_events = True)
-        assert len(log) == 2, log
-        log.clear()
-        classes.SqlModel.remove_hook('before_insert_many', addlog)
-        classes.SqlModel.remove_hook('after_insert_many', addlog)
-
-        # update
-        item = classes.SqlModel.query().first()
-        item.update({'name': 'foodbar'})
-        assert len(log) == 0, log
-        classes.SqlModel.add_hook('before_update', addlog)
-        classes.SqlModel.add_hook('after_update', addlog)
-        item.update({'name': 'foobar'})
-        assert len(log) == 2, log
-        item.update({'name': 'foobar'}, suppress_events = True)
-        assert len(log) == 2, log
-        log.clear()
-        classes.SqlModel.remove_hook('before_update', addlog)
-        classes.SqlModel.remove_hook('after_update', addlog)
-
-        # delete
-        item = classes.SqlModel.query().first()
-        item.delete()
-        assert len(log) == 0, log
-        item = classes.SqlModel.query().first()
-        classes.SqlModel.add_hook('before_delete', addlog)
-        classes.SqlModel.add_hook('after_delete', addlog)
-        item.delete()
-        assert len(log) == 2, log
-        item.delete(suppress_events = True)
-        assert len(log) == 2, log
-        log.clear()
-        classes.SqlModel.remove_hook('before_delete', addlog)
-        classes.SqlModel.remove_hook('after_delete', addlog)
 
-        # reload
-        item = classes.SqlModel.query().first()
-        item.reload()
-        assert len(log) == 0, log
-        item = classes.SqlModel.query().first()
-        classes.SqlModel.add_hook('before_reload', addlog)
-        classes.SqlModel.add_hook('after_reload', addlog)
-        item.reload()
-        assert len(log) == 2, log
-        item.reload(suppress_events = True)
-        assert len(log) == 2, log
-        log.clear()
-        classes.SqlModel.remove_hook('before_reload', addlog)
-        classes.SqlModel.remove_hook('after_reload', addlog)
+        add_hook = classes.SqlModel.add_hook
+        remove_hook = classes.SqlModel.remove_hook
+
+        # run every action both in autocommit mode and in a transaction
+        for in_transaction in (False, True):
+            context = classes.transaction(DB_FILEPATH) if in_transaction \
+                else nullcontext()
+            with context:
+                item = classes.SqlModel.insert({'name': 'foobar'})
+                actions = (
+                    ('insert', lambda **kw: classes.SqlModel.insert(
+                        {'name': 'foobar'}, **kw
+                    )),
+                    ('insert_many', lambda **kw: classes.SqlModel.insert_many(
+                        [{'name': 'foobar'}], **kw
+                    )),
+                    ('update', lambda **kw: item.update({'name': 'foobar'}, **kw)),
+                    ('delete', lambda **kw: classes.SqlModel.insert(
+                        {'name': 'foobar'}
+                    ).delete(**kw)),
+                    ('reload', lambda **kw: item.reload(**kw)),
+                )
+
+                for name, action in actions:
+                    with self.subTest(name=name, in_transaction=in_transaction):
+                        try:
+                            action()
+                            assert len(log) == 0, log
+                            add_hook(f'before_{name}', addlog)
+                            add_hook(f'after_{name}', addlog)
+                            action()
+                            assert len(log) == 2, log
+                            action(suppress_events = True)
+                            assert len(log) == 2, log
+                        finally:
+                            log.clear()
+                            remove_hook(f'before_{name}', addlog)
+                            remove_hook(f'after_{name}', addlog)
 
     def test_SqlModel_tracks_changes_properly(self):
         sm = classes.SqlModel.insert({'name': 'test'})
@@ -467,6 +579,20 @@ class TestClasses(unittest.TestCase):
         assert model1 in models
         assert model2 in models
 
+    def test_JoinedModel_get_models_many_returns_models_for_each(self):
+        model1 = classes.SqlModel.insert({"name": "model 1"})
+        for i in range(3):
+            classes.Attachment({"details": f"attachment {i}"}).attach_to(model1).save()
+
+        joined = classes.SqlModel.query().join(
+            classes.Attachment, ["id", "related_id"]
+        ).get()
+        assert len(joined) == 3
+        models = classes.JoinedModel.get_models_many(joined)
+        assert models == [j.get_models() for j in joined], models
+        assert all(m[0] == model1 for m in models)
+        assert classes.JoinedModel.get_models_many([]) == []
+
 
     # Row test
     def test_Row_initializes_correctly(self):
@@ -510,187 +636,98 @@ class TestClasses(unittest.TestCase):
         with self.assertRaises(TypeError) as e:
             sqb = classes.SqlQueryBuilder(model='ssds')
 
-    def test_SqlQueryBuilder_is_null_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            classes.SqlQueryBuilder(classes.SqlModel).is_null(b'not a str', '')
-
-    def test_SqlQueryBuilder_is_null_adds_correct_clause(self):
-        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.is_null('name')
-        assert len(sqb.clauses) == 1, 'equal() must append to clauses'
-        assert len(sqb.params) == 0, 'equal() must not append to params'
-        assert sqb.clauses[0] == '"name" is null'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.is_null(['etc', 'thing'])
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 0, len(sqb.params)
-        assert sqb.clauses[0] == '"etc" is null'
-        assert sqb.clauses[1] == '"thing" is null'
-
-    def test_SqlQueryBuilder_not_null_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            classes.SqlQueryBuilder(classes.SqlModel).not_null(b'not a str', '')
-
-    def test_SqlQueryBuilder_not_null_adds_correct_clause(self):
-        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.not_null('name')
-        assert len(sqb.clauses) == 1, 'equal() must append to clauses'
-        assert len(sqb.params) == 0, 'equal() must not append to params'
-        assert sqb.clauses[0] == '"name" is not null'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.not_null(['etc', 'thing'])
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 0, len(sqb.params)
-        assert sqb.clauses[0] == '"etc" is not null'
-        assert sqb.clauses[1] == '"thing" is not null'
-
-    def test_SqlQueryBuilder_equal_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            classes.SqlQueryBuilder(classes.SqlModel).equal(b'not a str', '')
-
-    def test_SqlQueryBuilder_equal_adds_correct_clause_and_param(self):
-        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.equal('name', 'test')
-        assert len(sqb.clauses) == 1, 'equal() must append to clauses'
-        assert len(sqb.params) == 1, 'equal() must append to params'
-        assert sqb.clauses[0] == '"name" = ?'
-        assert sqb.params[0] == 'test'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.equal(name='test', etc='test2')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" = ?'
-        assert sqb.clauses[1] == '"etc" = ?'
-        assert sqb.params[0] == 'test'
-        assert sqb.params[1] == 'test2'
-
-    def test_SqlQueryBuilder_not_equal_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            classes.SqlQueryBuilder(classes.SqlModel).not_equal(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
-
-    def test_SqlQueryBuilder_not_equal_adds_correct_clause_and_param(self):
-        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.not_equal('name', 'test')
-        assert len(sqb.clauses) == 1, 'not_equal() must append to clauses'
-        assert len(sqb.params) == 1, 'not_equal() must append to params'
-        assert sqb.clauses[0] == '"name" != ?'
-        assert sqb.params[0] == 'test'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.not_equal(name='test', etc='test2')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" != ?'
-        assert sqb.clauses[1] == '"etc" != ?'
-        assert sqb.params[0] == 'test'
-        assert sqb.params[1] == 'test2'
-
-    def test_SqlQueryBuilder_less_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            classes.SqlQueryBuilder(classes.SqlModel).less(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
-
-    def test_SqlQueryBuilder_less_adds_correct_clause_and_param(self):
-        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.less('name', '123')
-        assert len(sqb.clauses) == 1, 'less() must append to clauses'
-        assert len(sqb.params) == 1, 'less() must append to params'
-        assert sqb.clauses[0] == '"name" < ?'
-        assert sqb.params[0] == '123'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.less(name='123', etc='456')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" < ?'
-        assert sqb.clauses[1] == '"etc" < ?'
-        assert sqb.params[0] == '123'
-        assert sqb.params[1] == '456'
-
-    def test_SqlQueryBuilder_greater_raises_TypeError_for_nonstr_column(self):
-        with self.assertRaises(TypeError) as e:
-            classes.SqlQueryBuilder(classes.SqlModel).greater(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
-
-    def test_SqlQueryBuilder_greater_adds_correct_clause_and_param(self):
-        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
-        assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
-        assert len(sqb.params) == 0, 'params must start at 0 len'
-        sqb.greater('name', '123')
-        assert len(sqb.clauses) == 1, 'greater() must append to clauses'
-        assert len(sqb.params) == 1, 'greater() must append to params'
-        assert sqb.clauses[0] == '"name" > ?'
-        assert sqb.params[0] == '123'
-
-        sqb = sqb.reset()
-        assert len(sqb.clauses) == 0, len(sqb.clauses)
-        sqb.greater(name='123', etc='456')
-        assert len(sqb.clauses) == 2, len(sqb.clauses)
-        assert len(sqb.params) == 2, len(sqb.params)
-        assert sqb.clauses[0] == '"name" > ?'
-        assert sqb.clauses[1] == '"etc" > ?'
-        assert sqb.params[0] == '123'
-        assert sqb.params[1] == '456'
+    def test_SqlQueryBuilder_operators_reject_nonstr_column(self):
+        sqb = classes.SqlQueryBuilder(classes.SqlModel)
+        column_types = r'^column must be str, list\[str,\], or tuple\[str,\]$'
+        cases = (
+            ('is_null', (b'not a str',), column_types),
+            ('not_null', (b'not a str',), column_types),
+            ('equal', (b'not a str', ''), r'^column must be str$'),
+            ('not_equal', (b'not a str', ''), r'^column must be str$'),
+            ('less', (b'not a str', ''), r'^column must be str$'),
+            ('greater', (b'not a str', ''), r'^column must be str$'),
+            ('like', (b'not a str', '', ''), r'^column must be str$'),
+        )
+        for name, args, message in cases:
+            with self.subTest(name=name):
+                with self.assertRaisesRegex(TypeError, message):
+                    getattr(sqb, name)(*args)
+        assert len(sqb.clauses) == 0, sqb.clauses
+
+    def test_SqlQueryBuilder_null_clauses_add_correct_clause(self):
+        for name, token in (('is_null', 'is null'), ('not_null', 'is not null')):
+            with self.subTest(name=name):
+                sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+                assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
+                assert len(sqb.params) == 0, 'params must start at 0 len'
+                getattr(sqb, name)('name')
+                assert len(sqb.clauses) == 1, f'{name}() must append to clauses'
+                assert len(sqb.params) == 0, f'{name}() must not append to params'
+                assert sqb.clauses[0] == f'"name" {token}'
+
+                sqb = sqb.reset()
+                assert len(sqb.clauses) == 0, len(sqb.clauses)
+                getattr(sqb, name)(['etc', 'thing'])
+                assert len(sqb.clauses) == 2, len(sqb.clauses)
+                assert len(sqb.params) == 0, len(sqb.params)
+                assert sqb.clauses[0] == f'"etc" {token}'
+                assert sqb.clauses[1] == f'"thing" {token}'
+
+    def test_SqlQueryBuilder_comparison_clauses_add_correct_clause_and_param(self):
+        operators = (
+            ('equal', '='), ('not_equal', '!='), ('less', '<'), ('greater', '>'),
+        )
+        for name, operator in operators:
+            with self.subTest(name=name):
+                sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+                assert len(sqb.clauses) == 0, 'clauses must start at 0 len'
+                assert len(sqb.params) == 0, 'params must start at 0 len'
+                getattr(sqb, name)('name', '123')
+                assert len(sqb.clauses) == 1, f'{name}() must append to clauses'
+                assert len(sqb.params) == 1, f'{name}() must append to params'
+                assert sqb.clauses[0] == f'"name" {operator} ?'
+                assert sqb.params[0] == '123'
+
+                sqb = sqb.reset()
+                assert len(sqb.clauses) == 0, len(sqb.clauses)
+                getattr(sqb, name)(name='123', etc='456')
+                assert len(sqb.clauses) == 2, len(sqb.clauses)
+                assert len(sqb.params) == 2, len(sqb.params)
+                assert sqb.clauses[0] == f'"name" {operator} ?'
+                assert sqb.clauses[1] == f'"etc" {operator} ?'
+                assert sqb.params[0] == '123'
+                assert sqb.params[1] == '456'
 
     def test_SqlQueryBuilder_like_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).like(b'not a str', '', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^pattern must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).like('', b'not a str', '')
-        assert str(e.exception) == 'pattern must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).like('', '', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).like('', 'sds', '')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^pattern cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).like('sds', '', '')
-        assert str(e.exception) == 'pattern cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).like('sds', '%?', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             classes.SqlQueryBuilder(classes.SqlModel).like(name='thing')
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             classes.SqlQueryBuilder(classes.SqlModel).like(name=('thing',))
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'pattern must be str'):
             classes.SqlQueryBuilder(classes.SqlModel).like(name=(b'not a str', 'test'))
-        assert 'pattern must be str' in str(e.exception), str(e.exception)
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'data must be str'):
             classes.SqlQueryBuilder(classes.SqlModel).like(name=('thing', b'not a str'))
-        assert 'data must be str' in str(e.exception), str(e.exception)
 
     def test_SqlQueryBuilder_like_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -713,45 +750,35 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == '456%456', sqb.params
 
     def test_SqlQueryBuilder_not_like_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like(b'not a str', '', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^pattern must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like('', b'not a str', '')
-        assert str(e.exception) == 'pattern must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like('', '', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like('', 'sds', '')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^pattern cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like('sds', '', '')
-        assert str(e.exception) == 'pattern cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like('sds', '%?', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like(name='thing')
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^each value must be tuple or list with 2 elements: pattern, data$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like(name=('thing',))
-        assert str(e.exception) == 'each value must be tuple or list with 2 elements: pattern, data'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each pattern must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like(name=(b'not a str', 'test'))
-        assert str(e.exception) == 'each pattern must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^each data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_like(name=('thing', b'not a str'))
-        assert str(e.exception) == 'each data must be str'
 
     def test_SqlQueryBuilder_not_like_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -774,25 +801,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == '456%456', sqb.params
 
     def test_SqlQueryBuilder_starts_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).starts_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).starts_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).starts_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).starts_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).starts_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_SqlQueryBuilder_starts_with_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -815,25 +837,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == 'misc%', sqb.params
 
     def test_SqlQueryBuilder_does_not_start_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_start_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_start_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_start_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_start_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_start_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_SqlQueryBuilder_does_not_start_with_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -856,25 +873,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == 'misc%', sqb.params
 
     def test_SqlQueryBuilder_contains_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).contains(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).contains('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).contains('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).contains('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).contains(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_SqlQueryBuilder_contains_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -897,25 +909,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc%', sqb.params
 
     def test_SqlQueryBuilder_excludes_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).excludes(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).excludes('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).excludes('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).excludes('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).excludes(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_SqlQueryBuilder_excludes_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -938,25 +945,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc%', sqb.params
 
     def test_SqlQueryBuilder_ends_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).ends_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).ends_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).ends_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).ends_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).ends_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_SqlQueryBuilder_ends_with_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -979,25 +981,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc', sqb.params
 
     def test_SqlQueryBuilder_does_not_end_with_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_end_with(b'not a str', '')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_end_with('', b'not a str')
-        assert str(e.exception) == 'data must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_end_with('', 'sds')
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_end_with('sds', '')
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).does_not_end_with(name=b'not a str')
-        assert str(e.exception) == 'data must be str'
 
     def test_SqlQueryBuilder_does_not_end_with_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1020,25 +1017,26 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[1] == '%misc', sqb.params
 
     def test_SqlQueryBuilder_is_in_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).is_in(b'not a str', 'not list')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be tuple or list$'):
             classes.SqlQueryBuilder(classes.SqlModel).is_in('', 'not a list')
-        assert str(e.exception) == 'data must be tuple or list'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).is_in('', ['sds'])
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).is_in('sds', [])
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'data must be tuple or list'):
             classes.SqlQueryBuilder(classes.SqlModel).is_in(name='not a list')
-        assert 'data must be tuple or list' in str(e.exception), str(e.exception)
+
+        sqb = classes.SqlQueryBuilder(classes.SqlModel)
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
+            sqb.is_in(name=('123',), other=[])
+        assert sqb.clauses == [] and sqb.params == [], \
+            'is_in() must not save partial kwargs conditions'
 
     def test_SqlQueryBuilder_is_in_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1064,25 +1062,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[3] == '654', sqb.params
 
     def test_SqlQueryBuilder_not_in_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_in(b'not a str', 'not list')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be tuple or list$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_in('', 'not a list')
-        assert str(e.exception) == 'data must be tuple or list'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^column cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_in('', ['sds'])
-        assert str(e.exception) == 'column cannot be empty'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^data cannot be empty$'):
             classes.SqlQueryBuilder(classes.SqlModel).not_in('sds', [])
-        assert str(e.exception) == 'data cannot be empty'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'data must be tuple or list'):
             classes.SqlQueryBuilder(classes.SqlModel).not_in(name='not a list')
-        assert 'data must be tuple or list' in str(e.exception), str(e.exception)
 
     def test_SqlQueryBuilder_not_in_adds_correct_clause_and_param(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1108,13 +1101,17 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[3] == '654', sqb.params
 
     def test_SqlQueryBuilder_where_raises_errors_for_invalid_input(self):
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'unrecognized condition type'):
             classes.SqlQueryBuilder(classes.SqlModel).where(not_a_condition='should not work')
-        assert 'unrecognized condition type' in str(e.exception)
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'must be dict'):
             classes.SqlQueryBuilder(classes.SqlModel).where(equal=b'not a dict')
-        assert 'must be dict' in str(e.exception)
+
+        sqb = classes.SqlQueryBuilder(classes.SqlModel).equal('id', 1)
+        with self.assertRaisesRegex(TypeError, r'must be dict'):
+            sqb.where(equal={'name': 'foo'}, less=b'not a dict')
+        assert sqb.clauses == ['"id" = ?'], sqb.clauses
+        assert sqb.params == [1], sqb.params
 
     def test_SqlQueryBuilder_where_adds_correct_clauses_and_params(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1205,25 +1202,20 @@ class TestClasses(unittest.TestCase):
         assert sqb.params[16] == '321', sqb.params[16]
 
     def test_SqlQueryBuilder_order_by_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^column must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).order_by(b'not a str', 'asc')
-        assert str(e.exception) == 'column must be str'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^direction must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).order_by('', b'not a str')
-        assert str(e.exception) == 'direction must be str'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'unrecognized column'):
             classes.SqlQueryBuilder(classes.SqlModel).order_by('', '')
-        assert 'unrecognized column' in str(e.exception)
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^direction must be asc or desc$'):
             classes.SqlQueryBuilder(classes.SqlModel).order_by('id', 'not asc or desc')
-        assert str(e.exception) == 'direction must be asc or desc'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^direction must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).order_by(name=b'not a str')
-        assert str(e.exception) == 'direction must be str'
 
     def test_SqlQueryBuilder_order_by_sets_order_column_and_order_dir(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1234,13 +1226,11 @@ class TestClasses(unittest.TestCase):
         assert sqb.order_dir == 'asc', 'order_dir must become asc'
 
     def test_SqlQueryBuilder_skip_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^offset must be positive int$'):
             classes.SqlQueryBuilder(classes.SqlModel).skip('not an int')
-        assert str(e.exception) == 'offset must be positive int'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^offset must be positive int$'):
             classes.SqlQueryBuilder(classes.SqlModel).skip(-1)
-        assert str(e.exception) == 'offset must be positive int'
 
     def test_SqlQueryBuilder_skip_sets_offset(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1248,18 +1238,16 @@ class TestClasses(unittest.TestCase):
         assert sqb.skip(5).offset == 5, 'offset must become 5'
 
     def test_SqlQueryBuilder_insert_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
             classes.SqlQueryBuilder(classes.SqlModel).insert('not a dict')
-        assert str(e.exception) == 'data must be dict'
 
         model_id = classes.SqlModel.insert({}).data['id']
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^record with this id already exists$'):
             classes.SqlQueryBuilder(
                 classes.SqlModel,
                 classes.SqliteContext
             ).insert({'id': model_id})
-        assert str(e.exception) == 'record with this id already exists'
 
     def test_SqlQueryBuilder_insert_inserts_record_into_database(self):
         sqb = classes.SqlQueryBuilder(classes.SqlModel, classes.SqliteContext)
@@ -1268,42 +1256,42 @@ class TestClasses(unittest.TestCase):
 
         assert sqb.find(model_id)
 
+    def test_SqlQueryBuilder_insert_reuses_statement_for_same_columns(self):
+        sqb = classes.SqlQueryBuilder(classes.SqlModel, classes.SqliteContext)
+        sqb.insert({'id': '1', 'name': 'first'})
+        misses = classes.insert_sql.cache_info().misses
+        sqb.insert({'name': 'second', 'id': '2'})
+        assert classes.insert_sql.cache_info().misses == misses
+        assert sqb.find('2').data['name'] == 'second'
+
     def test_SqlQueryBuilder_insert_many_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be list\[dict\]$'):
             classes.SqlQueryBuilder(classes.SqlModel).insert_many('not a list')
-        assert str(e.exception) == 'items must be list[dict]'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be list\[dict\]$'):
             classes.SqlQueryBuilder(classes.SqlModel).insert_many(['not a dict'])
-        assert str(e.exception) == 'items must be list[dict]'
 
     def test_SqlQueryBuilder_take_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^limit must be positive int$'):
             classes.SqlQueryBuilder(classes.SqlModel).take('not an int')
-        assert str(e.exception) == 'limit must be positive int'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^limit must be positive int$'):
             classes.SqlQueryBuilder(classes.SqlModel).take(0)
-        assert str(e.exception) == 'limit must be positive int'
 
     def test_SqlQueryBuilder_chunk_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^number must be int > 0$'):
             sqb = classes.SqlQueryBuilder(classes.SqlModel, classes.SqliteContext)
             sqb.chunk('not an int')
-        assert str(e.exception) == 'number must be int > 0'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^number must be int > 0$'):
             classes.SqlQueryBuilder(classes.SqlModel).chunk(0)
-        assert str(e.exception) == 'number must be int > 0'
 
     def test_SqlQueryBuilder_update_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^updates must be dict$'):
             classes.SqlQueryBuilder(classes.SqlModel).update('not a dict')
-        assert str(e.exception) == 'updates must be dict'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^conditions must be dict$'):
             classes.SqlQueryBuilder(classes.SqlModel).update({}, 'not a dict')
-        assert str(e.exception) == 'conditions must be dict'
 
     def test_SqlQueryBuilder_to_sql_returns_correct_sql_str(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1326,6 +1314,24 @@ class TestClasses(unittest.TestCase):
         sqb.skip(3)
         assert sqb.to_sql() == ' where "name" = \'foo\' order by "id" desc limit 5 offset 3', sqb.to_sql()
 
+    def test_SqlQueryBuilder_to_sql_reflects_changes_to_clauses_and_params(self):
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+        sqb.equal('name', 'foo')
+        assert sqb.to_sql() == ' where "name" = \'foo\'', sqb.to_sql()
+        sqb.params[0] = 'bar'
+        assert sqb.to_sql() == ' where "name" = \'bar\'', sqb.to_sql()
+        sqb.clauses[0] = '"name" != ?'
+        assert sqb.to_sql() == ' where "name" != \'bar\'', sqb.to_sql()
+        sqb.limit = 5
+        assert sqb.to_sql().endswith(' limit 5'), sqb.to_sql()
+        assert sqb.copy().to_sql() == sqb.to_sql()
+
+    def test_SqlQueryBuilder_to_sql_interpolates_each_placeholder_in_order(self):
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+        sqb.is_null('other').is_in('name', ['foo', 'bar']).equal('id', '1')
+        assert sqb.to_sql() == ' where "other" is null and ' + \
+            '"name" in (\'foo\',\'bar\') and "id" = \'1\'', sqb.to_sql()
+
     def test_SqlQueryBuilder_to_sql_without_interpolate_params_returns_str_and_list(self):
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
         assert type(sqb.to_sql(interpolate_params=False)) is tuple, \
@@ -1367,10 +1373,63 @@ class TestClasses(unittest.TestCase):
         assert sql1 != sql2
         assert sqb.reset().to_sql() == sql1
 
+        sqb.order_by('id', 'asc').limit = 5
+        fresh = sqb.reset()
+        assert fresh is not sqb
+        assert fresh.model is sqb.model
+        assert fresh.clauses == [] and fresh.params == []
+        assert fresh.order_column is None and fresh.limit is None
+        assert sqb.to_sql() == sql2 + ' order by "id" asc limit 5', sqb.to_sql()
+
+    def test_SqlQueryBuilder_uses_slots_and_copies_subclass_attributes(self):
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+        assert not hasattr(sqb, '__dict__')
+
+        class SQBTagged(classes.SqlQueryBuilder):
+            tag = None
+        sqb = SQBTagged(model=classes.SqlModel).equal('name', 'thing')
+        sqb.tag = 'tagged'
+        assert sqb.copy().tag == 'tagged'
+        assert sqb.copy().to_sql() == sqb.to_sql()
+        assert sqb.reset().tag == 'tagged'
+        assert sqb.reset().clauses == []
+
+    def test_SqlQueryBuilder_copy_returns_independent_instance(self):
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel).equal('name', 'thing')
+        copied = sqb.copy()
+        assert copied is not sqb
+        assert copied.to_sql() == sqb.to_sql()
+        copied.equal('id', '123')
+        assert copied.to_sql() != sqb.to_sql()
+
+    def test_SqlModel_query_returns_independent_builders(self):
+        sqb1 = classes.SqlModel.query({'name': 'thing'})
+        sqb2 = classes.SqlModel.query()
+        assert isinstance(sqb2, classes.SqlQueryBuilder)
+        assert sqb1 is not sqb2
+        assert sqb1.to_sql() != sqb2.to_sql()
+        assert sqb2.to_sql() == classes.SqlQueryBuilder(model=classes.SqlModel).to_sql()
+
+    def test_SqlModel_query_initializes_custom_builders_per_query(self):
+        inits = []
+        class QueryBuilder(classes.SqlQueryBuilder):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.log = []
+                inits.append(self)
+
+        class Derived(classes.SqlModel):
+            query_builder_class = QueryBuilder
+
+        sqb1 = Derived.query()
+        sqb2 = Derived.query()
+        assert inits == [sqb1, sqb2], inits
+        sqb1.log.append('sqb1')
+        assert sqb2.log == []
+
     def test_SqlQueryBuilder_execute_raw_raises_TypeError_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^sql must be str$'):
             classes.SqlQueryBuilder(classes.SqlModel).execute_raw(b'not str')
-        assert str(e.exception) == 'sql must be str'
 
     def test_SqlQueryBuilder_insert_inserts_record_into_datastore(self):
         # e2e test
@@ -1386,6 +1445,15 @@ class TestClasses(unittest.TestCase):
         assert sqb.find('321') is not None, \
             'find() must return a record that was inserted'
 
+    def test_SqlQueryBuilder_insert_many_inserts_all_or_nothing(self):
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+        with self.assertRaises(sqlite3.Error):
+            sqb.insert_many([
+                {'name': 'test1', 'id': '123'},
+                {'name': {'not': 'bindable'}, 'id': '321'},
+            ])
+        assert sqb.count() == 0, 'failed batch must not insert any rows'
+
     def test_SqlQueryBuilder_insert_many_inserts_records_into_datastore(self):
         # e2e test
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1403,6 +1471,17 @@ class TestClasses(unittest.TestCase):
         assert sqb.find('321') is not None, \
             'find() must return a record that was inserted'
 
+    def test_SqlQueryBuilder_insert_many_splits_large_batches(self):
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+        assert sqb.insert_many([]) == 0
+        inserted = sqb.insert_many([
+            {'name': f'test{i}', 'id': str(i)}
+            for i in range(classes.INSERT_MANY_BATCH_SIZE * 2)
+        ])
+        assert inserted == classes.INSERT_MANY_BATCH_SIZE * 2, inserted
+        assert sqb.count() == classes.INSERT_MANY_BATCH_SIZE * 2
+        assert sqb.find('0').data['name'] == 'test0'
+
     def test_SqlQueryBuilder_get_returns_all_matching_records(self):
         # e2e test
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1439,6 +1518,9 @@ class TestClasses(unittest.TestCase):
         assert sqb.starts_with('name', 'test').count() == 2
         assert sqb.reset().excludes('name', '1').count() == 2
         assert sqb.reset().is_in('name', ['other']).count() == 1
+        names = ['other', *[f'x{i}' for i in range(classes.JSON_IN_LIST_SIZE)]]
+        assert sqb.reset().is_in('name', names).count() == 1
+        assert sqb.reset().not_in('name', names).count() == 2
 
     def test_SqlQueryBuilder_skip_skips_records(self):
         # e2e test
@@ -1482,6 +1564,19 @@ class TestClasses(unittest.TestCase):
                 observed.append(int(record.data['id']))
         assert observed == expected
 
+    def test_SqlQueryBuilder_chunk_stops_after_short_chunk_and_restores_state(self):
+        offsets = []
+        class SQBCounting(classes.SqlQueryBuilder):
+            def get(self):
+                offsets.append(self.offset)
+                return super().get()
+        sqb = SQBCounting(model=classes.SqlModel)
+        sqb.insert_many([{'name': i, 'id': i} for i in range(0, 25)])
+
+        assert [len(r) for r in sqb.chunk(10)] == [10, 10, 5]
+        assert offsets == [0, 10, 20], offsets
+        assert sqb.offset is None and sqb.limit is None
+
     def test_SqlQueryBuilder_first_returns_one_record(self):
         # e2e test
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1502,6 +1597,38 @@ class TestClasses(unittest.TestCase):
         assert updates == 1
         assert sqb.find('123').data['name'] == 'test2'
 
+    def test_SqlQueryBuilder_upsert_inserts_or_updates_record(self):
+        # e2e test
+        self.cursor.execute('create unique index example_id on example (id)')
+        self.db.commit()
+        sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
+        assert sqb.upsert({'name': 'test1', 'id': '123'}) == 1
+        assert sqb.find('123').data['name'] == 'test1'
+        assert sqb.upsert({'name': 'test2', 'id': '123'}) == 1
+        assert sqb.find('123').data['name'] == 'test2'
+        assert sqb.count() == 1
+
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
+            sqb.upsert('not a dict')
+        with self.assertRaisesRegex(ValueError, r'^data must include at least one column$'):
+            sqb.upsert({'not_a_column': 1})
+        with self.assertRaisesRegex(TypeError, r'^upsert cannot be used with HashedModel$'):
+            classes.HashedModel.query().upsert({'id': '123', 'details': 'x'})
+
+        # the statement does not depend on the order of the data keys
+        misses = classes.upsert_sql.cache_info().misses
+        sqb.upsert({'id': '123', 'name': 'test3'})
+        assert classes.upsert_sql.cache_info().misses == misses
+        assert sqb.find('123').data['name'] == 'test3'
+
+    def test_upsert_sql(self):
+        sql = classes.upsert_sql('example', ('id', 'name'), ('id',))
+        assert sql == 'insert into example (id,name) values (?,?)' + \
+            ' on conflict (id) do update set name = excluded.name', sql
+        assert classes.upsert_sql('example', ('id', 'name'), ('id',)) is sql
+        sql = classes.upsert_sql('example', ('id',), ('id',))
+        assert sql.endswith(' on conflict (id) do nothing'), sql
+
     def test_SqlQueryBuilder_delete_removes_record(self):
         # e2e test
         sqb = classes.SqlQueryBuilder(model=classes.SqlModel)
@@ -1680,9 +1807,8 @@ class TestClasses(unittest.TestCase):
         assert observed == expected, 'wrong hash encountered'
 
     def test_HashedModel_insert_raises_TypeError_for_nondict_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^data must be dict$'):
             classes.HashedModel.insert('not a dict')
-        assert str(e.exception) == 'data must be dict'
 
     def test_HashedModel_insert_generates_id_and_makes_record(self):
         data = { 'details': token_bytes(8).hex() }
@@ -1700,13 +1826,11 @@ class TestClasses(unittest.TestCase):
         assert found == inserted
 
     def test_HashedModel_insert_many_raises_TypeError_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             classes.HashedModel.insert_many('not a list')
-        assert str(e.exception) == 'items must be type list[dict]'
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^items must be type list\[dict\]$'):
             classes.HashedModel.insert_many(['not a dict'])
-        assert str(e.exception) == 'items must be type list[dict]'
 
     def test_HashedModel_insert_many_generates_ids_and_makes_records(self):
         data1 = { 'details': token_bytes(8).hex() }
@@ -1726,13 +1850,11 @@ class TestClasses(unittest.TestCase):
             assert len(bytes.fromhex(item.data[classes.HashedModel.id_column])) == 32
 
     def test_HashedModel_update_raises_errors_for_invalid_input(self):
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^updates must be dict$'):
             classes.HashedModel({}).update('not a dict')
-        assert str(e.exception) == 'updates must be dict'
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^unrecognized column: badcolumn$'):
             classes.HashedModel({}).update({'badcolumn': '123'})
-        assert str(e.exception) == 'unrecognized column: badcolumn'
 
     def test_HashedModel_save_and_update_delete_original_and_makes_new_record(self):
         data1 = { 'details': token_bytes(8).hex() }
@@ -1855,6 +1977,10 @@ class TestClasses(unittest.TestCase):
         assert len(log) == 0, 'invalid test precondition'
         classes.HashedModel.insert_many([{'details': next_details()}])
         assert len(log) == 2
+        assert [kwargs['event'] for _, kwargs in log] == [
+            'before_insert_many', 'after_insert_many'
+        ], log
+        assert log[1][1]['vals'] == 1
         classes.HashedModel.insert_many([{'details': next_details()}], suppress_events=True)
         assert len(log) == 2
         classes.HashedModel.clear_hooks('before_insert_many')
@@ -1882,12 +2008,13 @@ class TestClasses(unittest.TestCase):
         classes.HashedModel.add_hook('before_delete', addlog)
         classes.HashedModel.add_hook('after_delete', addlog)
         assert len(log) == 0, 'invalid test precondition'
-        classes.HashedModel.query().first().delete()
+        first, second, third = classes.HashedModel.query().take(3)
+        first.delete()
         assert len(log) == 2, len(log)
-        classes.HashedModel.query().first().delete(suppress_events=True)
+        second.delete(suppress_events=True)
         assert len(log) == 2, len(log)
         classes.HashedModel.clear_hooks()
-        classes.HashedModel.query().first().delete()
+        third.delete()
         assert len(log) == 2, len(log)
 
 
@@ -1928,9 +2055,8 @@ class TestClasses(unittest.TestCase):
             'timestamp': 123,
         })
 
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^model_class must be accessible$'):
             deleted.restore()
-        assert str(e.exception) == 'model_class must be accessible'
 
         deleted = classes.DeletedModel.query().insert({
             'id': classes.DeletedModel.generate_id(),
@@ -1940,9 +2066,8 @@ class TestClasses(unittest.TestCase):
             'timestamp': 123,
         })
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^related_model must inherit from SqlModel$'):
             deleted.restore()
-        assert str(e.exception) == 'related_model must inherit from SqlModel'
 
     def test_DeletedModel_event_hooks(self):
         log = []
@@ -1991,9 +2116,8 @@ class TestClasses(unittest.TestCase):
         class NotValidClass:
             ...
 
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^related must inherit from SqlModel$'):
             classes.Attachment({'details': 'should fail'}).attach_to(NotValidClass())
-        assert str(e.exception) == 'related must inherit from SqlModel'
 
     def test_Attachment_attach_to_sets_related_model_and_related_id(self):
         data = { 'data': token_bytes(8).hex() }
@@ -2030,18 +2154,16 @@ class TestClasses(unittest.TestCase):
             'related_id': '321',
             'details': 'chill music is nice to listen to while coding'
         })
-        with self.assertRaises(ValueError) as e:
+        with self.assertRaisesRegex(ValueError, r'^model_class must be accessible$'):
             attachment.related()
-        assert str(e.exception) == 'model_class must be accessible'
 
         attachment = classes.Attachment.insert({
             'related_model': NotValidClass.__name__,
             'related_id': '321',
             'details': 'fail whale incoming'
         })
-        with self.assertRaises(TypeError) as e:
+        with self.assertRaisesRegex(TypeError, r'^related_model must inherit from SqlModel$'):
             attachment.related()
-        assert str(e.exception) == 'related_model must inherit from SqlModel'
 
     def test_Attachment_related_returns_SqlModel_instance(self):
         data = { 'data': token_bytes(8).hex() }
@@ -2173,12 +2295,143 @@ class TestClasses(unittest.TestCase):
         assert classes.quote_identifier('"foo"') == '"foo"'
         assert classes.quote_identifier('foo.bar') == '"foo"."bar"'
         assert classes.quote_identifier('foo.bar.baz') == '"foo"."bar"."baz"'
+        assert classes.quote_identifier('foo.bar') is classes.quote_identifier('foo.bar')
 
     def test_quote_sql_str_value(self):
         assert classes.quote_sql_str_value("foo") == "'foo'"
         assert classes.quote_sql_str_value("'foo'") == "'''foo'''"
         assert classes.quote_sql_str_value("foo's") == "'foo''s'"
 
+    def test_insert_sql(self):
+        sql = classes.insert_sql('example', ('id', 'name'))
+        assert sql == 'insert into example (id,name) values (?,?)', sql
+        assert classes.insert_sql('example', ('id', 'name')) is sql
+        sql = classes.insert_sql('example', ('id', 'name'), 'id')
+        assert sql == 'insert into example (id,name) select ?,? where not ' + \
+            'exists (select 1 from example where id = ?)', sql
+
+    def test_insert_many_sql(self):
+        sql = classes.insert_many_sql('example', ('id', 'name'), 2)
+        assert sql == 'insert into example (id,name) values (?,?),(?,?)', sql
+        assert classes.insert_many_sql('example', ('id', 'name'), 2) is sql
+        batches = list(classes.insert_many_batches(('id',), [(i,) for i in range(1200)]))
+        assert [b[0] for b in batches] == [500, 500, 200], batches
+        batches = list(classes.insert_many_batches(('a', 'b', 'c'), [(1, 2, 3)] * 400))
+        assert [b[0] for b in batches] == [333, 67], [b[0] for b in batches]
+        assert batches[1][1][:3] == [1, 2, 3]
+
+    def test_placeholders_sql(self):
+        assert classes.placeholders_sql(1) == '?'
+        assert classes.placeholders_sql(3) == '?,?,?'
+        assert classes.placeholders_sql(3) is classes.placeholders_sql(3)
+
+    def test_in_sql(self):
+        assert classes.in_sql('id', ['1', '2']) == ('"id" in (?,?)', ['1', '2'])
+        assert classes.in_sql('id', (1,), True) == ('"id" not in (?)', [1])
+
+        size = classes.JSON_IN_LIST_SIZE + 1
+        if classes.SQLITE_HAS_JSON1:
+            clause, params = classes.in_sql('id', [str(i) for i in range(size)])
+            assert clause == '"id" in (select value from json_each(?))', clause
+            assert len(params) == 1 and params[0].startswith('["0", "1"'), params
+        clause, params = classes.in_sql('id', list(range(size)))
+        assert len(params) == size, 'non-str lists must use placeholders'
+
+        json1 = classes.SQLITE_HAS_JSON1
+        try:
+            classes.SQLITE_HAS_JSON1 = False
+            clause, params = classes.in_sql('id', [str(i) for i in range(size)])
+            assert clause.startswith('"id" in (?,?'), clause
+            assert len(params) == size, 'must use placeholders without JSON1'
+        finally:
+            classes.SQLITE_HAS_JSON1 = json1
+
+    def test_find_sql(self):
+        sql = classes.find_sql('example', ('id', 'name'), 'id')
+        assert sql == 'select id,name from example where id = ?', sql
+        assert classes.find_sql('example', ('id', 'name'), 'id') is sql
+
+    def test_like_sql(self):
+        sql = classes.like_sql('name')
+        assert sql == '"name" like ?', sql
+        assert classes.like_sql('name') is sql
+        assert classes.like_sql('t.name', True) == '"t"."name" not like ?'
+
+    def test_boolean_column_set(self):
+        columns = tuple(ExampleModel.columns)
+        booleans = classes.boolean_column_set(ExampleModel, columns)
+        assert booleans == {'field3', 'field3n', 'field3d', 'field3nd'}, booleans
+        assert classes.boolean_column_set(ExampleModel, columns) is booleans
+
+    def test_boolean_column_set_follows_annotations_and_frees_classes(self):
+        class Model(classes.SqlModel):
+            columns = ('id', 'flag')
+            flag: str
+        assert classes.boolean_column_set(Model, Model.columns) == set()
+        Model.__annotations__['flag'] = bool
+        assert classes.boolean_column_set(Model, Model.columns) == {'flag'}
+
+        ref = weakref.ref(Model)
+        del Model
+        gc.collect()
+        assert ref() is None
+
+    def test_column_defaults(self):
+        columns = tuple(ExampleHashedModel.columns)
+        defaults = classes.column_defaults(ExampleHashedModel, columns, 'id')
+        assert 'id' not in defaults
+        assert defaults['field1'] is None
+        assert defaults['field1d'] == 'foobar'
+        assert defaults['field2d'] == 123
+        assert defaults['field3d'] is True
+        assert defaults['field4d'] == b'123'
+        assert defaults['field5d'] == 1.23
+        assert defaults['field1nd'] == 'foobar'
+        assert classes.column_defaults(ExampleHashedModel, columns, 'id') is defaults
+
+    def test_column_defaults_follows_annotations_and_frees_classes(self):
+        class Model(classes.HashedModel):
+            columns = ('id', 'details')
+            details: str
+        assert classes.column_defaults(Model, Model.columns, 'id') == {'details': None}
+        Model.__annotations__['details'] = str|DEFAULT_STR
+        assert classes.column_defaults(Model, Model.columns, 'id') == {'details': 'foobar'}
+
+        ref = weakref.ref(Model)
+        del Model
+        gc.collect()
+        assert ref() is None
+
+    def test_hashed_columns(self):
+        columns = ('id', 'details', 'note', 'extra')
+        hashed = classes.hashed_columns(columns, 'id', ('note',))
+        assert hashed == ('details', 'extra'), hashed
+        assert classes.hashed_columns(columns, 'id', ('note',)) is hashed
+
+    def test_joined_columns(self):
+        columns = tuple(ExampleModel.columns)
+        joined = classes.joined_columns(ExampleModel, 'example_models', columns)
+        assert [c for c, _, _ in joined] == list(columns)
+        assert all(key == f'example_models.{c}' for c, key, _ in joined)
+        booleans = {c for c, _, is_bool in joined if is_bool}
+        assert booleans == {'field3', 'field3n', 'field3d', 'field3nd'}, booleans
+        assert classes.joined_columns(ExampleModel, 'example_models', columns) is joined
+
+    def test_joined_columns_follows_annotations_and_frees_classes(self):
+        class Model(classes.SqlModel):
+            columns = ('id', 'flag')
+            flag: str
+        joined = classes.joined_columns(Model, 'models', Model.columns)
+        assert joined[1] == ('flag', 'models.flag', False), joined
+        Model.__annotations__['flag'] = bool
+        joined = classes.joined_columns(Model, 'models', Model.columns)
+        assert joined[1] == ('flag', 'models.flag', True), joined
+
+        ref = weakref.ref(Model)
+        del Model, joined
+        gc.collect()
+        assert ref() is None
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,12 +1,12 @@
-from context import errors, interfaces, migration, classes
-from genericpath import isfile
+from context import errors, interfaces, migration, classes, db_path
+from pathlib import Path
 import os
 import sqlite3
 import string
 import unittest
 
 
-DB_FILEPATH = 'test.db'
+DB_FILEPATH = db_path('migration') + '.db'
 
 
 class TestMigration(unittest.TestCase):
@@ -15,31 +15,26 @@ class TestMigration(unittest.TestCase):
 
     def setUp(self) -> None:
         """Set up the test database."""
-        try:
-            if isfile(DB_FILEPATH):
-                os.remove(DB_FILEPATH)
-        except:
-            ...
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         self.db = sqlite3.connect(DB_FILEPATH)
         self.cursor = self.db.cursor()
 
     def tearDown(self) -> None:
         """Close cursor and delete test database."""
-        q = "select name from sqlite_master where type='table'"
+        q = "select name from sqlite_master where type='table' " + \
+            "and name not like 'sqlite_%'"
         self.cursor.execute(q)
         results = self.cursor.fetchall()
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                self.cursor.execute(q)
-            except BaseException as e:
-                print(e)
+        try:
+            self.cursor.executescript(''.join([
+                f'drop table if exists "{result[0]}";' for result in results
+            ]))
+        except sqlite3.Error as e:
+            print(e)
         self.cursor.close()
         self.db.close()
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        classes.close_pooled_connections()
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         return super().tearDown()
 
     def test_migration_has_necessary_classes(self):
@@ -1,12 +1,12 @@
 from __future__ import annotations
-from context import classes, errors, interfaces, relations
-from genericpath import isfile
+from context import classes, errors, interfaces, relations, db_path
+from pathlib import Path
 import os
 import sqlite3
 import unittest
 
 
-DB_FILEPATH = 'test.db'
+DB_FILEPATH = db_path('relations') + '.db'
 
 
 class Pivot(classes.SqlModel):
@@ -22,11 +22,7 @@ class TestRelations(unittest.TestCase):
 
     def setUp(self) -> None:
         """Set up the test database."""
-        try:
-            if isfile(self.db_filepath):
-                os.remove(self.db_filepath)
-        except:
-            ...
+        Path(self.db_filepath).unlink(missing_ok=True)
         self.db = sqlite3.connect(self.db_filepath)
         self.cursor = self.db.cursor()
         self.cursor.execute('create table pivot (id text, first_id text, second_id text)')
@@ -69,21 +65,20 @@ class TestRelations(unittest.TestCase):
 
     def tearDown(self) -> None:
         """Close cursor and delete test database."""
-        q = "select name from sqlite_master where type='table'"
+        q = "select name from sqlite_master where type='table' " + \
+            "and name not like 'sqlite_%'"
         self.cursor.execute(q)
         results = self.cursor.fetchall()
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                self.cursor.execute(q)
-            except BaseException as e:
-                print(e)
+        try:
+            self.cursor.executescript(''.join([
+                f'drop table if exists "{result[0]}";' for result in results
+            ]))
+        except sqlite3.Error as e:
+            print(e)
         self.cursor.close()
         self.db.close()
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        classes.close_pooled_connections()
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         return super().tearDown()
 
     # Relation tests
@@ -333,6 +328,17 @@ class TestRelations(unittest.TestCase):
         assert owned.data['details'] == '321'
         assert owned.data['owner_id'] == owner.data['id']
 
+    def test_has_one_function_fixes_default_foreign_id_column(self):
+        self.OwnerModel.__name__ = 'Owner'
+        self.OwnerModel.owned = relations.has_one(
+            self.OwnerModel,
+            self.OwnedModel
+        )
+        self.OwnerModel.__name__ = 'Renamed'
+
+        owner = self.OwnerModel.insert({'details': '321'})
+        assert owner.owned().foreign_id_column == 'owner_id'
+
     def test_has_one_function_sets_property_from_HasOne(self):
         self.OwnerModel.owned = relations.has_one(
             self.OwnerModel,
@@ -400,6 +406,81 @@ class TestRelations(unittest.TestCase):
         assert owner.owned
         assert owner.owned.id == owned.id
 
+    def test_related_property_creates_relation_on_first_use(self):
+        self.OwnerModel.owned = relations.has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = self.OwnerModel.insert({'details': '321'})
+        assert owner.relations == {}
+        owned = self.OwnedModel.insert({'details': '321'})
+        owner.owned = [owned]
+        assert len(owner.relations) == 1
+        assert owner.owned().primary is owner
+
+    def test_related_property_reuses_tuple_until_secondary_changes(self):
+        self.OwnerModel.owned = relations.has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = self.OwnerModel.insert({'details': '321'})
+        owned1 = self.OwnedModel.insert({'details': '1'})
+        owned2 = self.OwnedModel.insert({'details': '2'})
+
+        owner.owned = [owned1, owned2, owned2]
+        models = owner.owned
+        assert models == (owned1, owned2)
+        assert owner.owned is models
+
+        owner.owned = [owned2]
+        assert owner.owned is not models
+        assert owner.owned == (owned2,)
+        assert owner.owned() is models()
+
+        # empty collections are reused as well
+        unsaved = self.OwnerModel({'details': 'unsaved'})
+        assert unsaved.owned == ()
+        assert unsaved.owned is unsaved.owned
+
+    def test_related_property_membership_checks_identity_and_equality(self):
+        self.OwnerModel.owned = relations.has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = self.OwnerModel.insert({'details': '321'})
+        owned1 = self.OwnedModel.insert({'details': '1'})
+        owned2 = self.OwnedModel.insert({'details': '2'})
+        owner.owned = [owned1]
+
+        assert owned1 in owner.owned
+        assert owned2 not in owner.owned
+        assert self.OwnedModel(data={**owned1.data}) in owner.owned
+        changed = self.OwnedModel(data={**owned1.data, 'details': 'changed'})
+        assert changed not in owner.owned
+        assert 'not a model' not in owner.owned
+
+    def test_has_one_related_property_rebuilds_missing_relation(self):
+        self.OwnerModel.owned = relations.has_one(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+
+        owner = self.OwnerModel.insert({'details': '321'})
+        owned = self.OwnedModel.insert({
+            'details': '321',
+            'owner_id': owner.id,
+        })
+        owner.relations = {}
+        assert owner.owned
+        assert owner.owned.id == owned.id
+
     # HasMany tests
     def test_HasMany_extends_Relation(self):
         assert issubclass(relations.HasMany, relations.Relation)
@@ -513,6 +594,38 @@ class TestRelations(unittest.TestCase):
         assert not len(hasmany.secondary_to_add)
         assert not len(hasmany.secondary_to_remove)
 
+    def test_HasMany_save_skips_queries_when_nothing_changed(self):
+        updates = []
+        class QueryBuilder(classes.SqlQueryBuilder):
+            def update(self, updates_: dict, conditions: dict = {}) -> int:
+                updates.append(updates_)
+                return super().update(updates_, conditions)
+        self.OwnedModel.query_builder_class = QueryBuilder
+
+        hasmany = relations.HasMany(
+            'owner_id',
+            primary_class=self.OwnerModel,
+            secondary_class=self.OwnedModel
+        )
+        hasmany.primary = self.OwnerModel.insert({'details': 'owner'})
+        hasmany.secondary = [self.OwnedModel.insert({'details': 'owned'})]
+        hasmany.save()
+        assert len(updates) == 1
+        hasmany.save()
+        assert len(updates) == 1
+
+        hasmany.reload()
+        hasmany.save()
+        assert len(updates) == 1
+
+        hasmany.secondary = [
+            *hasmany.secondary,
+            self.OwnedModel.insert({'details': 'owned2'})
+        ]
+        hasmany.save()
+        assert len(updates) == 2
+        assert len(hasmany.reload().secondary) == 2
+
     def test_HasMany_changing_primary_and_secondary_updates_models_correctly(self):
         hasmany = relations.HasMany(
             'owner_id',
@@ -1027,6 +1140,77 @@ class TestRelations(unittest.TestCase):
         assert not len(belongstomany.secondary_to_add)
         assert not len(belongstomany.secondary_to_remove)
 
+    def test_BelongsToMany_secondary_setter_tracks_changes_across_reassignment(self):
+        belongstomany = relations.BelongsToMany(
+            Pivot,
+            'first_id',
+            'second_id',
+            primary_class=self.OwnedModel,
+            secondary_class=self.OwnerModel
+        )
+        primary = self.OwnedModel.insert({'details':'321'})
+        secondary1 = self.OwnerModel.insert({'details': '321ads'})
+        secondary2 = self.OwnerModel.insert({'details': 'sdsdsd'})
+
+        belongstomany.primary = primary
+        belongstomany.secondary = [secondary1]
+        belongstomany.secondary = [secondary1, secondary2]
+        assert belongstomany.secondary_to_add == [secondary1, secondary2]
+        assert belongstomany.secondary_to_remove == []
+
+        belongstomany.secondary = [secondary2]
+        assert belongstomany.secondary_to_add == [secondary2]
+        assert belongstomany.secondary_to_remove == []
+
+        belongstomany.save()
+        assert Pivot.query().count() == 1
+
+    def test_BelongsToMany_save_does_not_duplicate_existing_pivots(self):
+        belongstomany = relations.BelongsToMany(
+            Pivot,
+            'first_id',
+            'second_id',
+            primary_class=self.OwnedModel,
+            secondary_class=self.OwnerModel
+        )
+        primary = self.OwnedModel.insert({'details':'321'})
+        secondary1 = self.OwnerModel.insert({'details': '321ads'})
+        secondary2 = self.OwnerModel.insert({'details': 'sdsdsd'})
+
+        belongstomany.primary = primary
+        belongstomany.secondary = [secondary1]
+        belongstomany.save()
+        assert Pivot.query().count() == 1
+
+        belongstomany.secondary = [secondary1, secondary2]
+        belongstomany.save()
+        assert Pivot.query().count() == 2
+
+    def test_BelongsToMany_reload_loads_each_secondary_once(self):
+        belongstomany = relations.BelongsToMany(
+            Pivot,
+            'first_id',
+            'second_id',
+            primary_class=self.OwnedModel,
+            secondary_class=self.OwnerModel
+        )
+        primary = self.OwnedModel.insert({'details':'321'})
+        secondary1 = self.OwnerModel.insert({'details': '321ads'})
+        secondary2 = self.OwnerModel.insert({'details': 'sdsdsd'})
+        Pivot.insert_many([
+            {'first_id': primary.id, 'second_id': secondary1.id},
+            {'first_id': primary.id, 'second_id': secondary1.id},
+            {'first_id': primary.id, 'second_id': secondary2.id},
+        ])
+
+        belongstomany.primary = primary
+        belongstomany.reload()
+        assert len(belongstomany.secondary) == 2
+        by_id = {s.id: s for s in belongstomany.secondary}
+        assert by_id[secondary1.id].data == secondary1.data
+        assert by_id[secondary2.id].data == secondary2.data
+        assert type(by_id[secondary1.id]) is self.OwnerModel
+
     def test_BelongsToMany_changing_primary_and_secondary_updates_models_correctly(self):
         belongstomany = relations.BelongsToMany(
             Pivot,
@@ -1536,6 +1720,47 @@ class TestRelations(unittest.TestCase):
         within.save()
         assert within.query().count() == 1
 
+    def test_Within_save_skips_unchanged_secondaries(self):
+        within = relations.Within(
+            'parent_ids',
+            primary_class=self.DAGItem,
+            secondary_class=self.DAGItem
+        )
+        primary = self.DAGItem.insert({'details': '321ads'})
+        secondary = self.DAGItem({'details':'321'})
+
+        within.primary = primary
+        within.secondary = [secondary]
+        within.save()
+
+        saved = []
+        def hook(cls, *args, **kwargs):
+            saved.append(kwargs['self'])
+        self.DAGItem.add_hook('before_save', hook)
+        within.save()
+        assert saved == []
+
+        secondary.data['details'] = 'changed'
+        within.save()
+        assert saved == [secondary]
+
+    def test_Within_save_inserts_new_secondaries_with_preset_ids(self):
+        within = relations.Within(
+            'owner_id',
+            primary_class=self.OwnerModel,
+            secondary_class=self.OwnedModel
+        )
+        primary = self.OwnerModel.insert({'details': 'owner'})
+        secondary = self.OwnedModel({
+            'id': 'owned1', 'owner_id': primary.id, 'details': '321'
+        })
+
+        within.primary = primary
+        within.secondary = [secondary]
+        within.save()
+        assert self.OwnedModel.find('owned1') is not None
+        assert within.query().count() == 1
+
     def test_Within_save_unsets_change_tracking_properties(self):
         within = relations.Within(
             'parent_ids',
@@ -1683,7 +1908,7 @@ class TestRelations(unittest.TestCase):
         parent2.children = [child2]
         parent2.children().save()
 
-        assert child1.relations != child2.relations
+        assert child1.children() is not child2.children()
         assert parent1.children() is not parent2.children()
         assert parent1.children[0].data['id'] == child1.data['id']
         assert parent2.children[0].data['id'] == child2.data['id']
@@ -1714,6 +1939,197 @@ class TestRelations(unittest.TestCase):
         assert len(parent.children) == 1
         assert parent.children[0].id == child.id
 
+    # prefetch tests
+    def _count_queries(self, model_class) -> list:
+        queries = []
+        class QueryBuilder(classes.SqlQueryBuilder):
+            def get(self):
+                queries.append(self.to_sql())
+                return super().get()
+        model_class.query_builder_class = QueryBuilder
+        return queries
+
+    def test_prefetch_loads_has_many_with_one_query(self):
+        self.OwnerModel.owned = relations.has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+        owners = [
+            self.OwnerModel.insert({'details': 'owner1'}),
+            self.OwnerModel.insert({'details': 'owner2'}),
+            self.OwnerModel.insert({'details': 'owner3'}),
+        ]
+        owned1 = self.OwnedModel.insert({'details': '1', 'owner_id': owners[0].id})
+        owned2 = self.OwnedModel.insert({'details': '2', 'owner_id': owners[0].id})
+        owned3 = self.OwnedModel.insert({'details': '3', 'owner_id': owners[1].id})
+        owners = [self.OwnerModel.find(o.id) for o in owners]
+        queries = self._count_queries(self.OwnedModel)
+
+        assert relations.prefetch(owners, 'owned') is owners
+        assert len(queries) == 1
+        assert owners[0].owned == (owned1, owned2)
+        assert owners[1].owned == (owned3,)
+        assert owners[2].owned == ()
+        assert len(queries) == 1
+
+    def test_prefetch_loads_belongs_to_with_one_query(self):
+        self.OwnedModel.owner = relations.belongs_to(
+            self.OwnedModel,
+            self.OwnerModel,
+            'owner_id'
+        )
+        owner1 = self.OwnerModel.insert({'details': 'owner1'})
+        owner2 = self.OwnerModel.insert({'details': 'owner2'})
+        owned = [
+            self.OwnedModel.insert({'details': '1', 'owner_id': owner1.id}),
+            self.OwnedModel.insert({'details': '2', 'owner_id': owner2.id}),
+            self.OwnedModel.insert({'details': '3', 'owner_id': owner2.id}),
+        ]
+        queries = self._count_queries(self.OwnerModel)
+
+        relations.prefetch(owned, 'owner')
+        assert len(queries) == 1
+        assert owned[0].owner.data == owner1.data
+        assert owned[1].owner.data == owner2.data
+        assert owned[2].owner.data == owner2.data
+        assert len(queries) == 1
+
+    def test_prefetch_loads_belongs_to_many_with_one_query(self):
+        self.OwnedModel.owners = relations.belongs_to_many(
+            self.OwnedModel,
+            self.OwnerModel,
+            Pivot,
+            'first_id',
+            'second_id',
+        )
+        owner1 = self.OwnerModel.insert({'details': 'owner1'})
+        owner2 = self.OwnerModel.insert({'details': 'owner2'})
+        owned = [
+            self.OwnedModel.insert({'details': '1'}),
+            self.OwnedModel.insert({'details': '2'}),
+            self.OwnedModel.insert({'details': '3'}),
+        ]
+        owned[0].owners = [owner1, owner2]
+        owned[0].owners().save()
+        owned[1].owners = [owner2]
+        owned[1].owners().save()
+        owned = [self.OwnedModel.find(o.id) for o in owned]
+        queries = self._count_queries(self.OwnerModel)
+
+        relations.prefetch(owned, 'owners')
+        assert len(queries) == 1
+        assert len(owned[0].owners) == 2
+        assert owner1 in owned[0].owners and owner2 in owned[0].owners
+        assert owned[1].owners == (owner2,)
+        assert owned[2].owners == ()
+        assert len(queries) == 1
+
+    def test_prefetch_loads_contains_with_one_query(self):
+        self.DAGItem.parents = relations.contains(
+            self.DAGItem,
+            self.DAGItem,
+            'parent_ids',
+        )
+        parent1 = self.DAGItem.insert({'details': 'parent1'})
+        parent2 = self.DAGItem.insert({'details': 'parent2'})
+        child1 = self.DAGItem.insert({'details': 'child1', 'parent_ids': parent1.id})
+        child2 = self.DAGItem.insert({'details': 'child2', 'parent_ids': ','.join(sorted([parent1.id, parent2.id]))})
+        children = [self.DAGItem.find(child1.id), self.DAGItem.find(child2.id)]
+        queries = self._count_queries(self.DAGItem)
+
+        relations.prefetch(children, 'parents')
+        assert len(queries) == 1
+        assert children[0].parents == (parent1,)
+        assert len(children[1].parents) == 2
+        assert parent1 in children[1].parents and parent2 in children[1].parents
+        assert len(queries) == 1
+
+    def test_prefetch_loads_within_for_each_relation(self):
+        self.DAGItem.children = relations.within(
+            self.DAGItem,
+            self.DAGItem,
+            'parent_ids',
+        )
+        parent1 = self.DAGItem.insert({'details': 'parent1'})
+        parent2 = self.DAGItem.insert({'details': 'parent2'})
+        child1 = self.DAGItem.insert({'details': 'child1', 'parent_ids': parent1.id})
+        child2 = self.DAGItem.insert({'details': 'child2', 'parent_ids': ','.join(sorted([parent1.id, parent2.id]))})
+        parents = [self.DAGItem.find(parent1.id), self.DAGItem.find(parent2.id)]
+        queries = self._count_queries(self.DAGItem)
+
+        relations.prefetch(parents, 'children')
+        assert len(queries) == 2
+        assert type(parents[0].children().secondary) is tuple
+        assert len(parents[0].children) == 2
+        assert child1 in parents[0].children and child2 in parents[0].children
+        assert parents[1].children == (child2,)
+        assert len(queries) == 2
+
+    def test_prefetch_marks_missing_single_relations_as_loaded(self):
+        self.OwnerModel.owned = relations.has_one(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+        self.OwnedModel.owner = relations.belongs_to(
+            self.OwnedModel,
+            self.OwnerModel,
+            'owner_id'
+        )
+        owners = [self.OwnerModel.insert({'details': 'no owned'})]
+        owned = [
+            self.OwnedModel.insert({'details': '1', 'owner_id': '123'}),
+            self.OwnedModel.insert({'details': '2', 'owner_id': None}),
+        ]
+        def count_queries(model_class) -> list:
+            queries = []
+            class QueryBuilder(classes.SqlQueryBuilder):
+                def get(self):
+                    queries.append('get')
+                    return super().get()
+                def first(self):
+                    queries.append('first')
+                    return super().first()
+                def find(self, id):
+                    queries.append('find')
+                    return super().find(id)
+            model_class.query_builder_class = QueryBuilder
+            return queries
+        owned_queries = count_queries(self.OwnedModel)
+        owner_queries = count_queries(self.OwnerModel)
+
+        relations.prefetch(owners, 'owned')
+        relations.prefetch(owned, 'owner')
+        assert len(owned_queries) == 1
+        assert len(owner_queries) == 1
+        assert not owners[0].owned
+        assert not owned[0].owner
+        assert not owned[1].owner
+        assert len(owned_queries) == 1
+        assert len(owner_queries) == 1
+
+    def test_relation_of_returns_relation_of_related_property(self):
+        self.OwnerModel.owned = relations.has_many(
+            self.OwnerModel,
+            self.OwnedModel,
+            'owner_id'
+        )
+        owner = self.OwnerModel.insert({'details': 'owner'})
+        relation = relations.relation_of(owner, 'owned')
+        assert isinstance(relation, relations.HasMany)
+        assert relation is owner.owned()
+        with self.assertRaises(TypeError) as e:
+            relations.relation_of(owner, 'details')
+        assert str(e.exception) == 'details must be a related property'
+
+    def test_prefetch_raises_TypeError_for_invalid_name(self):
+        owner = self.OwnerModel.insert({'details': 'owner'})
+        with self.assertRaises(TypeError) as e:
+            relations.prefetch([owner], 'details')
+        assert str(e.exception) == 'details must be a related property'
+        assert relations.prefetch([], 'details') == []
+
     # e2e tests
     def test_HasOne_BelongsTo_e2e(self):
         self.OwnerModel.__name__ = 'Owner'
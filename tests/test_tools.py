@@ -1,13 +1,15 @@
-from context import tools, classes
-from genericpath import isdir, isfile
+from context import tools, classes, db_path
+from genericpath import isdir
+from pathlib import Path
 from secrets import token_hex
 import os
+import shutil
 import sqlite3
 import unittest
 
 
-DB_FILEPATH = 'test.db'
-MIGRATIONS_PATH = 'tests/temp/migrations'
+DB_FILEPATH = db_path('tools') + '.db'
+MIGRATIONS_PATH = db_path('tools') + '_migrations'
 
 
 class TestIntegration(unittest.TestCase):
@@ -16,11 +18,7 @@ class TestIntegration(unittest.TestCase):
 
     def setUp(self):
         """Set up the test database."""
-        try:
-            if isfile(DB_FILEPATH):
-                os.remove(DB_FILEPATH)
-        except:
-            ...
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         self.db = sqlite3.connect(DB_FILEPATH)
         self.cursor = self.db.cursor()
         if not isdir(MIGRATIONS_PATH):
@@ -32,26 +30,31 @@ class TestIntegration(unittest.TestCase):
 
     def tearDown(self):
         """Close cursor and delete test database."""
-        q = "select name from sqlite_master where type='table'"
+        q = "select name from sqlite_master where type='table' " + \
+            "and name not like 'sqlite_%'"
         self.cursor.execute(q)
         results = self.cursor.fetchall()
-        for result in results:
-            q = f"drop table if exists {result[0]};"
-            try:
-                self.cursor.execute(q)
-            except BaseException as e:
-                print(e)
+        try:
+            self.cursor.executescript(''.join([
+                f'drop table if exists "{result[0]}";' for result in results
+            ]))
+        except sqlite3.Error as e:
+            print(e)
         self.cursor.close()
         self.db.close()
-        try:
-            os.remove(DB_FILEPATH)
-        except:
-            ...
+        classes.close_pooled_connections()
+        Path(DB_FILEPATH).unlink(missing_ok=True)
         for file in os.listdir(MIGRATIONS_PATH):
             if 'migration' in file and file[-3:] == '.py':
                 os.remove(f"{MIGRATIONS_PATH}/{file}")
         return super().tearDown()
 
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Remove the migrations directory."""
+        shutil.rmtree(MIGRATIONS_PATH, ignore_errors=True)
+        return super().tearDownClass()
+
     def test_make_migration_create_returns_str_with_correct_content(self):
         name = token_hex(4)
         result = tools.make_migration_create(name, DB_FILEPATH)